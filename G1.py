@@ -1,31 +1,413 @@
+import argparse
+import csv
+import gzip
 import sqlite3
+import sys
+import time
+from contextlib import closing
+from itertools import islice
+
+from G2 import standardize_city_name
 
 DB_NAME = 'nh_routes.db'
+SCHEMA_VERSION = 6  # Stored in PRAGMA user_version
+ROAD_CLASSES = ("expressway", "nh", "sh", "hill")  # Speed profiles per class live in timedep.py
+MAX_DISTANCE_KM = 1e9  # Upper bound in the roads CHECK; keeps inf (and absurd values) out
+
+# --- Bulk Import Settings ---
+IMPORT_CHUNK_SIZE = 20000  # Rows per transaction
+IMPORT_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",     # Readers (G2) keep working during the import
+    "PRAGMA synchronous = NORMAL",   # fsync per checkpoint, not per commit; safe with WAL
+    "PRAGMA cache_size = -65536",    # 64 MiB page cache
+    "PRAGMA temp_store = MEMORY",
+)
+
+# --- SCHEMA ---
+# Cities and roads are normalized: every city name is stored once, and every
+# undirected road once with city_a < city_b. Each insert, update and delete on
+# roads is appended to road_changes, which G2 replays to update its in-memory
+# graph in place of rebuilding it. 'routes' stays available as a view
+# for readers of the original table layout.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    latitude REAL,   -- Degrees north; NULL when unknown
+    longitude REAL   -- Degrees east
+);
+
+CREATE TABLE IF NOT EXISTS roads (
+    id INTEGER PRIMARY KEY,
+    city_a INTEGER NOT NULL REFERENCES cities (id),
+    city_b INTEGER NOT NULL REFERENCES cities (id),
+    distance_km REAL NOT NULL CHECK (distance_km > 0 AND distance_km < 1e9),  -- MAX_DISTANCE_KM
+    road_class TEXT NOT NULL DEFAULT 'nh',  -- One of ROAD_CLASSES
+    CHECK (city_a < city_b),
+    UNIQUE (city_a, city_b)
+);
+-- Covering index for lookups from the second endpoint (the UNIQUE index serves city_a)
+CREATE INDEX IF NOT EXISTS idx_roads_city_b ON roads (city_b, city_a, distance_km);
+
+CREATE TABLE IF NOT EXISTS road_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_city TEXT NOT NULL,
+    destination_city TEXT NOT NULL,
+    distance_km REAL  -- NULL when the road was deleted
+);
+
+-- Graph snapshots exported by snapshot.py: the routes checksum each was taken
+-- at, and the road_changes position that checksum belongs to
+CREATE TABLE IF NOT EXISTS snapshots (
+    checksum TEXT PRIMARY KEY,
+    change_seq INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS roads_after_insert AFTER INSERT ON roads BEGIN
+    INSERT INTO road_changes (source_city, destination_city, distance_km) VALUES (
+        (SELECT name FROM cities WHERE id = NEW.city_a), (SELECT name FROM cities WHERE id = NEW.city_b), NEW.distance_km);
+END;
+CREATE TRIGGER IF NOT EXISTS roads_after_update AFTER UPDATE OF city_a, city_b, distance_km ON roads BEGIN
+    INSERT INTO road_changes (source_city, destination_city, distance_km) VALUES (
+        (SELECT name FROM cities WHERE id = OLD.city_a), (SELECT name FROM cities WHERE id = OLD.city_b), NULL);
+    INSERT INTO road_changes (source_city, destination_city, distance_km) VALUES (
+        (SELECT name FROM cities WHERE id = NEW.city_a), (SELECT name FROM cities WHERE id = NEW.city_b), NEW.distance_km);
+END;
+CREATE TRIGGER IF NOT EXISTS roads_after_delete AFTER DELETE ON roads BEGIN
+    INSERT INTO road_changes (source_city, destination_city, distance_km) VALUES (
+        (SELECT name FROM cities WHERE id = OLD.city_a), (SELECT name FROM cities WHERE id = OLD.city_b), NULL);
+END;
+
+CREATE VIEW IF NOT EXISTS routes AS
+    SELECT r.id AS id, a.name AS source_city, b.name AS destination_city, r.distance_km AS distance_km
+    FROM roads r
+    JOIN cities a ON a.id = r.city_a
+    JOIN cities b ON b.id = r.city_b;
+'''
+
+def migrate_db(conn):
+    """
+    Brings a database up to SCHEMA_VERSION. Version 2 normalized the routes table
+    (see _migrate_to_v2); version 3 adds the city coordinates used by G2's A* search;
+    version 4 adds road classes, whose changes stay out of the change log;
+    version 5 adds the snapshots table; version 6 bounds road distances (see _migrate_to_v6).
+    """
+    cursor = conn.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    if version < 2:
+        _migrate_to_v2(conn)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(cities)")}
+    for column in ("latitude", "longitude"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE cities ADD COLUMN {column} REAL")
+    if "road_class" not in {row[1] for row in cursor.execute("PRAGMA table_info(roads)")}:
+        cursor.execute("ALTER TABLE roads ADD COLUMN road_class TEXT NOT NULL DEFAULT 'nh'")
+    # Older update triggers fire on any column; recreate them from SCHEMA
+    trigger = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'roads_after_update'").fetchone()
+    if trigger and "UPDATE OF" not in trigger[0]:
+        cursor.execute("DROP TRIGGER roads_after_update")
+    conn.commit()
+    if version < 6:
+        _migrate_to_v6(conn)
+    cursor.executescript(SCHEMA)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+def _migrate_to_v2(conn):
+    """
+    Copies a version-1 database (a plain 'routes' table with possible duplicate
+    pairs) into cities/roads, keeping the last distance seen for a repeated pair,
+    and replaces 'routes' with the view.
+    """
+    cursor = conn.cursor()
+
+    # Move the original table aside so the 'routes' name is free for the view.
+    # routes_v1 survives an interrupted migration and is picked up on the next run.
+    kind = cursor.execute("SELECT type FROM sqlite_master WHERE name = 'routes'").fetchone()
+    if kind and kind[0] == 'table':
+        cursor.execute("ALTER TABLE routes RENAME TO routes_v1")
+        conn.commit()
+
+    cursor.executescript(SCHEMA)
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'routes_v1'").fetchone():
+        rows = cursor.execute("SELECT source_city, destination_city, distance_km FROM routes_v1 ORDER BY id").fetchall()
+        for src, dest, dist in rows:
+            if standardize_city_name(src) != standardize_city_name(dest):
+                upsert_road(cursor, src, dest, dist)
+        cursor.execute("DROP TABLE routes_v1")
+    # The copied rows are the starting point, not changes to replay
+    cursor.execute("DELETE FROM road_changes")
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'road_changes'")
+    cursor.execute("PRAGMA user_version = 2")
+    conn.commit()
+
+def _migrate_to_v6(conn):
+    """
+    Rebuilds roads with the distance_km < MAX_DISTANCE_KM check, which SQLite
+    cannot add to an existing table. Roads with an infinite or out-of-range
+    distance are deleted first, through the change log, so running processes
+    drop them too; the copy itself is not logged.
+    """
+    cursor = conn.cursor()
+    # roads_v5 survives an interrupted migration and is picked up on the next run
+    if not cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'roads_v5'").fetchone():
+        table = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'roads'").fetchone()
+        if table is None or "1e9" in table[0]:
+            return
+        cursor.execute("DELETE FROM roads WHERE NOT distance_km < ?", (MAX_DISTANCE_KM,))
+        # Triggers, index and view go with the old table and come back from SCHEMA
+        for kind, name in (("VIEW", "routes"), ("TRIGGER", "roads_after_insert"), ("TRIGGER", "roads_after_update"),
+                           ("TRIGGER", "roads_after_delete"), ("INDEX", "idx_roads_city_b")):
+            cursor.execute(f"DROP {kind} IF EXISTS {name}")
+        cursor.execute("ALTER TABLE roads RENAME TO roads_v5")
+        conn.commit()
+
+    last_seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM road_changes").fetchone()[0]
+    cursor.executescript(SCHEMA)
+    cursor.execute('''
+        INSERT INTO roads (id, city_a, city_b, distance_km, road_class)
+        SELECT id, city_a, city_b, distance_km, road_class FROM roads_v5
+    ''')
+    # Same roads as before: the copy is not a change to replay
+    cursor.execute("DELETE FROM road_changes WHERE seq > ?", (last_seq,))
+    cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'road_changes'", (last_seq,))
+    cursor.execute("DROP TABLE roads_v5")
+    conn.commit()
+
+def connect(db_name=None):
+    """Opens the database, migrating it to the current schema if needed."""
+    conn = sqlite3.connect(db_name or DB_NAME)
+    migrate_db(conn)
+    return conn
+
+# --- INCREMENTAL ROAD EDITS ---
+
+def _city_id(cursor, name, city_ids=None):
+    """Returns the ID of a city, inserting it if needed. city_ids is an optional name -> ID memo."""
+    if city_ids is not None and name in city_ids:
+        return city_ids[name]
+    cursor.execute("INSERT OR IGNORE INTO cities (name) VALUES (?)", (name,))
+    city_id = cursor.execute("SELECT id FROM cities WHERE name = ?", (name,)).fetchone()[0]
+    if city_ids is not None:
+        city_ids[name] = city_id
+    return city_id
+
+def _road_key(cursor, src, dest, create, city_ids=None):
+    """Returns the (city_a, city_b) IDs of a road in storage order, or None for unknown cities."""
+    src, dest = standardize_city_name(src), standardize_city_name(dest)
+    if src == dest:
+        raise ValueError(f"A road needs two different cities, got '{src}' twice.")
+    if create:
+        ids = [_city_id(cursor, src, city_ids), _city_id(cursor, dest, city_ids)]
+    else:
+        ids = []
+        for name in (src, dest):
+            row = cursor.execute("SELECT id FROM cities WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            ids.append(row[0])
+    return min(ids), max(ids)
+
+def upsert_road(cursor, src, dest, distance_km, city_ids=None):
+    """Adds a road or changes its distance. Returns True if anything changed."""
+    city_a, city_b = _road_key(cursor, src, dest, create=True, city_ids=city_ids)
+    cursor.execute('''
+        INSERT INTO roads (city_a, city_b, distance_km) VALUES (?, ?, ?)
+        ON CONFLICT (city_a, city_b) DO UPDATE SET distance_km = excluded.distance_km
+        WHERE distance_km != excluded.distance_km
+    ''', (city_a, city_b, distance_km))
+    return cursor.rowcount > 0
+
+def remove_road(cursor, src, dest):
+    """Deletes a road in either direction. Returns True if it existed."""
+    key = _road_key(cursor, src, dest, create=False)
+    if key is None:
+        return False
+    cursor.execute("DELETE FROM roads WHERE city_a = ? AND city_b = ?", key)
+    return cursor.rowcount > 0
+
+def add_or_update_roads(roads, db_name=None):
+    """Upserts (source, destination, distance_km) rows in one transaction. Returns how many changed."""
+    with closing(connect(db_name)) as conn, conn:
+        cursor = conn.cursor()
+        return sum(upsert_road(cursor, src, dest, dist) for src, dest, dist in roads)
+
+def add_or_update_road(src, dest, distance_km, db_name=None):
+    """Adds a single road or updates its distance. Returns True if anything changed."""
+    return add_or_update_roads([(src, dest, distance_km)], db_name) > 0
+
+def delete_road(src, dest, db_name=None):
+    """Deletes a single road. Returns True if it existed."""
+    with closing(connect(db_name)) as conn, conn:
+        return remove_road(conn.cursor(), src, dest)
+
+def update_city_location(cursor, name, latitude, longitude):
+    """Sets the coordinates of an existing city. Returns True if anything changed."""
+    cursor.execute("UPDATE cities SET latitude = ?, longitude = ? WHERE name = ? AND "
+                   "(latitude IS NOT ? OR longitude IS NOT ?)",
+                   (latitude, longitude, standardize_city_name(name), latitude, longitude))
+    return cursor.rowcount > 0
+
+def update_road_class(cursor, src, dest, road_class):
+    """Sets the class of an existing road (one of ROAD_CLASSES). Returns True if anything changed."""
+    if road_class not in ROAD_CLASSES:
+        raise ValueError(f"Unknown road class '{road_class}', expected one of {', '.join(ROAD_CLASSES)}.")
+    key = _road_key(cursor, src, dest, create=False)
+    if key is None:
+        return False
+    cursor.execute("UPDATE roads SET road_class = ? WHERE city_a = ? AND city_b = ? AND road_class != ?",
+                   (road_class, *key, road_class))
+    return cursor.rowcount > 0
+
+def set_road_classes(classes, db_name=None):
+    """Stores {(source, destination): road_class} for existing roads. Returns how many changed."""
+    with closing(connect(db_name)) as conn, conn:
+        cursor = conn.cursor()
+        return sum(update_road_class(cursor, src, dest, road_class) for (src, dest), road_class in classes.items())
+
+def set_city_locations(locations, db_name=None):
+    """Stores {city: (latitude, longitude)} for cities already in the network. Returns how many changed."""
+    with closing(connect(db_name)) as conn, conn:
+        cursor = conn.cursor()
+        return sum(update_city_location(cursor, name, lat, lon) for name, (lat, lon) in locations.items())
+
+def record_snapshot(checksum, change_seq, db_name=None):
+    """Records that the routes data had `checksum` at road_changes position change_seq (see snapshot.py)."""
+    with closing(connect(db_name)) as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO snapshots (checksum, change_seq) VALUES (?, ?)", (checksum, change_seq))
+
+def prune_road_changes(keep=10000, db_name=None):
+    """
+    Trims the change log to its latest `keep` entries. A process whose graph is
+    older than the oldest kept entry simply reloads the whole graph.
+    """
+    with closing(connect(db_name)) as conn, conn:
+        _prune_road_changes(conn, keep)
+
+def _prune_road_changes(conn, keep, after_seq=0):
+    conn.execute("DELETE FROM road_changes WHERE seq > ? AND seq <= (SELECT MAX(seq) FROM road_changes) - ?",
+                 (after_seq, keep))
+
+# --- BULK STREAMING IMPORT ---
+
+def iter_road_rows(path, source_col="source_city", dest_col="destination_city",
+                   distance_col="distance_km", delimiter=None):
+    """
+    Streams (source, destination, distance) string triples from a CSV/TSV file,
+    optionally gzip-compressed (.gz). Columns are picked by header name; a file
+    whose header lacks those names is read as its first three columns.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        first = f.readline()
+        if delimiter is None:
+            delimiter = "\t" if "\t" in first else ","
+        header = next(csv.reader([first], delimiter=delimiter), [])
+        names = [h.strip().lower() for h in header]
+        try:
+            columns = [names.index(c.lower()) for c in (source_col, dest_col, distance_col)]
+        except ValueError:
+            columns = [0, 1, 2]
+            try:
+                float(header[2])
+                yield header[0], header[1], header[2]  # No header row, the first line is data
+            except (IndexError, ValueError):
+                pass
+        width = max(columns) + 1
+        for row in csv.reader(f, delimiter=delimiter):
+            if not row:
+                continue  # Blank line
+            # Short rows come through padded with "" so import_roads() counts them as rejected
+            row += [""] * (width - len(row))
+            yield row[columns[0]], row[columns[1]], row[columns[2]]
+
+def chunked(rows, size):
+    """Groups an iterable into lists of at most size items, without reading ahead further."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MiB, or None where it cannot be read (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def format_mb(value):
+    """peak_rss_mb() for display: "12.3 MiB", or "n/a"."""
+    return "n/a" if value is None else f"{value:.1f} MiB"
+
+def import_roads(rows, db_name=None, chunk_size=IMPORT_CHUNK_SIZE, distance_scale=1.0, report=print):
+    """
+    Upserts a stream of (source, destination, distance) rows chunk by chunk, one
+    transaction per chunk, under IMPORT_PRAGMAS. Names go through
+    standardize_city_name(); self-loops, short rows, missing city names and
+    non-positive, non-finite or non-numeric distances are counted as rejected.
+    Only one chunk is held in memory at a time.
+    distance_scale converts units, e.g. 0.001 for extracts in metres.
+    The road_changes entries the import writes are pruned after every chunk down
+    to the latest one, so running processes reload the graph once instead of
+    replaying every imported road (see G2._apply_road_changes). Entries from
+    before the import are kept.
+    Returns a stats dict (rows, changed, rejected, seconds, rows_per_sec, peak_rss_mb),
+    peak_rss_mb being None where it cannot be measured.
+    """
+    stats = {"rows": 0, "changed": 0, "rejected": 0}
+    started = time.perf_counter()
+    with closing(connect(db_name)) as conn:
+        for pragma in IMPORT_PRAGMAS:
+            conn.execute(pragma)
+        cursor = conn.cursor()
+        city_ids = {}
+        start_seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM road_changes").fetchone()[0]
+        for chunk in chunked(rows, chunk_size):
+            with conn:
+                for src, dest, dist in chunk:
+                    try:
+                        if not src.strip() or not dest.strip():
+                            raise ValueError("missing city name")
+                        dist = float(dist) * distance_scale
+                        if not 0 < dist < MAX_DISTANCE_KM:
+                            raise ValueError(dist)  # Also catches inf and nan
+                        stats["changed"] += upsert_road(cursor, src, dest, dist, city_ids)
+                    except ValueError:
+                        stats["rejected"] += 1
+                # Keep one entry: an empty log would look unchanged to a process at position 0
+                _prune_road_changes(conn, 1, after_seq=start_seq)
+            stats["rows"] += len(chunk)
+            if report:
+                elapsed = time.perf_counter() - started
+                report(f"  {stats['rows']:>10} rows  {stats['rows'] / elapsed:>9.0f} rows/s  "
+                       f"peak RSS {format_mb(peak_rss_mb())}")
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["peak_rss_mb"] = peak_rss_mb()
+    return stats
 
 def create_and_populate_db():
     """
     Creates the SQLite database and populates it with a comprehensive set 
     of major city-to-city road distances across India (approx. 150+ routes,
     including maximum coverage for Gujarat).
+    Re-running it syncs the roads table to this list with upserts and deletes,
+    so only real differences reach the change log.
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_NAME)
+        conn = connect()
         cursor = conn.cursor()
 
-        # Create the 'routes' table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS routes (
-            id INTEGER PRIMARY KEY,
-            source_city TEXT NOT NULL,
-            destination_city TEXT NOT NULL,
-            distance_km REAL NOT NULL
-        )
-        ''')
-        
-        # Clear existing data to prevent duplicates upon re-running
-        cursor.execute("DELETE FROM routes")
-        
         # --- Comprehensive Major City Data (North, West, South, East) ---
         # Data is based on major national highway connections and shortest road distances.
         # City names are Title Cased for consistency.
@@ -161,8 +543,6 @@ def create_and_populate_db():
             ('Kozhikode', 'Mangalore', 220),
             ('Hubballi', 'Bengaluru', 400),
             ('Hubballi', 'Goa', 180),
-            ('Tiruchirappalli', 'Madurai', 135),
-            ('Kochi', 'Coimbatore', 190),
             ('Hyderabad', 'Warangal', 150),
             ('Guntur', 'Vijayawada', 35),
             ('Tirupati', 'Chennai', 150),
@@ -186,8 +566,6 @@ def create_and_populate_db():
             ('Guwahati', 'Agartala', 550),
             ('Bhopal', 'Sagar', 170),
             ('Bhopal', 'Jabalpur', 330),
-            ('Raipur', 'Nagpur', 280),
-            ('Bilaspur', 'Raipur', 115),
             ('Patna', 'Muzaffarpur', 80),
             ('Jabalpur', 'Nagpur', 270),
             ('Dhanbad', 'Kolkata', 270),
@@ -205,11 +583,77 @@ def create_and_populate_db():
             ('Chennai', 'Mumbai', 1250),
         ]
 
-        # Insert data
-        cursor.executemany("INSERT INTO routes (source_city, destination_city, distance_km) VALUES (?, ?, ?)", routes_data)
-        
+        # Approximate city-centre coordinates (degrees), used for G2's A* heuristic
+        city_locations = {
+            'Agartala': (23.83, 91.28), 'Agra': (27.18, 78.01), 'Ahmedabad': (23.02, 72.57),
+            'Ajmer': (26.45, 74.64), 'Allahabad': (25.44, 81.85), 'Ambala': (30.38, 76.78),
+            'Amreli': (21.60, 71.22), 'Amritsar': (31.63, 74.87), 'Anand': (22.56, 72.95),
+            'Bareilly': (28.37, 79.43), 'Belgaum': (15.85, 74.50), 'Bengaluru': (12.97, 77.59),
+            'Bharuch': (21.71, 72.98), 'Bhavnagar': (21.76, 72.15), 'Bhopal': (23.26, 77.41),
+            'Bhubaneswar': (20.30, 85.82), 'Bhuj': (23.24, 69.67), 'Bikaner': (28.02, 73.31),
+            'Bilaspur': (22.08, 82.15), 'Chandigarh': (30.73, 76.78), 'Chennai': (13.08, 80.27),
+            'Coimbatore': (11.02, 76.96), 'Cuttack': (20.46, 85.88), 'Daman': (20.40, 72.83),
+            'Dediapada': (21.63, 73.58), 'Dehradun': (30.32, 78.03), 'Delhi': (28.61, 77.21),
+            'Dhanbad': (23.80, 86.43), 'Dwarka': (22.24, 68.97), 'Gandhidham': (23.08, 70.13),
+            'Gandhinagar': (23.22, 72.64), 'Gaya': (24.79, 85.00), 'Goa': (15.50, 73.83),
+            'Godhra': (22.78, 73.61), 'Guntur': (16.31, 80.44), 'Guwahati': (26.14, 91.74),
+            'Gwalior': (26.22, 78.18), 'Haridwar': (29.95, 78.16), 'Hisar': (29.15, 75.72),
+            'Hubballi': (15.36, 75.12), 'Hyderabad': (17.39, 78.49), 'Indore': (22.72, 75.86),
+            'Jabalpur': (23.18, 79.99), 'Jaipur': (26.91, 75.79), 'Jalandhar': (31.33, 75.58),
+            'Jammu': (32.73, 74.86), 'Jamnagar': (22.47, 70.06), 'Jamshedpur': (22.80, 86.20),
+            'Jodhpur': (26.24, 73.02), 'Junagadh': (21.52, 70.46), 'Kandla': (23.03, 70.22),
+            'Kanpur': (26.45, 80.33), 'Kochi': (9.93, 76.27), 'Kolkata': (22.57, 88.36),
+            'Kota': (25.21, 75.86), 'Kozhikode': (11.26, 75.78), 'Leh': (34.15, 77.58),
+            'Lucknow': (26.85, 80.95), 'Ludhiana': (30.90, 75.86), 'Madurai': (9.93, 78.12),
+            'Mangalore': (12.91, 74.86), 'Mathura': (27.49, 77.67), 'Meerut': (28.98, 77.71),
+            'Mehsana': (23.59, 72.37), 'Morbi': (22.82, 70.84), 'Mumbai': (19.08, 72.88),
+            'Muzaffarpur': (26.12, 85.39), 'Mysuru': (12.30, 76.64), 'Nadiad': (22.69, 72.86),
+            'Nagpur': (21.15, 79.09), 'Nashik': (20.00, 73.79), 'Nellore': (14.44, 79.99),
+            'Palanpur': (24.17, 72.43), 'Patan': (23.85, 72.13), 'Patna': (25.59, 85.14),
+            'Porbandar': (21.64, 69.61), 'Puducherry': (11.94, 79.81), 'Pune': (18.52, 73.86),
+            'Raipur': (21.25, 81.63), 'Rajkot': (22.30, 70.80), 'Ranchi': (23.34, 85.31),
+            'Rishikesh': (30.09, 78.27), 'Sagar': (23.84, 78.74), 'Salem': (11.66, 78.15),
+            'Shillong': (25.58, 91.89), 'Shimla': (31.10, 77.17), 'Srinagar': (34.08, 74.80),
+            'Surat': (21.17, 72.83), 'Surendranagar': (22.73, 71.64), 'Thiruvananthapuram': (8.52, 76.94),
+            'Tiruchirappalli': (10.79, 78.70), 'Tirupati': (13.63, 79.42), 'Udaipur': (24.59, 73.71),
+            'Ujjain': (23.18, 75.78), 'Vadodara': (22.31, 73.18), 'Valsad': (20.61, 72.93),
+            'Vapi': (20.37, 72.90), 'Varanasi': (25.32, 82.97), 'Veraval': (20.91, 70.37),
+            'Vijayawada': (16.51, 80.65), 'Visakhapatnam': (17.69, 83.22), 'Warangal': (17.97, 79.59),
+        }
+
+        # Roads that are not plain national highways ('nh'), used for G2's time-dependent search
+        road_classes = {
+            ('Mumbai', 'Pune'): 'expressway',
+            ('Mumbai', 'Nagpur'): 'expressway',   # Samruddhi Mahamarg
+            ('Ahmedabad', 'Vadodara'): 'expressway',
+            ('Delhi', 'Agra'): 'expressway',      # Yamuna Expressway
+            ('Delhi', 'Meerut'): 'expressway',
+            ('Jammu', 'Srinagar'): 'hill',
+            ('Srinagar', 'Leh'): 'hill',
+            ('Guwahati', 'Shillong'): 'hill',
+            ('Goa', 'Belgaum'): 'hill',
+            ('Surat', 'Bhavnagar'): 'sh',
+            ('Bhavnagar', 'Amreli'): 'sh',
+            ('Junagadh', 'Amreli'): 'sh',
+            ('Mehsana', 'Patan'): 'sh',
+            ('Bharuch', 'Dediapada'): 'sh',
+            ('Valsad', 'Daman'): 'sh',
+        }
+
+        # Upsert data, then drop roads that are no longer in the list
+        changed = sum(upsert_road(cursor, src, dest, dist) for src, dest, dist in routes_data)
+        wanted = {_road_key(cursor, src, dest, create=False) for src, dest, _ in routes_data}
+        for key in cursor.execute("SELECT city_a, city_b FROM roads").fetchall():
+            if key not in wanted:
+                cursor.execute("DELETE FROM roads WHERE city_a = ? AND city_b = ?", key)
+                changed += 1
+        cursor.execute("DELETE FROM cities WHERE id NOT IN (SELECT city_a FROM roads UNION SELECT city_b FROM roads)")
+        located = sum(update_city_location(cursor, name, lat, lon) for name, (lat, lon) in city_locations.items())
+        classed = sum(update_road_class(cursor, src, dest, road_classes.get((src, dest), 'nh'))
+                      for src, dest, _ in routes_data)
+
         conn.commit()
-        print(f"Database '{DB_NAME}' created and populated with {len(routes_data)} routes.")
+        print(f"Database '{DB_NAME}' synced with {len(routes_data)} routes ({changed} changes, {located} city locations and {classed} road classes updated).")
         
     except sqlite3.Error as e:
         print(f"An error occurred while creating the database: {e}")
@@ -218,4 +662,22 @@ def create_and_populate_db():
             conn.close()
 
 if __name__ == '__main__':
-    create_and_populate_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create, seed or bulk-load the road network database")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("import", help="stream roads from a CSV/TSV (optionally .gz) file")
+    p.add_argument("path")
+    p.add_argument("--db", help=f"database file (default: {DB_NAME})")
+    p.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    p.add_argument("--source-col", default="source_city")
+    p.add_argument("--dest-col", default="destination_city")
+    p.add_argument("--distance-col", default="distance_km")
+    p.add_argument("--meters", action="store_true", help="distances in the file are in metres")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        rows = iter_road_rows(args.path, args.source_col, args.dest_col, args.distance_col)
+        stats = import_roads(rows, args.db, args.chunk_size, 0.001 if args.meters else 1.0)
+        print(f"Imported {stats['rows']} rows ({stats['changed']} changed, {stats['rejected']} rejected) "
+              f"in {stats['seconds']:.1f} s: {stats['rows_per_sec']:.0f} rows/s, peak RSS {format_mb(stats['peak_rss_mb'])}.")
+    else:
+        create_and_populate_db()
\ No newline at end of file
@@ -1,12 +1,60 @@
 import sqlite3
 import math
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from heapq import heappush, heappop
+
+import instrument
 
 DB_NAME = 'nh_routes.db'
 # --- Global Constants for Route Planning ---
 AVG_SPEED_KMH = 60  # Average driving speed for estimation
 DAY_START_HOUR = 6  # 6 AM
 DAY_END_HOUR = 18 # 6 PM
+INF = float('inf')
+
+# --- Graph Cache Settings ---
+# Seconds between cheap change checks (a stat of the DB file) on the cached graph.
+# Set to None to never check automatically and rely on reload() only.
+GRAPH_CHECK_INTERVAL = 1.0
+
+# Graph store and search used by find_route():
+#   "dict"    - nested dict graph + dijkstra()
+#   "astar"   - nested dict graph + astar() guided by city coordinates and landmarks
+#   "compact" - array-backed graph with integer city IDs + compact.dijkstra_compact()
+#   "ch"      - contraction-hierarchies index from ch.py (must be built first)
+DEFAULT_ENGINE = "dict"
+
+# Precomputed all-pairs table written by `python apsp.py`. find_route() answers from
+# it whenever the file exists and matches the current road data.
+APSP_FILE = 'nh_routes.apsp'
+USE_DISTANCE_TABLE = True
+
+# Contraction-hierarchies index written by `python ch.py`, used by engine="ch".
+CH_FILE = 'nh_routes.ch'
+
+# Memory-mapped graph snapshot written by `python snapshot.py`. A full load starts
+# from it, instead of reading every row, when the database has a record of it;
+# None always reads the database.
+SNAPSHOT_FILE = 'nh_routes.snap'
+
+# Landmarks for the "astar" engine's ALT bound (one full search each per graph
+# version); 0 leaves only the great-circle bound.
+ASTAR_LANDMARKS = 8
+
+# --- Alternative Routes (find_alternative_routes) ---
+ALTERNATIVE_ROUTES = 3            # Routes returned, the shortest included
+ALTERNATIVE_MAX_SIMILARITY = 0.8  # Max share of a route's length on roads of a shorter listed route
+
+# --- Route Memoization Settings (0 disables a cache) ---
+ROUTE_CACHE_SIZE = 1024  # (source, destination) -> (path, distance) results
+TREE_CACHE_SIZE = 64     # source -> full shortest-path tree
+# Cached trees are repaired in place of being dropped when the graph changes by
+# at most this many roads (closures, small edits from the database)
+TREE_REPAIR_MAX_CHANGES = 256
 
 def standardize_city_name(city_name):
     """Cleans up and standardizes city names (Title Case, no extra spaces)."""
@@ -14,12 +62,30 @@ def standardize_city_name(city_name):
 
 def get_connections():
     """Fetches all connections and distances from the database."""
+    return _load_network()[0]
+
+def _load_network():
+    """
+    Reads the whole road graph together with the road_changes position it matches,
+    inside one read transaction. The position is None for databases that predate
+    the change log (see G1.migrate_db).
+    Returns: (graph, change_seq), or (None, None) if the database cannot be read.
+    """
     conn = None
     try:
         conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
-        cursor.execute("SELECT source_city, destination_city, distance_km FROM routes")
-        connections = cursor.fetchall()
+        cursor.execute("BEGIN")
+        with instrument.timed("db.fetch"):
+            try:
+                change_seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM road_changes").fetchone()[0]
+            except sqlite3.OperationalError:
+                change_seq = None
+            cursor.execute("SELECT source_city, destination_city, distance_km FROM routes")
+            connections = cursor.fetchall()
+        if instrument.enabled:
+            instrument.count("db.rows", len(connections))
+            started = time.perf_counter()
         
         graph = {}
         for src, dest, dist in connections:
@@ -34,115 +100,1490 @@ def get_connections():
             graph[src][dest] = dist
             graph[dest][src] = dist 
 
-        return graph
+        if instrument.enabled:
+            instrument.add_time("graph.build", time.perf_counter() - started)
+        return graph, change_seq
+
+    except sqlite3.Error:
+        return None, None
+    finally:
+        if conn:
+            conn.close()
+
+def _apply_road_changes(graph, since_seq):
+    """
+    Replays the road_changes entries after since_seq (see G1.SCHEMA) onto a copy of
+    graph. Only the outer dict and the neighbour dicts of touched cities are
+    copied, so threads still holding the old graph are unaffected.
+    Returns (new_graph, change_seq) - the same graph object if nothing changed -
+    or None when the log cannot bridge the gap and a full reload is needed.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_NAME)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        first_seq, last_seq = cursor.execute("SELECT MIN(seq), MAX(seq) FROM road_changes").fetchone()
+        if last_seq is None or last_seq <= since_seq:
+            # Nothing new, unless the log went backwards (pruned or recreated)
+            return (graph, since_seq) if (last_seq or 0) == since_seq else None
+        if first_seq > since_seq + 1:
+            return None  # Entries we have not seen were pruned
+        with instrument.timed("db.fetch_changes"):
+            changes = cursor.execute(
+                "SELECT source_city, destination_city, distance_km FROM road_changes WHERE seq > ? ORDER BY seq",
+                (since_seq,)).fetchall()
+        if len(changes) != last_seq - since_seq:
+            return None  # A gap in the middle: G1.import_roads() pruned its own entries
+        if instrument.enabled:
+            instrument.count("db.change_rows", len(changes))
+    except sqlite3.Error:
+        return None
+    finally:
+        if conn:
+            conn.close()
+
+    new_graph = dict(graph)
+    touched = set()
 
+    def neighbors_of(city):
+        if city not in touched:
+            new_graph[city] = dict(new_graph.get(city, {}))
+            touched.add(city)
+        return new_graph[city]
+
+    for src, dest, dist in changes:
+        src = standardize_city_name(src)
+        dest = standardize_city_name(dest)
+        if dist is None:
+            neighbors_of(src).pop(dest, None)
+            neighbors_of(dest).pop(src, None)
+        else:
+            neighbors_of(src)[dest] = dist
+            neighbors_of(dest)[src] = dist
+
+    # Match a full reload, which only contains cities that still have a road
+    for city in touched:
+        if not new_graph[city]:
+            del new_graph[city]
+    return new_graph, last_seq
+
+def recorded_snapshot_seq(checksum):
+    """
+    Returns the road_changes position at which the database recorded routes data
+    with this checksum (see G1.record_snapshot), or None if it never did.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_NAME)
+        row = conn.execute("SELECT change_seq FROM snapshots WHERE checksum = ?", (checksum,)).fetchone()
+        return row[0] if row else None
     except sqlite3.Error:
-        return None 
+        return None
     finally:
         if conn:
             conn.close()
 
-def dijkstra(graph, start_city, end_city):
+def _load_snapshot():
+    """
+    Loads the graph from SNAPSHOT_FILE (see snapshot.py) and brings it up to date
+    with the change log. Returns (graph, change_seq) like _load_network(), or
+    None when there is no usable snapshot for this database.
+    """
+    if not SNAPSHOT_FILE:
+        return None
+    from snapshot import load_snapshot
+    snapshot = load_snapshot(SNAPSHOT_FILE)
+    if snapshot is None or recorded_snapshot_seq(snapshot.checksum) != snapshot.change_seq:
+        return None
+    return _apply_road_changes(snapshot, snapshot.change_seq)
+
+# --- PROCESS-WIDE GRAPH CACHE ---
+
+_graph_lock = threading.Lock()
+_graph_cache = {
+    "graph": None,        # "base" with the active closures (see close_roads()) applied
+    "base": None,         # Nested dict graph as built by get_connections(), or a snapshot.SnapshotGraph
+    "fingerprint": None,  # On-disk marker of the data the graph was built from
+    "change_seq": None,   # Last road_changes entry reflected in the graph
+    "version": 0,         # Bumped whenever the graph changes; derived caches compare against it
+    "checked_at": 0.0,    # time.monotonic() of the last change check
+}
+
+def _db_fingerprint():
+    """
+    Returns a cheap change marker for the database without opening it:
+    (inode, mtime, size) of the DB file and of its WAL file, if any.
+    """
+    parts = []
+    for path in (DB_NAME, DB_NAME + "-wal"):
+        try:
+            st = os.stat(path)
+        except OSError:
+            parts.append(None)
+        else:
+            parts.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(parts)
+
+def get_graph(force=False):
+    """
+    Returns the process-wide road graph, building it on first use (from
+    SNAPSHOT_FILE when there is a current one). When the database changed on disk (checked at most every GRAPH_CHECK_INTERVAL
+    seconds) the new road_changes entries are applied as deltas; the graph is
+    only rebuilt from scratch when that is not possible or when force=True.
+    Returns None if the database cannot be read and no graph was loaded before.
+    """
+    cache = _graph_cache
+    now = time.monotonic()
+    if not force and cache["graph"] is not None:
+        if GRAPH_CHECK_INTERVAL is None or now - cache["checked_at"] < GRAPH_CHECK_INTERVAL:
+            return cache["graph"]
+
+    with _graph_lock:
+        # Take the fingerprint before reading, so a write that lands during the
+        # read is picked up by the next check.
+        fingerprint = _db_fingerprint()
+        if force or cache["graph"] is None or fingerprint != cache["fingerprint"]:
+            updated = None
+            same_file = cache["fingerprint"] is not None and fingerprint[0] is not None \
+                and cache["fingerprint"][0] is not None and fingerprint[0][0] == cache["fingerprint"][0][0]
+            if not force and cache["base"] is not None and cache["change_seq"] is not None and same_file:
+                updated = _apply_road_changes(cache["base"], cache["change_seq"])
+                if instrument.enabled and updated is not None:
+                    instrument.count("graph.delta_updates")
+            if updated is None and not force:
+                updated = _load_snapshot()
+                if instrument.enabled and updated is not None:
+                    instrument.count("graph.snapshot_loads")
+            if updated is None:
+                if instrument.enabled:
+                    instrument.count("graph.full_loads")
+                updated = _load_network()
+                if updated[0] is None:
+                    # Keep serving the last good graph if the DB is temporarily unreadable
+                    return cache["graph"]
+            base, cache["change_seq"] = updated
+            if base is not cache["base"] or cache["graph"] is None:
+                cache["base"] = base
+                cache["graph"] = _apply_closures(base)
+                cache["version"] += 1
+            cache["fingerprint"] = fingerprint
+        cache["checked_at"] = now
+        return cache["graph"]
+
+def reload():
+    """Forces the cached graph to be rebuilt from scratch from the database (never the snapshot) and returns it."""
+    return get_graph(force=True)
+
+def graph_version():
+    """Returns the version number of the cached graph (0 if nothing is loaded yet)."""
+    return _graph_cache["version"]
+
+# --- ROAD CLOSURES ---
+# Closures live in this process only and sit on top of the graph read from the
+# database, surviving reloads until reopened. Every query sees them; the cached
+# shortest-path trees are repaired for them (see _sync_route_caches()).
+
+_closures = {"roads": set(), "cities": set()}  # road_key() pairs and city names
+
+def _apply_closures(base):
+    """Returns base with the active closures removed, copying only the rows they touch."""
+    if not _closures["roads"] and not _closures["cities"]:
+        return base
+    graph = dict(base)
+    touched = set()
+
+    def close(a, b):
+        for city, other in ((a, b), (b, a)):
+            if city not in touched:
+                graph[city] = dict(graph[city])
+                touched.add(city)
+            graph[city].pop(other, None)
+
+    for city in _closures["cities"]:
+        for neighbor in list(graph.get(city, ())):
+            close(city, neighbor)
+    for a, b in _closures["roads"]:
+        if a in graph and b in graph:
+            close(a, b)
+    return graph
+
+def _closure_names(base, cities):
+    """Standardized names for cities in base; raises ValueError for unknown ones."""
+    names = []
+    for city in cities:
+        name = resolve_city(base, city)
+        if name is None:
+            raise ValueError(f"City not found in the network: {city}.")
+        names.append(name)
+    return names
+
+def _update_closures(roads=(), cities=(), close=True):
+    """Adds or removes closures and swaps in the matching graph. Returns how many changed."""
+    from closures import road_key
+    if get_graph() is None:
+        raise ValueError("Road network database not accessible or corrupt.")
+    # Names are resolved before taking the lock: resolve_city() may need get_name_index()
+    base = _graph_cache["base"]
+    keys = []
+    for a, b in roads:
+        a, b = _closure_names(base, (a, b))
+        if b not in base[a]:
+            raise ValueError(f"There is no road between {a} and {b}.")
+        keys.append(road_key(a, b))
+    names = _closure_names(base, cities)
+
+    with _graph_lock:
+        changed = 0
+        for store, items in ((_closures["roads"], keys), (_closures["cities"], names)):
+            for item in items:
+                if close and item not in store:
+                    store.add(item)
+                    changed += 1
+                elif not close and item in store:
+                    store.remove(item)
+                    changed += 1
+        if changed:
+            _graph_cache["graph"] = _apply_closures(_graph_cache["base"])
+            _graph_cache["version"] += 1
+        return changed
+
+def close_roads(roads):
+    """
+    Closes (city, city) roads for every query in this process until reopened.
+    Returns how many were newly closed; raises ValueError for an unknown road.
+    """
+    return _update_closures(roads=roads, close=True)
+
+def reopen_roads(roads):
+    """Reopens roads closed with close_roads(). Returns how many were closed."""
+    return _update_closures(roads=roads, close=False)
+
+def close_cities(cities):
+    """Closes every road into and out of the given cities, like close_roads()."""
+    return _update_closures(cities=cities, close=True)
+
+def reopen_cities(cities):
+    """Reopens cities closed with close_cities(). Returns how many were closed."""
+    return _update_closures(cities=cities, close=False)
+
+def active_closures():
+    """Returns {"roads": [(city, city), ...], "cities": [...]} currently closed, sorted."""
+    return {"roads": sorted(_closures["roads"]), "cities": sorted(_closures["cities"])}
+
+_compact_cache = {"source": None, "graph": None}
+
+def get_compact_graph():
+    """
+    Returns the cached graph converted to a compact.CompactGraph, rebuilding the
+    compact copy whenever the cached dict graph itself was rebuilt.
+    """
+    graph = get_graph()
+    if graph is None:
+        return None
+    return _compact_of(graph)
+
+def _compact_of(graph):
+    if _compact_cache["source"] is not graph:
+        from compact import build_compact_graph
+        # A snapshot graph already is one, backed by the shared memory map
+        _compact_cache["graph"] = getattr(graph, "compact", None) or build_compact_graph(graph)
+        _compact_cache["source"] = graph
+    return _compact_cache["graph"]
+
+_name_cache = {"source": None, "index": None}
+
+def get_name_index():
+    """
+    Returns a names.CityNameIndex over the cached graph's cities (aliases, prefix
+    completion and fuzzy suggestions), rebuilt whenever the graph is rebuilt.
+    """
+    graph = get_graph()
+    if graph is None:
+        return None
+    if _name_cache["source"] is not graph:
+        from names import CityNameIndex
+        _name_cache["index"] = CityNameIndex(graph)
+        _name_cache["source"] = graph
+    return _name_cache["index"]
+
+def resolve_city(graph, city_name):
+    """
+    Maps user input to a city in graph: the standardized name when it is present,
+    else a known alias. Returns None if nothing fits; misspellings are only offered
+    as suggestions (see _suggestion_hints()).
+    """
+    city = standardize_city_name(city_name)
+    if city in graph:
+        return city
+    index = get_name_index()
+    return index.resolve(city_name) if index is not None else None
+
+def _unknown_cities_message(source, destination, start_city, end_city):
+    message = f"One or both cities not found in the network: {source} or {destination}. Check spelling or coverage."
+    return message + _suggestion_hints([name for name, city in ((source, start_city), (destination, end_city))
+                                        if city is None])
+
+def _suggestion_hints(unknown_names):
+    """' Did you mean (...)?' listing suggestions for each name that has any, or ''."""
+    index = get_name_index()
+    if index is None:
+        return ""
+    hints = []
+    for name in unknown_names:
+        suggestions = index.suggest(name)
+        if suggestions:
+            hints.append(f"{name}: {', '.join(suggestions)}")
+    return f" Did you mean ({'; '.join(hints)})?" if hints else ""
+
+_checksum_cache = {"source": None, "checksum": None}
+
+def routes_checksum(graph=None):
+    """
+    Returns a SHA-1 hex digest of the road network contents (every road and its
+    distance), independent of row order in the routes table. Precomputed files
+    store it so they can tell whether they still match the data.
+    Defaults to the cached graph; the digest of that graph is memoized.
+    """
+    cached = graph is None
+    if cached:
+        graph = get_graph()
+        if graph is None:
+            return None
+        if _checksum_cache["source"] is graph:
+            return _checksum_cache["checksum"]
+        if getattr(graph, "checksum", None):
+            return graph.checksum  # Snapshot graph, vouched for by the database
+
+    import hashlib
+    digest = hashlib.sha1()
+    for src in sorted(graph):
+        for dest, dist in sorted(graph[src].items()):
+            if src < dest:
+                digest.update(f"{src}\t{dest}\t{float(dist)!r}\n".encode("utf-8"))
+    checksum = digest.hexdigest()
+    if cached:
+        _checksum_cache["source"] = graph
+        _checksum_cache["checksum"] = checksum
+    return checksum
+
+def _load_precomputed(cache, path, loader):
+    """
+    Shared loader for the precomputed index files (all-pairs table, CH index).
+    Re-reads the file when it changed on disk (checked every GRAPH_CHECK_INTERVAL
+    seconds) and returns it only if its checksum matches the current road data.
+    """
+    now = time.monotonic()
+    checked_at = cache["checked_at"]
+    if checked_at is None or (GRAPH_CHECK_INTERVAL is not None and now - checked_at >= GRAPH_CHECK_INTERVAL):
+        try:
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if cache["stamp"] != stamp:
+            cache["index"] = loader(path) if stamp else None
+            cache["stamp"] = stamp
+        cache["checked_at"] = now
+    index = cache["index"]
+    if _closures["roads"] or _closures["cities"]:
+        return None  # Built without the closures (and hashing the closed graph would only say so)
+    if index is None or index.checksum != routes_checksum():
+        return None
+    return index
+
+_table_cache = {"stamp": None, "index": None, "checked_at": None}
+_ch_cache = {"stamp": None, "index": None, "checked_at": None}
+
+def get_distance_table():
+    """
+    Returns the memory-mapped all-pairs table (see apsp.py) if APSP_FILE exists and
+    was built from the current road data, otherwise None.
+    """
+    if not USE_DISTANCE_TABLE:
+        return None
+    from apsp import load_table
+    return _load_precomputed(_table_cache, APSP_FILE, load_table)
+
+def get_contraction_hierarchy():
+    """
+    Returns the memory-mapped contraction-hierarchies index (see ch.py) if CH_FILE
+    exists and was built from the current road data, otherwise None.
+    """
+    from ch import load_hierarchy
+    return _load_precomputed(_ch_cache, CH_FILE, load_hierarchy)
+
+# --- CONNECTIVITY ---
+
+_component_cache = {"source": None, "index": None, "cut_points": None}
+
+def _sync_components(graph):
+    if _component_cache["source"] is not graph:
+        from components import build_components
+        _component_cache["index"] = build_components(get_compact_graph())
+        _component_cache["cut_points"] = None
+        _component_cache["source"] = graph
+
+def get_component_index():
+    """
+    Returns the components.ComponentIndex of the cached graph, relabelled
+    whenever the graph changes (one linear pass over the compact graph).
+    """
+    graph = get_graph()
+    if graph is None:
+        return None
+    _sync_components(graph)
+    return _component_cache["index"]
+
+def _connected(start_city, end_city):
+    """True unless the component index says no route can join the two (known) cities."""
+    index = get_component_index()
+    if index is None:
+        return True
+    ids = get_compact_graph().ids
+    return index.connected(ids[start_city], ids[end_city])
+
+def are_connected(pairs):
+    """
+    Bulk reachability: for each (source, destination) pair, True if some route
+    joins them, False if not, None if either city is unknown. No searches run.
+    """
+    graph = get_graph()
+    if graph is None:
+        return [None for _ in pairs]
+    index = get_component_index()
+    ids = get_compact_graph().ids
+    results = []
+    for source, destination in pairs:
+        start_city, end_city = resolve_city(graph, source), resolve_city(graph, destination)
+        if start_city is None or end_city is None:
+            results.append(None)
+        else:
+            results.append(index.connected(ids[start_city], ids[end_city]))
+    return results
+
+def get_cut_points():
+    """
+    Cities and roads whose closure would split the network (articulation points
+    and bridges, see components.cut_points()), computed on first request per graph.
+    Returns: (sorted city names, sorted (city, city) roads), or None if the graph cannot be loaded.
+    """
+    graph = get_graph()
+    if graph is None:
+        return None
+    _sync_components(graph)
+    if _component_cache["cut_points"] is None:
+        from components import cut_points
+        cgraph = get_compact_graph()
+        articulation, bridges = cut_points(cgraph)
+        names = cgraph.names
+        _component_cache["cut_points"] = (
+            sorted(names[city] for city in articulation),
+            sorted(tuple(sorted((names[a], names[b]))) for a, b in bridges),
+        )
+    return _component_cache["cut_points"]
+
+def prewarm():
+    """
+    Loads everything the first query would otherwise wait for: the road graph,
+    the name index, the compact graph, any up-to-date precomputed index and the
+    search modules. Importing G2 loads none of this, so UIs call it on a
+    background thread once their window is showing. Returns False if the road
+    network could not be loaded.
+    """
+    graph = get_graph()
+    if graph is None:
+        return False
+    get_name_index()
+    get_compact_graph()
+    get_component_index()
+    get_distance_table()
+    if DEFAULT_ENGINE == "ch":
+        get_contraction_hierarchy()
+    import alternatives  # Used by the first route options search
+    return True
+
+def _build_path(previous_cities, city):
+    """Walks the predecessor map back from city and returns the path in travel order."""
+    path = []
+    while city is not None:
+        path.append(city)
+        city = previous_cities[city]
+    path.reverse()
+    return path
+
+def _record_search(graph, sides, pops, end_city=None):
+    """
+    Reports a finished search to instrument. Apart from pops (heap entries taken
+    off, stale ones included) the counts are worked out from its final state, so
+    the search loops do little more than count pops while instrumentation is off.
+    sides holds (distances, heap, estimates) per search direction, estimates
+    being A*'s heuristic values (None for plain Dijkstra). Heap entries come off
+    in order, so every city ordered below the smallest entry left was settled
+    and had its roads relaxed. end_city, when the search stopped there, was
+    settled without relaxing its roads. Every push was either popped or is still queued.
+    """
+    settled = relaxed = queued = 0
+    for distances, heap, estimates in sides:
+        top = heap[0][0] if heap else INF
+        for city, distance in distances.items():
+            if city == end_city:
+                settled += 1
+                continue
+            key = distance + estimates[city] if estimates is not None else distance
+            if key < top:
+                settled += 1
+                relaxed += len(graph[city])
+        queued += len(heap)
+    instrument.record_search(settled, relaxed, pops + queued)
+
+def _no_route_message(start_city, end_city):
+    return f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
+
+def dijkstra(graph, start_city, end_city, bidirectional=False):
     """
     Dijkstra's algorithm to find the shortest path and distance.
-    (Logic remains unchanged)
+    Uses a binary heap with lazy deletion (stale heap entries are skipped when popped)
+    and stops as soon as end_city is settled. With bidirectional=True the search runs
+    from both ends at once, which settles far fewer cities on long routes.
+    Returns: (path_list, distance) or (None, error_message)
     """
     if not graph:
         return None, "Error: Could not load road network data."
+    if start_city not in graph or end_city not in graph:
+        return None, _no_route_message(start_city, end_city)
+    if bidirectional:
+        return _bidirectional_dijkstra(graph, start_city, end_city)
 
-    distances = {city: float('inf') for city in graph}
-    distances[start_city] = 0
-    previous_cities = {city: None for city in graph}
-    
-    unvisited = [(0, start_city)]
+    distances = {start_city: 0}
+    previous_cities = {start_city: None}
+    heap = [(0, start_city)]
+    pops = 0
 
-    while unvisited:
-        unvisited.sort() 
-        current_distance, current_city = unvisited.pop(0)
+    while heap:
+        current_distance, current_city = heappop(heap)
+        pops += 1
 
         if current_distance > distances[current_city]:
+            continue  # Stale entry, the city was reached more cheaply since
+        if current_city == end_city:
+            if instrument.enabled:
+                _record_search(graph, [(distances, heap, None)], pops, end_city)
+            return _build_path(previous_cities, end_city), current_distance
+
+        for neighbor, weight in graph[current_city].items():
+            distance = current_distance + weight
+            if distance < distances.get(neighbor, INF):
+                distances[neighbor] = distance
+                previous_cities[neighbor] = current_city
+                heappush(heap, (distance, neighbor))
+
+    if instrument.enabled:
+        _record_search(graph, [(distances, heap, None)], pops)
+    return None, _no_route_message(start_city, end_city)
+
+def _bidirectional_dijkstra(graph, start_city, end_city):
+    """
+    Bidirectional variant of dijkstra(): grows one search from each end (the road graph
+    is undirected, so both walk the same edges) and stops once the two frontiers can
+    no longer improve on the best meeting point found.
+    """
+    if start_city == end_city:
+        return [start_city], 0
+
+    distances = ({start_city: 0}, {end_city: 0})
+    previous_cities = ({start_city: None}, {end_city: None})
+    heaps = ([(0, start_city)], [(0, end_city)])
+    best_distance = INF
+    meeting_city = None
+    pops = 0
+
+    while heaps[0] and heaps[1]:
+        top_forward, top_backward = heaps[0][0][0], heaps[1][0][0]
+        if top_forward + top_backward >= best_distance:
+            break
+        side = 0 if top_forward <= top_backward else 1
+        own, other = distances[side], distances[1 - side]
+
+        current_distance, current_city = heappop(heaps[side])
+        pops += 1
+        if current_distance > own[current_city]:
             continue
 
         for neighbor, weight in graph[current_city].items():
             distance = current_distance + weight
-            if distance < distances[neighbor]:
+            if distance < own.get(neighbor, INF):
+                own[neighbor] = distance
+                previous_cities[side][neighbor] = current_city
+                heappush(heaps[side], (distance, neighbor))
+            if neighbor in other:
+                total = own[neighbor] + other[neighbor]
+                if total < best_distance:
+                    best_distance = total
+                    meeting_city = neighbor
+
+    if instrument.enabled:
+        _record_search(graph, [(distances[0], heaps[0], None), (distances[1], heaps[1], None)], pops)
+    if meeting_city is None:
+        return None, _no_route_message(start_city, end_city)
+
+    path = _build_path(previous_cities[0], meeting_city)
+    city = previous_cities[1][meeting_city]
+    while city is not None:
+        path.append(city)
+        city = previous_cities[1][city]
+    return path, best_distance
+
+# --- A* WITH A GREAT-CIRCLE HEURISTIC ---
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def _load_coordinates():
+    """Reads {city: (latitude, longitude)} for every city with known coordinates ({} on older schemas)."""
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_NAME)
+        rows = conn.execute(
+            "SELECT name, latitude, longitude FROM cities WHERE latitude IS NOT NULL AND longitude IS NOT NULL").fetchall()
+        return {standardize_city_name(name): (lat, lon) for name, lat, lon in rows}
+    except sqlite3.Error:
+        return {}
+    finally:
+        if conn:
+            conn.close()
+
+def heuristic_scale(graph, coords):
+    """
+    Returns the largest factor s <= 1 for which s * great-circle distance never
+    exceeds the road distance of any road in graph. Scaling the heuristic by it
+    keeps A* exact even where a road is recorded shorter than the straight line.
+    Returns 0.0 (no heuristic) if any city lacks coordinates.
+    """
+    scale = 1.0
+    for city, neighbors in graph.items():
+        if city not in coords:
+            return 0.0
+        for neighbor, weight in neighbors.items():
+            if neighbor not in coords:
+                return 0.0
+            straight = haversine_km(*coords[city], *coords[neighbor])
+            if straight > weight:
+                scale = min(scale, weight / straight)
+    return scale
+
+def great_circle_heuristic(coords, end_city, scale=1.0):
+    """
+    Returns h(city), a lower bound on the road distance from city to end_city:
+    scale times the great-circle distance. None when there is nothing to bound.
+    """
+    if scale <= 0 or end_city not in coords:
+        return None
+    end_lat, end_lon = coords[end_city]
+    return lambda city: scale * haversine_km(*coords[city], end_lat, end_lon)
+
+_geo_cache = {"source": None, "fingerprint": None, "coords": None, "scale": 0.0}
+
+def get_city_coordinates():
+    """
+    Returns {city: (latitude, longitude)} for the cached graph's cities that have
+    coordinates in the database, reread whenever the graph or the database changes.
+    """
+    graph = get_graph()
+    if graph is None:
+        return {}
+    fingerprint = _graph_cache["fingerprint"]
+    if _geo_cache["source"] is not graph or _geo_cache["fingerprint"] != fingerprint:
+        coords = _load_coordinates()
+        _geo_cache.update(coords=coords, scale=heuristic_scale(graph, coords))
+        _geo_cache["fingerprint"] = fingerprint
+        _geo_cache["source"] = graph
+    return _geo_cache["coords"]
+
+def select_landmarks(cgraph, count):
+    """
+    Picks up to count landmark cities spread over a compact.CompactGraph, each
+    the city farthest from the ones already picked, and returns their full
+    distance lists (one shortest-path tree per landmark).
+    """
+    from compact import shortest_path_tree
+    if not len(cgraph):
+        return []
+    landmarks = []
+    # Distance from each city to its closest landmark so far (city 0 seeds the spread)
+    nearest = shortest_path_tree(cgraph, 0)[0]
+    for _ in range(min(count, len(cgraph))):
+        city = max(range(len(nearest)), key=lambda i: nearest[i] if nearest[i] < INF else -1)
+        distances = shortest_path_tree(cgraph, city)[0]
+        landmarks.append(distances)
+        nearest = [min(a, b) for a, b in zip(nearest, distances)]
+    return landmarks
+
+def landmark_heuristic(cgraph, landmarks, end_city):
+    """
+    Returns h(city), the ALT lower bound on the distance from city to end_city:
+    by the triangle inequality |d(L, end) - d(L, city)| for every landmark L.
+    """
+    end = cgraph.ids.get(end_city)
+    if end is None or not landmarks:
+        return None
+    bounds = [(distances, distances[end]) for distances in landmarks if distances[end] < INF]
+    ids = cgraph.ids
+
+    def estimate(city):
+        i = ids[city]
+        return max((abs(to_end - distances[i]) for distances, to_end in bounds if distances[i] < INF), default=0)
+    return estimate
+
+_landmark_cache = {"source": None, "landmarks": None}
+
+def _astar_heuristic(graph, end_city):
+    """
+    Heuristic towards end_city for the cached graph: the landmark bound when
+    ASTAR_LANDMARKS is set, else the great-circle bound. Landmarks settle far
+    fewer cities, and adding the great-circle bound on top only costs time
+    (see `python bench.py astar`). None if neither is available.
+    """
+    if graph is not get_graph():
+        return None
+    if ASTAR_LANDMARKS:
+        cgraph = get_compact_graph()
+        if _landmark_cache["source"] is not cgraph:
+            _landmark_cache["landmarks"] = select_landmarks(cgraph, ASTAR_LANDMARKS)
+            _landmark_cache["source"] = cgraph
+        return landmark_heuristic(cgraph, _landmark_cache["landmarks"], end_city)
+    return great_circle_heuristic(get_city_coordinates(), end_city, _geo_cache["scale"])
+
+def combine_heuristics(*heuristics):
+    """Pointwise maximum of the given heuristics, skipping None. Returns None if none are left."""
+    heuristics = [h for h in heuristics if h is not None]
+    if len(heuristics) <= 1:
+        return heuristics[0] if heuristics else None
+    return lambda city: max(h(city) for h in heuristics)
+
+def astar(graph, start_city, end_city, heuristic=None):
+    """
+    A* search: dijkstra() with the heap ordered by distance so far plus
+    heuristic(city), a lower bound on the distance still to go, so the search
+    heads towards end_city instead of spreading out in every direction.
+    The heuristic must be consistent, as great_circle_heuristic() is; without
+    one this settles the same cities as dijkstra().
+    Returns: (path_list, distance) or (None, error_message)
+    """
+    if not graph:
+        return None, "Error: Could not load road network data."
+    if start_city not in graph or end_city not in graph:
+        return None, _no_route_message(start_city, end_city)
+    if heuristic is None:
+        return dijkstra(graph, start_city, end_city)
+
+    estimates = {}  # city -> heuristic value, computed once per city
+    distances = {start_city: 0}
+    previous_cities = {start_city: None}
+    estimates[start_city] = heuristic(start_city)
+    heap = [(estimates[start_city], 0, start_city)]
+    pops = 0
+
+    while heap:
+        _, current_distance, current_city = heappop(heap)
+        pops += 1
+
+        if current_distance > distances[current_city]:
+            continue  # Stale entry
+        if current_city == end_city:
+            if instrument.enabled:
+                _record_search(graph, [(distances, heap, estimates)], pops, end_city)
+            return _build_path(previous_cities, end_city), current_distance
+
+        for neighbor, weight in graph[current_city].items():
+            distance = current_distance + weight
+            if distance < distances.get(neighbor, INF):
                 distances[neighbor] = distance
-                previous_cities[neighbor] = current_city 
-                unvisited.append((distance, neighbor))
+                previous_cities[neighbor] = current_city
+                estimate = estimates.get(neighbor)
+                if estimate is None:
+                    estimate = estimates[neighbor] = heuristic(neighbor)
+                heappush(heap, (distance + estimate, distance, neighbor))
 
-    path = []
-    current_city = end_city
-    while current_city is not None:
-        path.insert(0, current_city)
-        current_city = previous_cities[current_city]
+    if instrument.enabled:
+        _record_search(graph, [(distances, heap, estimates)], pops)
+    return None, _no_route_message(start_city, end_city)
+
+# --- ROUTE MEMOIZATION ---
+
+class LRUCache:
+    """Small thread-safe LRU mapping with hit/miss counters."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
 
-    if path and path[0] == start_city:
-        return path, distances[end_city]
+    def get(self, key):
+        """Returns the cached value (marking it recently used) or None."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def items(self):
+        """Snapshot of the (key, value) pairs, least recently used first."""
+        with self._lock:
+            return list(self._data.items())
+
+    def replace(self, key, value):
+        """Updates a cached value in place, leaving its position in the LRU order."""
+        with self._lock:
+            if key in self._data:
+                self._data[key] = value
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+_route_cache = LRUCache(ROUTE_CACHE_SIZE)
+_tree_cache = LRUCache(TREE_CACHE_SIZE)
+# Sources queried recently; a full tree is only built the second time a source shows up
+_recent_sources = LRUCache(TREE_CACHE_SIZE * 4)
+_memo_lock = threading.Lock()
+_memo_source = {"graph": None, "cgraph": None}
+
+def _sync_route_caches(graph):
+    """
+    Brings the memoized routes and trees in line with the cached graph once it
+    has changed. When at most TREE_REPAIR_MAX_CHANGES roads differ (a closure, a
+    few edits replayed from the database) each cached tree is repaired (see
+    closures.repair_tree()) and only the routes over changed roads are dropped;
+    otherwise everything is dropped.
+    """
+    if _memo_source["graph"] is graph:
+        return
+    with _memo_lock:
+        old = _memo_source["graph"]
+        if old is graph:
+            return
+        changes = None
+        if old is not None and len(_tree_cache) + len(_route_cache) > 0:
+            from closures import graph_changes
+            changes = graph_changes(old, graph, TREE_REPAIR_MAX_CHANGES)
+        if changes is None:
+            _route_cache.clear()
+            _tree_cache.clear()
+            _recent_sources.clear()
+        elif changes:
+            _repair_route_caches(_memo_source["cgraph"], _compact_of(graph), changes)
+        _memo_source["graph"] = graph
+        _memo_source["cgraph"] = _compact_of(graph) if len(_tree_cache) else None
+
+def _repair_route_caches(old_cgraph, new_cgraph, changes):
+    from closures import repair_tree, road_key
+    repaired = 0
+    for start_city, tree in _tree_cache.items():
+        tree = repair_tree(old_cgraph, new_cgraph, *tree, changes) if old_cgraph is not None else None
+        if tree is None:
+            _tree_cache.pop(start_city)
+        else:
+            _tree_cache.replace(start_city, tree)
+            repaired += 1
+    if instrument.enabled:
+        instrument.count("cache.trees_repaired", repaired)
+
+    # A longer or closed road only invalidates the routes over it; a shorter or
+    # new one can beat any cached route
+    if any(after is not None and (before is None or after < before) for before, after in changes.values()):
+        _route_cache.clear()
+        return
+    for key, (path, _) in _route_cache.items():
+        if any(road_key(a, b) in changes for a, b in zip(path, path[1:])):
+            _route_cache.pop(key)
+
+def configure_route_cache(route_size=None, tree_size=None):
+    """Changes the route and/or tree cache capacity (0 disables that cache)."""
+    if route_size is not None:
+        _route_cache.resize(route_size)
+    if tree_size is not None:
+        _tree_cache.resize(tree_size)
+        _recent_sources.resize(tree_size * 4)
+
+def clear_route_cache():
+    """Empties the route and tree caches (counters are kept)."""
+    _route_cache.clear()
+    _tree_cache.clear()
+    _recent_sources.clear()
+
+def route_cache_stats():
+    """Returns {"routes": {...}, "trees": {...}} with size, maxsize, hits and misses."""
+    return {"routes": _route_cache.stats(), "trees": _tree_cache.stats()}
+
+def _cached_tree(start_city, build):
+    """
+    Returns the shortest-path tree for start_city as (cgraph, distances, previous),
+    or None. With build=True a missing tree is computed and cached.
+    """
+    # Trees are kept over the graph the caches were last synced to, so they can be repaired
+    cgraph = _compact_of(_memo_source["graph"])
+    tree = _tree_cache.get(start_city)
+    if tree is None and build and _tree_cache.maxsize > 0:
+        from compact import shortest_path_tree
+        tree = shortest_path_tree(cgraph, cgraph.ids[start_city])
+        _tree_cache.put(start_city, tree)
+        _memo_source["cgraph"] = cgraph
+    if tree is None:
+        return None
+    return cgraph, tree[0], tree[1]
+
+def _path_from_tree(cgraph, distances, previous, start_city, end_city):
+    from compact import tree_path
+    end = cgraph.ids[end_city]
+    if distances[end] == INF:
+        return None, _no_route_message(start_city, end_city)
+    return tree_path(cgraph, previous, end), distances[end]
+
+def _memoized_search(graph, start_city, end_city, search):
+    """
+    Answers start_city -> end_city from the route cache, then from a cached tree of
+    start_city, and only then by calling search(). Sources seen again get a full
+    tree so later destinations from them are a plain path walk.
+    """
+    _sync_route_caches(graph)
+    key = (start_city, end_city)
+    cached = _route_cache.get(key)
+    if cached is not None:
+        if instrument.enabled:
+            instrument.count("cache.route_hits")
+        return list(cached[0]), cached[1]
+
+    tree = _cached_tree(start_city, build=start_city in _recent_sources)
+    _recent_sources.put(start_city, True)
+    if tree is not None:
+        if instrument.enabled:
+            instrument.count("cache.tree_hits")
+        path, distance = _path_from_tree(*tree, start_city, end_city)
     else:
-        return None, f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
+        if instrument.enabled:
+            instrument.count("cache.misses")
+        path, distance = search()
+    if path:
+        _route_cache.put(key, (tuple(path), distance))
+    return path, distance
+
+# --- TIME-DEPENDENT ROUTING ---
+
+def _load_road_classes():
+    """Reads {(city, city): road_class} for every road ({} on older schemas)."""
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_NAME)
+        rows = conn.execute(
+            "SELECT a.name, b.name, r.road_class FROM roads r "
+            "JOIN cities a ON a.id = r.city_a JOIN cities b ON b.id = r.city_b").fetchall()
+        return {(standardize_city_name(a), standardize_city_name(b)): road_class for a, b, road_class in rows}
+    except sqlite3.Error:
+        return {}
+    finally:
+        if conn:
+            conn.close()
+
+_speed_cache = {"source": None, "fingerprint": None, "table": None}
+
+def get_speed_table():
+    """
+    Returns the timedep.SpeedTable for the cached compact graph, rebuilt whenever
+    the graph or the database (e.g. a road class) changes.
+    """
+    cgraph = get_compact_graph()
+    if cgraph is None:
+        return None
+    fingerprint = _graph_cache["fingerprint"]
+    if _speed_cache["source"] is not cgraph or _speed_cache["fingerprint"] != fingerprint:
+        from timedep import build_speed_table
+        _speed_cache["table"] = build_speed_table(cgraph, _load_road_classes())
+        _speed_cache["fingerprint"] = fingerprint
+        _speed_cache["source"] = cgraph
+    return _speed_cache["table"]
+
+def find_fastest_route(source, destination, departure=None):
+    """
+    Finds the route with the earliest arrival when leaving at `departure` (a
+    datetime, default now), using per-road speeds by road class and hour of day
+    (see timedep.py) instead of the AVG_SPEED_KMH estimate.
+    Returns: (path_list, distance, departure, arrival) with datetimes,
+             or (None, error_message)
+    """
+    from timedep import earliest_arrival
+    graph = get_graph()
+    if graph is None:
+        return None, "Error: Road network database not accessible or corrupt."
+    start_city = resolve_city(graph, source)
+    end_city = resolve_city(graph, destination)
+    if start_city is None or end_city is None:
+        return None, _unknown_cities_message(source, destination, start_city, end_city)
+    if not _connected(start_city, end_city):
+        return None, _no_route_message(start_city, end_city)
+
+    departure = departure or datetime.now()
+    midnight = datetime(departure.year, departure.month, departure.day)
+    depart_hours = (departure - midnight) / timedelta(hours=1)
+    cgraph = get_compact_graph()
+    found = earliest_arrival(cgraph, get_speed_table(), cgraph.ids[start_city], cgraph.ids[end_city], depart_hours)
+    if found is None:
+        return None, _no_route_message(start_city, end_city)
+    path, arrival_hours, distance = found
+    return [cgraph.names[i] for i in path], distance, departure, midnight + timedelta(hours=arrival_hours)
 
 # --- SIMPLIFIED TIME LOGIC ---
 
 def get_departure_time(total_distance):
     """
     Calculates total time and suggests the best departure time to arrive during daylight (6 AM - 6 PM).
+    The suggestion is next_departure()'s, so it matches what G3 shows for the route.
     Returns: (suggested_departure_time, total_time_hours)
+    Raises ValueError for a negative, infinite or NaN distance.
     """
-    # 1. Calculate Total Time
     # Note: Includes no buffer for stops, assuming continuous driving time.
     total_time_hours = total_distance / AVG_SPEED_KMH
+    departure, _, _ = next_departure(total_time_hours)
+    return departure.strftime("%I:%M %p"), total_time_hours
 
-    # 2. Determine Optimal Departure Time
-    today = datetime.now().date()
-    # Target arrival is the end of the day (6 PM)
-    target_arrival = datetime(today.year, today.month, today.day, DAY_END_HOUR, 0, 0)
-    
-    # Calculate the estimated departure time
-    time_delta = timedelta(hours=total_time_hours)
-    suggested_departure = target_arrival - time_delta
+def next_departure(total_time_hours):
+    """
+    The earliest departure of schedule_departures() for one drive that has not
+    passed yet: today's if it is still ahead, else tomorrow's. A drive that fits
+    in the daylight window arrives at DAY_END_HOUR; a longer one leaves at
+    DAY_START_HOUR and stops overnight.
+    Returns: (departure, arrival, overnight_stops) with datetimes.
+    Raises ValueError for negative, infinite or NaN hours, which have no departure.
+    """
+    from schedule import plan_offsets, expand
+    if not 0 <= total_time_hours < INF:
+        raise ValueError(f"Driving hours must be non-negative and finite, got {total_time_hours}.")
+    now = datetime.now()
+    hours = [total_time_hours]
+    dates = [now.date(), now.date() + timedelta(days=1)]
+    _, departure, arrival, _, overnight_stops = expand(
+        hours, plan_offsets(hours, DAY_START_HOUR, DAY_END_HOUR), dates, now)[0]
+    return departure, arrival, overnight_stops
+
+def schedule_departures(distances=None, hours=None, start_date=None, end_date=None,
+                        day_start=None, day_end=None, skip_past=True):
+    """
+    Plans departures for many routes on every date from start_date to end_date
+    (default: today only), driving only between day_start and day_end
+    (default DAY_START_HOUR, DAY_END_HOUR) with overnight stops on longer
+    drives (see schedule.py). Give route distances in km (driven at
+    AVG_SPEED_KMH) or driving hours. With skip_past, departures that have
+    already passed are left out. Unreachable routes (INF) get no records;
+    negative (or NaN) distances or hours are an error.
+    Returns: a list of (route_index, departure, arrival, driving_hours,
+             overnight_stops) records with datetimes, date by date;
+             or a single (None, error_message) entry.
+    """
+    from schedule import plan_offsets, expand, date_range
+    if (distances is None) == (hours is None):
+        return [(None, "Error: Give either distances or hours.")]
+    if hours is None:
+        if any(not distance >= 0 for distance in distances):
+            return [(None, "Error: distances must be non-negative.")]
+        hours = [distance / AVG_SPEED_KMH for distance in distances]
+    elif any(not h >= 0 for h in hours):
+        return [(None, "Error: hours must be non-negative.")]
+    day_start = DAY_START_HOUR if day_start is None else day_start
+    day_end = DAY_END_HOUR if day_end is None else day_end
+    if not 0 <= day_start < day_end <= 24:
+        return [(None, "Error: The daylight window must satisfy 0 <= day_start < day_end <= 24.")]
 
-    # Adjust if suggested departure is illogical (too far in the past or requires overnight driving)
     now = datetime.now()
-    
-    if total_time_hours >= 12 and suggested_departure.hour < DAY_START_HOUR:
-        # If it's a long journey requiring an overnight, suggest leaving at 6 AM today
-        # (This is an assumption for simple planning)
-        suggested_departure = datetime(today.year, today.month, today.day, DAY_START_HOUR, 0, 0)
-
-    # If the suggested departure time has already passed today, suggest tomorrow morning's start time.
-    if suggested_departure < now:
-         # Suggest leaving tomorrow at 6 AM
-         suggested_departure = datetime(today.year, today.month, today.day, DAY_START_HOUR, 0, 0) + timedelta(days=1)
-    
-    
-    return suggested_departure.strftime("%I:%M %p"), total_time_hours
+    start_date = start_date or now.date()
+    end_date = end_date or start_date
+    if end_date < start_date:
+        return [(None, "Error: end_date is before start_date.")]
+
+    with instrument.timed("schedule.departures"):
+        offsets = plan_offsets(hours, day_start, day_end)
+        return expand(hours, offsets, date_range(start_date, end_date), now if skip_past else None)
     
 # --- MAIN ROUTE FINDER FUNCTION ---
 
-def find_route(source, destination):
+def find_route(source, destination, bidirectional=False, engine=None,
+               avoid_cities=None, avoid_roads=None, road_lengths=None):
     """
     Finds the shortest route and calculates essential travel times.
+    City names may be aliases (see resolve_city()); misspelt ones get suggestions.
+    Set bidirectional=True to use the bidirectional search (same result, fewer cities settled).
+    Uses the precomputed distance table when it is fresh (see APSP_FILE), otherwise
+    the route/tree caches and DEFAULT_ENGINE. Naming an engine explicitly ("dict",
+    "astar", "compact", "table" or "ch") bypasses both and runs that engine directly.
+    bidirectional only applies to the "dict" engine. Cities in different parts of
+    the network (see get_component_index()) are answered without any search.
+    For this query only, avoid_cities and avoid_roads ((city, city) pairs) are
+    left out and road_lengths ({(city, city): km}) overrides existing roads'
+    lengths; such a query is always one dijkstra() through a closures.RoadOverlay,
+    whatever engine is named. Closures for every query: see close_roads().
     Returns: (path_list, distance, departure_time, total_time_hours) 
              or (None, error_message)
     """
-    graph = get_connections()
+    graph = get_graph()
     if graph is None:
         return None, "Error: Road network database not accessible or corrupt."
 
-    start_city = standardize_city_name(source)
-    end_city = standardize_city_name(destination)
+    start_city = resolve_city(graph, source)
+    end_city = resolve_city(graph, destination)
     
-    if start_city not in graph or end_city not in graph:
-        return None, f"One or both cities not found in the network: {source} or {destination}. Check spelling or coverage."
+    if start_city is None or end_city is None:
+        return None, _unknown_cities_message(source, destination, start_city, end_city)
+    if not _connected(start_city, end_city):
+        # Different components: no engine could find a route, so none runs
+        if instrument.enabled:
+            instrument.count("search.rejected_unreachable")
+        return None, _no_route_message(start_city, end_city)
+    overlay = None
+    if avoid_cities or avoid_roads or road_lengths:
+        overlay = _road_overlay(graph, avoid_cities, avoid_roads, road_lengths)
+        if isinstance(overlay, str):
+            return None, overlay
 
     # 1. Find shortest path and total distance
-    path, distance = dijkstra(graph, start_city, end_city)
+    started = time.perf_counter() if instrument.enabled else None
+    table = get_distance_table() if engine in (None, "table") and overlay is None else None
+    if overlay is not None:
+        from closures import overlay_dijkstra
+        path, distance = overlay_dijkstra(graph, start_city, end_city, overlay)
+        if path is None:
+            distance = _no_route_message(start_city, end_city)
+        engine = "overlay"
+    elif table is not None:
+        if started is not None:
+            instrument.count("cache.table_hits")
+        path, distance = table.lookup(start_city, end_city)
+    elif engine is None:
+        path, distance = _memoized_search(
+            graph, start_city, end_city,
+            lambda: _search(graph, start_city, end_city, DEFAULT_ENGINE, bidirectional))
+    else:
+        path, distance = _search(graph, start_city, end_city, engine, bidirectional)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        instrument.add_time("find_route.search", elapsed)
+        instrument.log_event("route", source=start_city, destination=end_city,
+                             engine=engine or ("table" if table is not None else DEFAULT_ENGINE),
+                             distance=distance if path else None, ms=round(elapsed * 1000, 3))
 
     if not path:
         return None, distance 
 
     # 2. Calculate optimal departure time and total time
-    departure_time, total_time_hours = get_departure_time(distance)
+    with instrument.timed("find_route.departure_time"):
+        departure_time, total_time_hours = get_departure_time(distance)
 
     # Return only the necessary calculated details (4 values total)
     return path, distance, departure_time, total_time_hours
+
+def _road_overlay(graph, avoid_cities, avoid_roads, road_lengths):
+    """Resolves find_route()'s per-query changes into a closures.RoadOverlay, or returns an error message."""
+    from closures import RoadOverlay
+
+    def resolve(city):
+        name = resolve_city(graph, city)
+        if name is None:
+            raise LookupError(f"Error: City not found in the network: {city}.")
+        return name
+
+    def resolve_road(a, b):
+        a, b = resolve(a), resolve(b)
+        if b not in graph[a]:
+            raise LookupError(f"Error: There is no road between {a} and {b}.")
+        return a, b
+
+    try:
+        cities = [resolve(city) for city in avoid_cities or ()]
+        roads = [resolve_road(a, b) for a, b in avoid_roads or ()]
+        lengths = {resolve_road(a, b): km for (a, b), km in (road_lengths or {}).items()}
+    except LookupError as error:
+        return str(error)
+    if any(km < 0 for km in lengths.values()):
+        return "Error: Road lengths cannot be negative."
+    return RoadOverlay(cities, roads, lengths)
+
+def find_alternative_routes(source, destination, k=None, max_similarity=None):
+    """
+    Finds up to k routes from source to destination, shortest first, with Yen's
+    k-shortest-paths algorithm (see alternatives.py). A route is only listed if
+    at most max_similarity of its length runs over roads of a route listed
+    before it (1.0 lists every loopless route). Defaults: ALTERNATIVE_ROUTES and
+    ALTERNATIVE_MAX_SIMILARITY. The destination's shortest-path tree comes from,
+    and is kept in, the tree cache.
+    Returns: a list of find_route()-shaped results; a failure is a single
+             (None, error_message) entry.
+    """
+    from alternatives import k_shortest_paths
+    k = ALTERNATIVE_ROUTES if k is None else k
+    max_similarity = ALTERNATIVE_MAX_SIMILARITY if max_similarity is None else max_similarity
+
+    graph = get_graph()
+    if graph is None:
+        return [(None, "Error: Road network database not accessible or corrupt.")]
+    start_city = resolve_city(graph, source)
+    end_city = resolve_city(graph, destination)
+    if start_city is None or end_city is None:
+        return [(None, _unknown_cities_message(source, destination, start_city, end_city))]
+    if not _connected(start_city, end_city):
+        return [(None, _no_route_message(start_city, end_city))]
+
+    _sync_route_caches(graph)
+    tree = _cached_tree(end_city, build=True)
+    if tree is None:
+        from compact import shortest_path_tree
+        cgraph = get_compact_graph()
+        tree = (cgraph, *shortest_path_tree(cgraph, cgraph.ids[end_city]))
+    cgraph, distances, previous = tree
+
+    paths = k_shortest_paths(cgraph, cgraph.ids[start_city], cgraph.ids[end_city], k, max_similarity,
+                             tree=(distances, previous))
+    if not paths:
+        return [(None, _no_route_message(start_city, end_city))]
+    return [([cgraph.names[i] for i in path], distance, *get_departure_time(distance)) for path, distance in paths]
+
+def _search(graph, start_city, end_city, engine, bidirectional=False):
+    """Runs one live search with the named engine. Returns (path_list, distance) or (None, error_message)."""
+    if engine == "table":
+        return None, "Error: Distance table missing or out of date. Rebuild it with 'python apsp.py'."
+    elif engine == "ch":
+        hierarchy = get_contraction_hierarchy()
+        if hierarchy is None:
+            return None, "Error: Contraction-hierarchies index missing or out of date. Rebuild it with 'python ch.py'."
+        return hierarchy.query(start_city, end_city)
+    elif engine == "compact":
+        from compact import dijkstra_compact
+        return dijkstra_compact(get_compact_graph(), start_city, end_city)
+    elif engine == "astar":
+        return astar(graph, start_city, end_city, _astar_heuristic(graph, end_city))
+    elif engine == "dict":
+        return dijkstra(graph, start_city, end_city, bidirectional=bidirectional)
+    return None, f"Error: Unknown routing engine '{engine}'."
+
+# --- REACHABILITY ---
+
+def _reach_limit(max_km, max_hours):
+    """Distance budget in km from a km and/or driving-hours budget (hours at AVG_SPEED_KMH)."""
+    limits = [INF]
+    if max_km is not None:
+        limits.append(max_km)
+    if max_hours is not None:
+        limits.append(max_hours * AVG_SPEED_KMH)
+    return min(limits)
+
+def _bounded_search(sources, max_km, max_hours):
+    """
+    Resolves sources and runs compact.bounded_search() from all of them.
+    Returns (cgraph, distances, previous, origin) over city IDs, or an error message.
+    """
+    graph = get_graph()
+    if graph is None:
+        return "Error: Road network database not accessible or corrupt."
+    names = list(sources)
+    resolved = [resolve_city(graph, name) for name in names]
+    unknown = [name for name, city in zip(names, resolved) if city is None]
+    if unknown:
+        return f"Cities not found in the network: {', '.join(unknown)}." + _suggestion_hints(unknown)
+    if not resolved:
+        return "No starting cities given."
+
+    from compact import bounded_search
+    cgraph = get_compact_graph()
+    return (cgraph, *bounded_search(cgraph, [cgraph.ids[city] for city in resolved], _reach_limit(max_km, max_hours)))
+
+def reachable_cities(source, max_km=None, max_hours=None):
+    """
+    Every city within max_km and/or max_hours of driving (at AVG_SPEED_KMH) of
+    source, from one search that stops at the budget.
+    Returns: a list of (city, distance, previous_city) nearest first, source
+             included with previous_city None; or [(None, error_message)]
+    """
+    result = _bounded_search([source], max_km, max_hours)
+    if isinstance(result, str):
+        return [(None, result)]
+    cgraph, distances, previous, _ = result
+    names = cgraph.names
+    return [(names[city], distance, names[previous[city]] if previous[city] != -1 else None)
+            for city, distance in distances.items()]
+
+def nearest_depots(depots, max_km=None, max_hours=None):
+    """
+    Assigns every city within the budget (see reachable_cities()) to its nearest
+    depot, from one search started at all depots together.
+    Returns: a list of (city, depot, distance, previous_city) nearest first; or
+             [(None, error_message)]
+    """
+    result = _bounded_search(depots, max_km, max_hours)
+    if isinstance(result, str):
+        return [(None, result)]
+    cgraph, distances, previous, origin = result
+    names = cgraph.names
+    return [(names[city], names[origin[city]], distance, names[previous[city]] if previous[city] != -1 else None)
+            for city, distance in distances.items()]
+
+# --- MULTI-STOP TRIPS ---
+
+def plan_trip(stops, round_trip=False, fixed_end=False):
+    """
+    Orders a multi-stop trip (see trip.py). The first stop is the start; with
+    round_trip the trip returns there, with fixed_end the last stop given stays
+    last, otherwise the other stops are visited in whatever order is shortest.
+    Repeated stops are visited once. Uses the distance table when it is fresh.
+    Returns: (ordered_stops, path_list, total_distance, total_time_hours, legs), where
+             legs holds one (from_city, to_city, distance, hours) per leg,
+             or (None, error_message)
+    """
+    graph = get_graph()
+    if graph is None:
+        return None, "Error: Road network database not accessible or corrupt."
+
+    names = list(stops)
+    resolved = [resolve_city(graph, name) for name in names]
+    unknown = [name for name, city in zip(names, resolved) if city is None]
+    if unknown:
+        return None, f"Cities not found in the network: {', '.join(unknown)}." + _suggestion_hints(unknown)
+    cities = list(dict.fromkeys(resolved))
+    if len(cities) < 2:
+        return None, "A trip needs at least two different stops."
+    if fixed_end and resolved[-1] != cities[-1]:
+        # The last stop was also listed earlier; it still has to come last
+        cities.remove(resolved[-1])
+        cities.append(resolved[-1])
+
+    # Roads are undirected, so every stop in the start's component means every leg exists
+    for city in cities[1:]:
+        if not _connected(cities[0], city):
+            return None, _no_route_message(cities[0], city)
+
+    from trip import leg_path, solve_order, stop_distances
+    table = get_distance_table()
+    if table is not None:
+        matrix = [[table.distance(a, b) if a != b else 0.0 for b in cities] for a in cities]
+        matrix = [[INF if d is None else d for d in row] for row in matrix]
+    else:
+        cgraph = get_compact_graph()
+        ids = [cgraph.ids[city] for city in cities]
+        matrix, trees = stop_distances(cgraph, ids)
+
+    order = solve_order(matrix, round_trip, fixed_end)
+    visits = order + [order[0]] if round_trip else order
+    path = [cities[order[0]]]
+    legs = []
+    for i, j in zip(visits, visits[1:]):
+        if table is not None:
+            leg = table.lookup(cities[i], cities[j])[0]
+        else:
+            leg = [cgraph.names[city] for city in leg_path(ids, trees, i, j)]
+        path.extend(leg[1:])
+        legs.append((cities[i], cities[j], matrix[i][j], matrix[i][j] / AVG_SPEED_KMH))
+
+    total_distance = sum(leg[2] for leg in legs)
+    return [cities[i] for i in visits], path, total_distance, total_distance / AVG_SPEED_KMH, legs
+
+# --- BATCH / MANY-TO-MANY QUERIES ---
+
+def find_routes_batch(pairs, workers=None):
+    """
+    Finds routes for many (source, destination) pairs with one graph load and one
+    shortest-path tree per distinct source (or plain lookups when the distance
+    table is fresh). Trees are shared with find_route() through the tree cache.
+    workers > 1 spreads the sources still missing a tree over a process pool.
+    Returns a list with one find_route()-shaped result per pair, in input order.
+    """
+    pairs = list(pairs)
+    graph = get_graph()
+    if graph is None:
+        return [(None, "Error: Road network database not accessible or corrupt.") for _ in pairs]
+
+    named = [(resolve_city(graph, source), resolve_city(graph, destination)) for source, destination in pairs]
+    # Pairs in different components get their answer without a tree being built
+    reachable = [start is not None and end is not None and _connected(start, end) for start, end in named]
+    table = get_distance_table()
+    trees = {}
+    cgraph = None
+    if table is None:
+        from compact import shortest_path_trees
+        _sync_route_caches(graph)
+        cgraph = _compact_of(graph)
+        missing = []
+        for (start, end), ok in zip(named, reachable):
+            if ok and start not in trees:
+                tree = _tree_cache.get(start)
+                trees[start] = tree
+                if tree is None:
+                    missing.append(cgraph.ids[start])
+        for source, tree in shortest_path_trees(cgraph, missing, workers).items():
+            trees[cgraph.names[source]] = tree
+            _tree_cache.put(cgraph.names[source], tree)
+            _memo_source["cgraph"] = cgraph
+
+    results = []
+    for (source, destination), (start_city, end_city), ok in zip(pairs, named, reachable):
+        if start_city is None or end_city is None:
+            results.append((None, _unknown_cities_message(source, destination, start_city, end_city)))
+            continue
+        if not ok:
+            results.append((None, _no_route_message(start_city, end_city)))
+            continue
+
+        if table is not None:
+            path, distance = table.lookup(start_city, end_city)
+        else:
+            distances, previous = trees[start_city]
+            path, distance = _path_from_tree(cgraph, distances, previous, start_city, end_city)
+
+        if not path:
+            results.append((None, distance))
+            continue
+        departure_time, total_time_hours = get_departure_time(distance)
+        results.append((path, distance, departure_time, total_time_hours))
+    return results
+
+def distance_matrix(sources, targets, workers=None):
+    """
+    Routes every source to every target. Returns a list of rows, one per source,
+    each holding one find_route()-shaped result per target.
+    """
+    sources, targets = list(sources), list(targets)
+    flat = find_routes_batch([(source, target) for source in sources for target in targets], workers)
+    return [flat[i * len(targets):(i + 1) * len(targets)] for i in range(len(sources))]
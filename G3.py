@@ -1,19 +1,48 @@
 import tkinter as tk
-from tkinter import messagebox, font as tkfont
+from tkinter import messagebox, ttk, font as tkfont
 import math
+from concurrent.futures import ThreadPoolExecutor
 
 # NOTE: Import the constant for display
 # Assuming G2.py contains:
 # find_route(source, destination) -> (path_list, distance_float, departure_time_str, total_time_hours_float)
-# AVG_SPEED_KMH
-from G2 import find_route, AVG_SPEED_KMH 
+#     or (None, error_message)
+# find_alternative_routes(source, destination) -> list of find_route()-shaped results, shortest first
+# next_departure(total_time_hours) -> (departure, arrival, overnight_stops) with datetimes,
+#     the plan behind find_route()'s departure_time_str; computed on the worker (see find_route_job())
+# AVG_SPEED_KMH, DAY_START_HOUR, DAY_END_HOUR
+from G2 import find_route, find_alternative_routes, get_name_index, prewarm, next_departure, AVG_SPEED_KMH, DAY_START_HOUR, DAY_END_HOUR
+from datetime import date
+from schedule import driving_days
+
+POLL_INTERVAL_MS = 50  # How often the Tk loop checks the worker for a finished route
+SUGGEST_DELAY_MS = 120  # Typing pause before the city suggestions are refreshed
+SUGGEST_COUNT = 6
+
+# --- Worker Jobs ---
+# Routes reach the Tk thread as find_route()'s tuple plus its departure plan
+# (next_departure()), so the window only formats datetimes the worker computed.
+
+def with_plan(route):
+    """Appends the departure plan to a found route; errors pass through unchanged."""
+    if not route or route[0] is None:
+        return route
+    return (*route, next_departure(route[3]))
+
+def find_route_job(source, destination):
+    """find_route() with the departure plan of the route found."""
+    return with_plan(find_route(source, destination))
+
+def find_alternatives_job(source, destination):
+    """find_alternative_routes() with a departure plan for every route."""
+    return [with_plan(route) for route in find_alternative_routes(source, destination)]
 
 class RouteFinderApp:
     def __init__(self, master):
         self.master = master
         master.title("🛣️ Enhanced National Highway Route Planner")
-        master.geometry("700x700") 
-        master.minsize(650, 650)
+        master.geometry("700x780") 
+        master.minsize(650, 720)
         
         # --- Configuration and Styles (Dark Theme with Differentiated Highlights) ---
         self.bg_color = "#000000"       # Black background for the window
@@ -78,8 +107,11 @@ class RouteFinderApp:
         self.entry_dest = tk.Entry(input_frame, width=40, font=self.main_font, relief=tk.FLAT, bd=2, bg="#333333", fg=self.text_color, insertbackground=self.text_color)
         self.entry_dest.grid(row=1, column=1, padx=(10, 0), pady=15, sticky="ew")
         
-        # Find Route Button
-        self.find_button = tk.Button(main_container, 
+        # Find Route Button (with the busy indicator underneath it)
+        action_frame = tk.Frame(main_container, bg=self.bg_color)
+        action_frame.grid(row=3, column=0, pady=20, sticky="n")
+
+        self.find_button = tk.Button(action_frame, 
                                      text="🚀 Find Optimal Route", 
                                      command=self.find_route_action, 
                                      font=('Roboto', 14, 'bold'), 
@@ -92,7 +124,12 @@ class RouteFinderApp:
                                      padx=30, 
                                      pady=10,
                                      cursor="hand2")
-        self.find_button.grid(row=3, column=0, pady=20, sticky="n")
+        self.find_button.grid(row=0, column=0)
+
+        # Busy indicator, shown only while a route is being calculated
+        self.progress = ttk.Progressbar(action_frame, mode="indeterminate", length=250)
+        self.progress.grid(row=1, column=0, pady=(10, 0))
+        self.progress.grid_remove()
         
         # --- Travel Summary Section (Output Grey BG) ---
         self.summary_frame = tk.Frame(main_container, bg=self.output_bg, padx=15, pady=15, 
@@ -117,6 +154,14 @@ class RouteFinderApp:
         self.label_departure = tk.Label(self.summary_frame, text="Suggest Leave Time: ---", font=self.info_font, fg=self.color_departure, bg=self.output_bg, pady=5)
         self.label_departure.grid(row=2, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
 
+        # Route Options (shortest first; selecting one shows it above and below)
+        self.route_list = tk.Listbox(self.summary_frame, height=3, font=self.main_font, bg=self.frame_bg, fg=self.text_color,
+                                     selectbackground=self.primary_color, selectforeground="#000000",
+                                     relief=tk.FLAT, bd=0, highlightthickness=0, activestyle="none", exportselection=False)
+        self.route_list.grid(row=3, column=0, columnspan=2, padx=10, pady=(5, 0), sticky="ew")
+        self.route_list.bind('<<ListboxSelect>>', lambda event: self.show_selected_route())
+        self.routes = []
+
         # --- Route Section Header ---
         self.label_route_header = tk.Label(main_container, text="Detailed Route Path:", font=self.header_font, fg=self.text_color, bg=self.bg_color)
         self.label_route_header.grid(row=5, column=0, pady=(10, 5), sticky="w", padx=20)
@@ -142,11 +187,46 @@ class RouteFinderApp:
         self.route_text.grid(row=0, column=0, sticky="nsew")
         scrollbar.config(command=self.route_text.yview, troughcolor=self.output_bg, bg=self.frame_bg)
         
+        # --- City Suggestions (drop-down under the entry being typed in) ---
+        self.suggest_box = tk.Listbox(master, height=SUGGEST_COUNT, font=self.main_font, bg="#333333", fg=self.text_color,
+                                      selectbackground=self.primary_color, selectforeground="#000000",
+                                      relief=tk.FLAT, bd=1, highlightthickness=1, highlightbackground=self.primary_color,
+                                      activestyle="none", exportselection=False)
+        self.suggest_box.bind('<ButtonRelease-1>', lambda event: self.accept_suggestion())
+        self.suggest_entry = None   # Entry the drop-down currently belongs to
+        self.suggest_job = None     # Pending debounced refresh
+
         # --- Bindings ---
-        self.entry_source.bind('<Return>', lambda event: self.entry_dest.focus_set())
-        self.entry_dest.bind('<Return>', lambda event: self.find_route_action())
+        self.entry_source.bind('<Return>', lambda event: self.accept_suggestion() or self.entry_dest.focus_set())
+        self.entry_dest.bind('<Return>', lambda event: self.accept_suggestion() or self.find_route_action())
+        for entry in (self.entry_source, self.entry_dest):
+            entry.bind('<KeyRelease>', lambda event, entry=entry: self.schedule_suggestions(event, entry))
+            entry.bind('<Down>', lambda event: self.move_suggestion(1))
+            entry.bind('<Up>', lambda event: self.move_suggestion(-1))
+            entry.bind('<Escape>', lambda event: self.hide_suggestions())
+            entry.bind('<FocusOut>', lambda event: self.master.after(150, self.hide_suggestions))
         self.entry_source.focus_set()
 
+        # --- Background Routing ---
+        # Searches run on a worker thread so the window keeps painting; results come
+        # back to the Tk thread by polling with master.after(). Each submission gets
+        # a new query id, and results for older ids are dropped.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route-worker")
+        self.query_id = 0
+        self.pending = None
+        # Nothing is loaded before the window is on screen; see start_prewarm()
+        self.name_index = None
+        master.after_idle(self.start_prewarm)
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_prewarm(self):
+        """
+        Runs once the window has been drawn: loads the road network and the search
+        structures on the worker, then the city-name index that suggestions wait for.
+        """
+        self.executor.submit(prewarm)
+        self.name_index = self.executor.submit(get_name_index)
+
 
     def format_time(self, hours):
         """Formats hours into Days, Hours, Minutes string."""
@@ -170,9 +250,21 @@ class RouteFinderApp:
         return ", ".join(parts)
 
 
+    def format_departure(self, plan, total_time_hours):
+        """
+        Leave-time summary of a departure plan from the worker (see with_plan()):
+        the day and time to leave, the arrival and any overnight stops.
+        """
+        departure, arrival, overnight_stops = plan
+        day = "Today" if departure.date() == date.today() else departure.strftime("%a")
+        if not overnight_stops:
+            return f"Suggest Leave Time: {day} {departure:%I:%M %p} (To arrive by {arrival:%I %p})"
+        stops = ", ".join(f"{end:%a %I:%M %p}" for _, end in driving_days(departure, total_time_hours, DAY_START_HOUR, DAY_END_HOUR)[:-1])
+        return (f"Suggest Leave Time: {day} {departure:%I:%M %p}, arrive {arrival:%a %I:%M %p}\n"
+                f"Overnight stop{'s' if overnight_stops > 1 else ''} at {stops}")
+
     def find_route_action(self):
-        """Handles the button click event: gets input, calls the logic, and displays results."""
-        # Logic remains unchanged
+        """Handles the button click event: validates input and hands the search to the worker thread."""
         source = self.entry_source.get().strip().title()
         destination = self.entry_dest.get().strip().title()
 
@@ -180,39 +272,189 @@ class RouteFinderApp:
             messagebox.showerror("Input Error", "Please enter both a **Source** and a **Destination** city.")
             return
 
+        # Supersede whatever is still in flight: drop it if it has not started,
+        # and ignore its result if it has.
+        if self.pending is not None:
+            self.pending.cancel()
+        self.hide_suggestions()
+        self.query_id += 1
+        # The shortest route goes through find_route() (distance table, CH, route cache);
+        # the alternatives are fetched once it is on screen (see poll_alternatives())
+        self.pending = self.executor.submit(find_route_job, source, destination)
+        # Picks up cities added to the network since the index was built
+        self.name_index = self.executor.submit(get_name_index)
+
         self.route_text.delete(1.0, tk.END)
+        self.route_list.delete(0, tk.END)
+        self.routes = []
         self.label_distance.config(text="Total Distance: Calculating...")
         self.label_time.config(text="Est. Time: Calculating...")
         self.label_departure.config(text="Suggest Leave Time: Calculating...")
+        self.set_busy(True)
+        self.master.after(POLL_INTERVAL_MS, self.poll_route, self.query_id, self.pending, source, destination)
 
-        try:
-            result = find_route(source, destination)
-            if not result or result[0] is None:
-                error_message = result[1] if isinstance(result, tuple) and len(result) > 1 else "No route found."
-                messagebox.showerror("Route Error", error_message)
-                self.reset_summary()
-                return
-                
-            path, distance, departure_time, total_time_hours = result
+    def poll_route(self, query_id, future, source, destination):
+        """Runs on the Tk thread until the worker finishes query_id, then shows the shortest route."""
+        if query_id != self.query_id:
+            return  # A newer query replaced this one
+        if not future.done():
+            self.master.after(POLL_INTERVAL_MS, self.poll_route, query_id, future, source, destination)
+            return
 
+        self.pending = None
+        self.set_busy(False)
+        try:
+            result = future.result()
         except Exception as e:
             messagebox.showerror("System Error", f"An unexpected error occurred during route finding: {e}")
             self.reset_summary()
             return
-            
+
+        if not result or result[0] is None:
+            error_message = result[1] if result and len(result) > 1 else "No route found."
+            messagebox.showerror("Route Error", error_message)
+            self.reset_summary()
+            return
+
+        self.routes = [result]
+        self.route_list.insert(tk.END, self.route_option_text(0))
+        self.route_list.selection_set(0)
+        self.show_route(*result, title=self.route_title(0))
+
+        # Alternatives arrive while the shortest route is already shown
+        self.pending = self.executor.submit(find_alternatives_job, source, destination)
+        self.master.after(POLL_INTERVAL_MS, self.poll_alternatives, query_id, self.pending)
+
+    def poll_alternatives(self, query_id, future):
+        """Adds the alternative routes of query_id to the route options list once the worker has them."""
+        if query_id != self.query_id:
+            return
+        if not future.done():
+            self.master.after(POLL_INTERVAL_MS, self.poll_alternatives, query_id, future)
+            return
+
+        self.pending = None
+        try:
+            result = future.result()
+        except Exception:
+            return  # The shortest route is shown; alternatives are a bonus
+        shortest_path = self.routes[0][0]
+        for route in result:
+            if route[0] is not None and route[0] != shortest_path:
+                self.routes.append(route)
+                self.route_list.insert(tk.END, self.route_option_text(len(self.routes) - 1))
+
+    def route_title(self, i):
+        """Label of route option i: 'Shortest Route', or 'Alternative N (+x km)'."""
+        if i == 0:
+            return "Shortest Route"
+        return f"Alternative {i} (+{self.routes[i][1] - self.routes[0][1]:.0f} km)"
+
+    def route_option_text(self, i):
+        """One line of the route options list."""
+        path, distance, _, total_time_hours, _ = self.routes[i]
+        stops = path[1:-1]
+        via = ", ".join(stops[:3]) + (", ..." if len(stops) > 3 else "") if stops else "direct road"
+        return f"{self.route_title(i)}: {distance:.0f} km, {self.format_time(total_time_hours)} via {via}"
+
+    def show_selected_route(self):
+        """Shows the route picked in the route options list."""
+        selection = self.route_list.curselection()
+        if selection and selection[0] < len(self.routes):
+            self.show_route(*self.routes[selection[0]], title=self.route_title(selection[0]))
+
+    # --- City Suggestions ---
+
+    def schedule_suggestions(self, event, entry):
+        """Debounces typing: refreshes the suggestions once the user pauses."""
+        if event.keysym in ("Return", "Escape", "Up", "Down", "Tab"):
+            return
+        if self.suggest_job is not None:
+            self.master.after_cancel(self.suggest_job)
+        self.suggest_job = self.master.after(SUGGEST_DELAY_MS, self.update_suggestions, entry)
+
+    def update_suggestions(self, entry):
+        """Fills the drop-down under entry with the top matches for its text."""
+        self.suggest_job = None
+        text = entry.get().strip()
+        if not text or self.name_index is None or not self.name_index.done() or self.master.focus_get() is not entry:
+            self.hide_suggestions()
+            return
+        try:
+            index = self.name_index.result()
+        except Exception:
+            index = None
+        suggestions = index.suggest(text, SUGGEST_COUNT) if index is not None else []
+        # Nothing to offer once the entry already holds exactly the single match
+        if not suggestions or suggestions == [text.title()]:
+            self.hide_suggestions()
+            return
+
+        self.suggest_box.delete(0, tk.END)
+        for name in suggestions:
+            self.suggest_box.insert(tk.END, name)
+        self.suggest_box.config(height=len(suggestions))
+        self.suggest_box.selection_set(0)
+        self.suggest_entry = entry
+        self.suggest_box.place(in_=entry, relx=0, rely=1, relwidth=1, bordermode="outside")
+        self.suggest_box.lift()
+
+    def move_suggestion(self, step):
+        """Moves the highlighted suggestion up or down."""
+        if self.suggest_entry is None:
+            return
+        selection = self.suggest_box.curselection()
+        current = selection[0] + step if selection else 0
+        current = max(0, min(self.suggest_box.size() - 1, current))
+        self.suggest_box.selection_clear(0, tk.END)
+        self.suggest_box.selection_set(current)
+        self.suggest_box.see(current)
+        return "break"
+
+    def accept_suggestion(self):
+        """Copies the highlighted suggestion into its entry. Returns True if one was accepted."""
+        entry = self.suggest_entry
+        selection = self.suggest_box.curselection()
+        if entry is None or not selection:
+            return False
+        entry.delete(0, tk.END)
+        entry.insert(0, self.suggest_box.get(selection[0]))
+        self.hide_suggestions()
+        entry.focus_set()
+        return True
+
+    def hide_suggestions(self):
+        self.suggest_box.place_forget()
+        self.suggest_entry = None
+
+    def set_busy(self, busy):
+        """Shows or hides the progress bar and busy cursor."""
+        if busy:
+            self.progress.grid()
+            self.progress.start(10)
+            self.master.config(cursor="watch")
+            self.find_button.config(text="⏳ Calculating... (click to restart)")
+        else:
+            self.progress.stop()
+            self.progress.grid_remove()
+            self.master.config(cursor="")
+            self.find_button.config(text="🚀 Find Optimal Route")
+
+    def show_route(self, path, distance, departure_time, total_time_hours, plan, title="Shortest Route"):
+        """Fills the summary labels and the detailed route text for a found route."""
         # --- Display Summary (Updated Colors/Format) ---
         formatted_time = self.format_time(total_time_hours)
         
         self.label_distance.config(text=f"Total Distance: {distance:.2f} km 🛣️", fg=self.color_distance)
         self.label_time.config(text=f"Est. Time (@{AVG_SPEED_KMH} km/h): {formatted_time} ⏱️", fg=self.color_time)
-        self.label_departure.config(text=f"Suggest Leave Time: {departure_time} (To arrive by 6 PM)", fg=self.color_departure)
+        self.label_departure.config(text=self.format_departure(plan, total_time_hours), fg=self.color_departure)
 
         # --- Format and Display Detailed Route (Updated Highlight) ---
         route_lines = []
         num_cities = len(path)
         
         # Add a title line for the route
-        route_lines.append(f"--- Shortest Route Path from {path[0]} to {path[-1]} ---")
+        route_lines.append(f"--- {title} Path from {path[0]} to {path[-1]} ---")
         
         for i, city in enumerate(path):
             # City line: e.g., "1. **Ahmedabad**"
@@ -224,6 +466,7 @@ class RouteFinderApp:
         
         route_output = "\n".join(route_lines)
         
+        self.route_text.delete(1.0, tk.END)
         self.route_text.insert(tk.END, route_output)
         self.route_text.config(fg=self.text_color)
         
@@ -237,7 +480,12 @@ class RouteFinderApp:
                  end_index = f"{start_index}+{len(city)}c"
                  self.route_text.tag_add("bold", start_index, end_index)
         
-        
+    def on_close(self):
+        """Stops the worker without waiting for a search in progress, then closes the window."""
+        self.query_id += 1
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
+
     def reset_summary(self):
         """Resets the summary section on error."""
         self.label_distance.config(text="Total Distance: ---", fg=self.color_distance)
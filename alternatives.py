@@ -0,0 +1,130 @@
+"""
+Alternative routes: the k shortest loopless paths (Yen's algorithm) over a
+compact.CompactGraph, optionally skipping paths too similar to ones already kept.
+
+Every spur search in Yen's algorithm ends at the same target, so one
+shortest-path tree rooted at the target (roads are undirected) serves them all:
+    - when the tree's own path from the spur city avoids the removed roads and
+      the root path, it is the spur path and no search runs at all,
+    - otherwise its distances are an exact lower bound for an A* spur search,
+      which then heads almost straight for the target.
+G2.find_alternative_routes() passes in the target's tree from its tree cache.
+"""
+from heapq import heappush, heappop
+
+INF = float('inf')
+
+
+def road_length(cgraph, a, b):
+    """Length of the road between city IDs a and b (INF if there is none)."""
+    targets, weights = cgraph.targets, cgraph.weights
+    for k in range(cgraph.offsets[a], cgraph.offsets[a + 1]):
+        if targets[k] == b:
+            return weights[k]
+    return INF
+
+def _roads(cgraph, path):
+    """Maps each road of path, as a (low ID, high ID) pair, to its length."""
+    return {(min(a, b), max(a, b)): road_length(cgraph, a, b) for a, b in zip(path, path[1:])}
+
+def similarity(roads, distance, other_roads):
+    """Share of a path's length (roads, distance) that runs over roads of another path."""
+    if not distance:
+        return 1.0
+    return sum(length for road, length in roads.items() if road in other_roads) / distance
+
+def _spur_path(cgraph, spur, target, banned_nodes, banned_next, to_target, next_hop):
+    """
+    Shortest path from spur to target avoiding banned_nodes and the roads
+    spur -> banned_next. Returns (path_ids, distance) or None.
+    """
+    # Reuse the tree's path when nothing on it is banned
+    first = next_hop[spur]
+    if first not in banned_next:
+        path = [spur]
+        city = spur
+        while city != target and city != -1 and city not in banned_nodes:
+            city = next_hop[city]
+            path.append(city)
+        if city == target:
+            return path, to_target[spur]
+
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    distances = {spur: 0}
+    previous = {spur: -1}
+    heap = [(to_target[spur], 0, spur)]
+    while heap:
+        _, current_distance, current = heappop(heap)
+        if current_distance > distances[current]:
+            continue
+        if current == target:
+            path = []
+            while current != -1:
+                path.append(current)
+                current = previous[current]
+            path.reverse()
+            return path, current_distance
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            if neighbor in banned_nodes or (current == spur and neighbor in banned_next):
+                continue
+            distance = current_distance + weights[k]
+            if distance < distances.get(neighbor, INF) and to_target[neighbor] < INF:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                heappush(heap, (distance + to_target[neighbor], distance, neighbor))
+    return None
+
+
+def k_shortest_paths(cgraph, source, target, k=3, max_similarity=None, tree=None, max_examined=None):
+    """
+    Yen's algorithm between city IDs source and target.
+
+    tree is (distances, previous) from compact.shortest_path_tree() rooted at
+    target; it is computed when not given. With max_similarity, a path is only
+    kept if no more than that share of its length runs over roads of a path
+    kept before it; Yen's search still continues through the skipped ones.
+    At most max_examined loopless paths (default 10 * k) are looked at.
+    Returns up to k (path_ids, distance) pairs, shortest first.
+    """
+    if tree is None:
+        from compact import shortest_path_tree
+        tree = shortest_path_tree(cgraph, target)
+    to_target, next_hop = tree
+    if to_target[source] == INF or k <= 0:
+        return []
+    if max_examined is None:
+        max_examined = 10 * k
+
+    path = [source]
+    while path[-1] != target:
+        path.append(next_hop[path[-1]])
+    examined = [path]                  # Every path taken off the candidate heap, in order
+    kept = [(path, to_target[source], _roads(cgraph, path))]
+    candidates = []
+    seen = {tuple(path)}
+
+    while len(kept) < k and len(examined) < max_examined:
+        base = examined[-1]
+        root_distance = 0
+        for j, spur in enumerate(base[:-1]):
+            root = base[:j + 1]
+            banned_next = {p[j + 1] for p in examined if len(p) > j + 1 and p[:j + 1] == root}
+            spur_result = _spur_path(cgraph, spur, target, set(root[:-1]), banned_next, to_target, next_hop)
+            if spur_result is not None:
+                candidate = root[:-1] + spur_result[0]
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heappush(candidates, (root_distance + spur_result[1], candidate))
+            root_distance += road_length(cgraph, spur, base[j + 1])
+
+        if not candidates:
+            break
+        distance, path = heappop(candidates)
+        examined.append(path)
+        roads = _roads(cgraph, path)
+        if max_similarity is None or all(similarity(roads, distance, other) <= max_similarity
+                                         for _, _, other in kept):
+            kept.append((path, distance, roads))
+
+    return [(path, distance) for path, distance, _ in kept]
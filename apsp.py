@@ -0,0 +1,145 @@
+"""
+Precomputed all-pairs shortest-distance table for the road network.
+
+Build it once with:
+    python apsp.py [--workers N] [--output nh_routes.apsp]
+
+The file holds, for every ordered city pair (i, j), the shortest distance and
+the predecessor of j on the shortest path from i. G2.find_route() memory-maps
+it and answers queries from it while the routes checksum in its header still
+matches the database.
+
+File layout (little-endian, 8-byte aligned sections):
+    header   MAGIC, city count (uint32), names block length (uint32), checksum (40 ASCII hex)
+    names    newline-separated UTF-8 city names, zero padded
+    dist     n*n float64, row i = distances from city i
+    pred     n*n int32, row i = predecessors on the paths from city i (-1 = none)
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+
+MAGIC = b"NHAPSP01"
+HEADER = struct.Struct("<8sII40s")
+
+
+def _pad8(size):
+    return (size + 7) & ~7
+
+
+class DistanceTable:
+    """Read-only view over a memory-mapped all-pairs table."""
+
+    def __init__(self, names, checksum, dist, pred, mapping=None):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.checksum = checksum
+        self.dist = dist          # flat float64 sequence, n*n
+        self.pred = pred          # flat int32 sequence, n*n
+        self._mapping = mapping   # keeps the mmap alive
+
+    def __len__(self):
+        return len(self.names)
+
+    def distance(self, start_city, end_city):
+        """Shortest distance in km, or None if either city is unknown or unreachable."""
+        i, j = self.ids.get(start_city), self.ids.get(end_city)
+        if i is None or j is None:
+            return None
+        d = self.dist[i * len(self.names) + j]
+        return None if d == float('inf') else d
+
+    def lookup(self, start_city, end_city):
+        """Same contract as G2.dijkstra(): (path_list, distance) or (None, error_message)."""
+        n = len(self.names)
+        i, j = self.ids.get(start_city), self.ids.get(end_city)
+        if i is None or j is None or self.dist[i * n + j] == float('inf'):
+            return None, f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
+
+        row = i * n
+        path = [j]
+        while j != i:
+            j = self.pred[row + j]
+            path.append(j)
+        path.reverse()
+        return [self.names[k] for k in path], self.dist[row + path[-1]]
+
+
+# --- BUILD ---
+
+def compute_table(cgraph, workers=1):
+    """
+    Runs one full heap Dijkstra per city over a compact.CompactGraph, optionally
+    spread over a process pool. Returns (dist, pred) as flat arrays of n*n entries.
+    """
+    from compact import shortest_path_trees
+    n = len(cgraph)
+    dist = array('d', bytes(8 * n * n))
+    pred = array('i', bytes(4 * n * n))
+    for source, (distances, previous) in shortest_path_trees(cgraph, range(n), workers).items():
+        dist[source * n:(source + 1) * n] = array('d', distances)
+        pred[source * n:(source + 1) * n] = array('i', previous)
+    return dist, pred
+
+def write_table(path, names, checksum, dist, pred):
+    """Writes the table atomically (temp file + rename) so readers never see a partial file."""
+    names_block = "\n".join(names).encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(names), len(names_block), checksum.encode("ascii")))
+        f.write(names_block.ljust(_pad8(len(names_block)), b"\0"))
+        f.write(dist.tobytes())
+        f.write(pred.tobytes())
+    os.replace(tmp_path, path)
+
+def build_table(path=None, workers=1):
+    """Computes the all-pairs table for the current road data and saves it. Returns the city count."""
+    import G2
+    path = path or G2.APSP_FILE
+    cgraph = G2.get_compact_graph()
+    if cgraph is None:
+        raise RuntimeError("Road network database not accessible or corrupt.")
+    dist, pred = compute_table(cgraph, workers)
+    write_table(path, cgraph.names, G2.routes_checksum(), dist, pred)
+    return len(cgraph)
+
+
+# --- LOAD ---
+
+def load_table(path):
+    """Memory-maps a table file read-only. Returns a DistanceTable, or None if the file is invalid."""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        return None
+    magic, n, names_len, checksum = HEADER.unpack_from(mapping, 0)
+    dist_offset = HEADER.size + _pad8(names_len)
+    pred_offset = dist_offset + 8 * n * n
+    if magic != MAGIC or len(mapping) != pred_offset + 4 * n * n:
+        mapping.close()
+        return None
+
+    names = mapping[HEADER.size:HEADER.size + names_len].decode("utf-8").split("\n") if n else []
+    view = memoryview(mapping)
+    dist = view[dist_offset:pred_offset].cast("d")
+    pred = view[pred_offset:].cast("i")
+    return DistanceTable(names, checksum.decode("ascii"), dist, pred, mapping)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precompute the all-pairs distance table")
+    parser.add_argument("--output", help="table file (default: G2.APSP_FILE)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = build_table(args.output, args.workers)
+    print(f"All-pairs table for {count} cities written in {time.perf_counter() - started:.2f} s.")
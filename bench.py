@@ -0,0 +1,721 @@
+"""
+Benchmarks for the route planner's routing engines.
+
+Usage:
+    python bench.py dijkstra [--edges N] [--queries N] [--seed N] [--skip-legacy]
+    python bench.py compact [--edges N] [--queries N] [--seed N]
+    python bench.py ch [--edges N] [--queries N] [--seed N]
+    python bench.py astar [--edges N] [--queries N] [--landmarks N] [--seed N]
+    python bench.py timedep [--edges N] [--queries N] [--seed N]
+    python bench.py trip [--edges N] [--stops N,N,...] [--seed N]
+    python bench.py schedule [--routes N] [--days N] [--seed N]
+    python bench.py import [--sizes N,N,...] [--chunk-size N]
+    python bench.py startup [--repeats N]
+    python bench.py suite [--edges N] [--queries N] [--output FILE] [--baseline FILE]
+
+Every run measures the shipped network (nh_routes.db) first, then a synthetic
+India-sized road graph with roughly --edges undirected roads.
+
+`suite` is the reproducible regression run: it loads a synthetic network into
+a scratch database, points G2 at it, and reports graph-load cost (from the
+database and from a snapshot.py snapshot) and p50/p95/p99 latency, throughput
+and memory for fixed query workloads on every code path, as JSON. With --baseline it compares against an earlier result and
+exits with status 1 if any p50/p95 got slower by more than --tolerance.
+
+`startup` times `import G2` (via python -X importtime) and the first route in
+fresh interpreters, cold and after G2.prewarm(), and exits with status 1 if
+either is over its budget (IMPORT_BUDGET_MS, FIRST_ROUTE_BUDGET_MS).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import G1
+import G2
+import ch
+import snapshot
+import trip
+from G2 import haversine_km
+from compact import build_compact_graph, compact_from_edges, dijkstra_compact
+from server import latency_summary
+from timedep import SPEED_PROFILES, build_speed_table, earliest_arrival
+
+LONG_HAUL_KM = 1500   # Straight-line distance that makes a pair "long-haul"
+HOT_CORRIDORS = 8     # Distinct pairs in the hot-corridor workload
+IMPORT_BUDGET_MS = 30        # `import G2`, cumulative, from python -X importtime
+FIRST_ROUTE_BUDGET_MS = 150  # Fresh interpreter: import G2 plus the first find_route()
+
+# Rough bounding box of mainland India, used to place synthetic cities
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+# --- SYNTHETIC ROAD NETWORKS ---
+
+def synthetic_graph(num_edges, seed=0):
+    """
+    Builds a connected synthetic road graph with about num_edges undirected roads.
+    Cities sit on a jittered grid over India; each links to its east and south
+    neighbours and, half the time, to its south-east one. Road lengths are the
+    great-circle distance times a 1.05-1.4 detour factor.
+    Returns: (graph, coords) in the same nested-dict shape as G2.get_connections().
+    """
+    rng = random.Random(seed)
+    num_nodes = max(4, int(num_edges / 2.5))
+    cols = max(2, int(math.sqrt(num_nodes * (LON_RANGE[1] - LON_RANGE[0]) / (LAT_RANGE[1] - LAT_RANGE[0]))))
+    rows = max(2, num_nodes // cols)
+    lat_step = (LAT_RANGE[1] - LAT_RANGE[0]) / rows
+    lon_step = (LON_RANGE[1] - LON_RANGE[0]) / cols
+
+    coords = {}
+    for r in range(rows):
+        for c in range(cols):
+            lat = LAT_RANGE[0] + (r + rng.random()) * lat_step
+            lon = LON_RANGE[0] + (c + rng.random()) * lon_step
+            coords[f"N{r * cols + c}"] = (lat, lon)
+
+    graph = {city: {} for city in coords}
+
+    def link(a, b):
+        dist = round(haversine_km(*coords[a], *coords[b]) * rng.uniform(1.05, 1.4), 1)
+        graph[a][b] = dist
+        graph[b][a] = dist
+
+    for r in range(rows):
+        for c in range(cols):
+            city = f"N{r * cols + c}"
+            if c + 1 < cols:
+                link(city, f"N{r * cols + c + 1}")
+            if r + 1 < rows:
+                link(city, f"N{(r + 1) * cols + c}")
+                if c + 1 < cols and rng.random() < 0.5:
+                    link(city, f"N{(r + 1) * cols + c + 1}")
+    return graph, coords
+
+def edge_count(graph):
+    return sum(len(neighbors) for neighbors in graph.values()) // 2
+
+def random_pairs(graph, count, seed=0):
+    rng = random.Random(seed)
+    cities = sorted(graph)
+    return [(rng.choice(cities), rng.choice(cities)) for _ in range(count)]
+
+# --- REFERENCE IMPLEMENTATION ---
+
+def legacy_dijkstra(graph, start_city, end_city):
+    """The original list-sorting Dijkstra from G2, kept as the baseline to beat."""
+    distances = {city: float('inf') for city in graph}
+    distances[start_city] = 0
+    previous_cities = {city: None for city in graph}
+    unvisited = [(0, start_city)]
+
+    while unvisited:
+        unvisited.sort()
+        current_distance, current_city = unvisited.pop(0)
+        if current_distance > distances[current_city]:
+            continue
+        for neighbor, weight in graph[current_city].items():
+            distance = current_distance + weight
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous_cities[neighbor] = current_city
+                unvisited.append((distance, neighbor))
+
+    path = []
+    current_city = end_city
+    while current_city is not None:
+        path.insert(0, current_city)
+        current_city = previous_cities[current_city]
+    if path and path[0] == start_city:
+        return path, distances[end_city]
+    return None, "No route found"
+
+# --- MEASUREMENT ---
+
+def time_engine(search, graph, pairs):
+    """Runs search(graph, a, b) over all pairs. Returns (seconds, list_of_distances)."""
+    results = []
+    started = time.perf_counter()
+    for a, b in pairs:
+        path, distance = search(graph, a, b)
+        results.append(distance if path else None)
+    return time.perf_counter() - started, results
+
+def check_same(label, expected, actual):
+    for want, got in zip(expected, actual):
+        if (want is None) != (got is None) or (want is not None and abs(want - got) > 1e-6):
+            raise SystemExit(f"{label} disagrees with the reference: {want} != {got}")
+
+def compare_engines(title, graph, pairs, engines):
+    """
+    Times each (label, search) engine on the same pairs, checking results against the first.
+    Returns the first engine's total seconds, the baseline of the x column.
+    """
+    print(f"\n{title}: {len(graph)} cities, {edge_count(graph)} roads, {len(pairs)} queries")
+    reference = None
+    baseline = None
+    for label, search in engines:
+        seconds, results = time_engine(search, graph, pairs)
+        if reference is None:
+            reference, baseline = results, seconds
+        else:
+            check_same(label, reference, results)
+        per_query = seconds / len(pairs) * 1000
+        print(f"  {label:<28} {per_query:9.3f} ms/query   x{baseline / seconds:6.1f}")
+    return baseline
+
+def bench_dijkstra(args):
+    engines = [
+        ("heap dijkstra", G2.dijkstra),
+        ("bidirectional dijkstra", lambda g, a, b: G2.dijkstra(g, a, b, bidirectional=True)),
+    ]
+    if not args.skip_legacy:
+        engines.insert(0, ("legacy list dijkstra", legacy_dijkstra))
+
+    graph = G2.get_graph()
+    if graph:
+        compare_engines("Shipped network", graph, random_pairs(graph, args.queries * 10, args.seed), engines)
+
+    graph, _ = synthetic_graph(args.edges, args.seed)
+    compare_engines("Synthetic network", graph, random_pairs(graph, args.queries, args.seed), engines)
+
+def measure_build(build):
+    """Returns (result, seconds, bytes_allocated) for a graph-building callable."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, allocated
+
+def bench_compact(args):
+    graph, _ = synthetic_graph(args.edges, args.seed)
+    edges = [(a, b, d) for a, neighbors in graph.items() for b, d in neighbors.items() if a < b]
+    del graph
+
+    def build_dict():
+        g = {}
+        for src, dest, dist in edges:
+            g.setdefault(src, {})[dest] = dist
+            g.setdefault(dest, {})[src] = dist
+        return g
+
+    graph, dict_seconds, dict_bytes = measure_build(build_dict)
+    cgraph, compact_seconds, compact_bytes = measure_build(lambda: compact_from_edges(edges))
+    print(f"\nSynthetic network: {len(graph)} cities, {len(edges)} roads")
+    print(f"  dict graph     build {dict_seconds:7.2f} s   {dict_bytes / 2**20:8.1f} MiB")
+    print(f"  compact graph  build {compact_seconds:7.2f} s   {compact_bytes / 2**20:8.1f} MiB")
+
+    pairs = random_pairs(graph, args.queries, args.seed)
+    compare_engines("Query time", graph, pairs, [
+        ("dict dijkstra", G2.dijkstra),
+        ("compact dijkstra", lambda g, a, b: dijkstra_compact(cgraph, a, b)),
+    ])
+
+    shipped = G2.get_graph()
+    if shipped:
+        shipped_compact = build_compact_graph(shipped)
+        compare_engines("Shipped network", shipped, random_pairs(shipped, args.queries * 10, args.seed), [
+            ("dict dijkstra", G2.dijkstra),
+            ("compact dijkstra", lambda g, a, b: dijkstra_compact(shipped_compact, a, b)),
+        ])
+
+def bench_ch(args):
+    for title, graph in (("Shipped network", G2.get_graph()), ("Synthetic network", synthetic_graph(args.edges, args.seed)[0])):
+        if not graph:
+            continue
+        started = time.perf_counter()
+        hierarchy = ch.build_hierarchy(build_compact_graph(graph))
+        seconds = time.perf_counter() - started
+        pairs = random_pairs(graph, args.queries, args.seed)
+        failures = ch.verify(hierarchy, graph, pairs)
+        if failures:
+            raise SystemExit(f"CH disagrees with Dijkstra: {failures[0]}")
+        print(f"\n{title}: CH preprocessing {seconds:.2f} s, {len(hierarchy.targets)} upward edges, {len(pairs)} pairs verified")
+        compare_engines(title, graph, pairs, [
+            ("heap dijkstra", G2.dijkstra),
+            ("bidirectional dijkstra", lambda g, a, b: G2.dijkstra(g, a, b, bidirectional=True)),
+            ("contraction hierarchies", lambda g, a, b: hierarchy.query(a, b)),
+        ])
+
+class CountingGraph(dict):
+    """Road graph that counts neighbour lookups, i.e. cities settled by the searches in G2."""
+
+    def __init__(self, graph):
+        super().__init__(graph)
+        self.settled = 0
+
+    def __getitem__(self, city):
+        self.settled += 1
+        return dict.__getitem__(self, city)
+
+def regional_pairs(graph, coords, count, max_km, seed=0):
+    """Random pairs no more than max_km apart as the crow flies, e.g. Gujarat to Gujarat."""
+    rng = random.Random(seed)
+    cities = sorted(graph)
+    pairs = []
+    for _ in range(count * 1000):
+        a, b = rng.choice(cities), rng.choice(cities)
+        if haversine_km(*coords[a], *coords[b]) <= max_km:
+            pairs.append((a, b))
+            if len(pairs) == count:
+                break
+    return pairs
+
+def astar_engines(graph, coords, landmarks):
+    """A* variants over graph: great-circle bound, landmark (ALT) bound, and both."""
+    cgraph = build_compact_graph(graph)
+    scale = G2.heuristic_scale(graph, coords)
+    tables = G2.select_landmarks(cgraph, landmarks)
+    print(f"  great-circle scale {scale:.3f}, {len(tables)} landmarks")
+
+    def engine(use_geo, use_alt):
+        def search(g, a, b):
+            geo = G2.great_circle_heuristic(coords, b, scale) if use_geo else None
+            alt = G2.landmark_heuristic(cgraph, tables, b) if use_alt else None
+            return G2.astar(g, a, b, G2.combine_heuristics(geo, alt))
+        return search
+
+    return [("A* great-circle", engine(True, False)),
+            ("A* landmarks", engine(False, True)),
+            ("A* great-circle + landmarks", engine(True, True))]
+
+def bench_astar(args):
+    """Compares time and cities settled per query for Dijkstra and the A* variants."""
+    shipped = G2.get_graph()
+    networks = []
+    if shipped:
+        networks.append(("Shipped network", shipped, G2.get_city_coordinates(), 300))
+    networks.append(("Synthetic network", *synthetic_graph(args.edges, args.seed), 500))
+
+    for title, graph, coords, regional_km in networks:
+        print(f"\n{title}: {len(graph)} cities, {edge_count(graph)} roads")
+        engines = [("heap dijkstra", G2.dijkstra),
+                   ("bidirectional dijkstra", lambda g, a, b: G2.dijkstra(g, a, b, bidirectional=True))]
+        engines += astar_engines(graph, coords, args.landmarks)
+        workloads = [("random pairs", random_pairs(graph, args.queries, args.seed)),
+                     (f"pairs within {regional_km} km", regional_pairs(graph, coords, args.queries, regional_km, args.seed))]
+
+        counting = CountingGraph(graph)
+        for workload, pairs in workloads:
+            print(f"  {workload} ({len(pairs)} queries)")
+            reference = baseline = None
+            for label, search in engines:
+                seconds, results = time_engine(search, graph, pairs)
+                counting.settled = 0
+                time_engine(search, counting, pairs)
+                if reference is None:
+                    reference, baseline = results, seconds
+                else:
+                    check_same(label, reference, results)
+                print(f"    {label:<30} {seconds / len(pairs) * 1000:9.3f} ms/query "
+                      f"{counting.settled / len(pairs):10.1f} settled   x{baseline / seconds:6.1f}")
+
+def bench_timedep(args):
+    """Time-dependent earliest-arrival search vs plain compact Dijkstra on the same pairs."""
+    networks = []
+    shipped = G2.get_graph()
+    if shipped:
+        networks.append(("Shipped network", shipped, None))
+    networks.append(("Synthetic network", synthetic_graph(args.edges, args.seed)[0], random.Random(args.seed)))
+
+    for title, graph, rng in networks:
+        cgraph = build_compact_graph(graph)
+        if rng is None:
+            table = G2.get_speed_table()
+        else:
+            classes = sorted(SPEED_PROFILES)
+            road_classes = {(a, b): rng.choice(classes) for a, neighbors in graph.items() for b in neighbors if a < b}
+            table = build_speed_table(cgraph, road_classes)
+        pairs = random_pairs(graph, args.queries, args.seed)
+        departures = [random.Random(args.seed + i).uniform(0, 24) for i in range(len(pairs))]
+        baseline = compare_engines(title, graph, pairs, [
+            ("compact dijkstra (distance)", lambda g, a, b: dijkstra_compact(cgraph, a, b)),
+        ])
+        started = time.perf_counter()
+        for (a, b), depart in zip(pairs, departures):
+            earliest_arrival(cgraph, table, cgraph.ids[a], cgraph.ids[b], depart)
+        seconds = time.perf_counter() - started
+        print(f"  {'earliest arrival (time)':<28} {seconds / len(pairs) * 1000:9.3f} ms/query   "
+              f"x{baseline / seconds:6.1f}")
+
+def bench_trip(args):
+    """
+    Multi-stop trip planning per stop count: matrix time (one search per stop),
+    ordering time, and for trips the exact solver still handles, how far the
+    heuristic's trip is from the optimum.
+    """
+    networks = []
+    shipped = G2.get_graph()
+    if shipped:
+        networks.append(("Shipped network", shipped))
+    networks.append(("Synthetic network", synthetic_graph(args.edges, args.seed)[0]))
+
+    for title, graph in networks:
+        cgraph = build_compact_graph(graph)
+        rng = random.Random(args.seed)
+        print(f"\n{title}: {len(cgraph)} cities")
+        print(f"{'stops':>6} {'matrix ms':>10} {'order ms':>9} {'heuristic vs exact':>19}")
+        for count in (int(count) for count in args.stops.split(",")):
+            if count > len(cgraph):
+                continue
+            stops = rng.sample(range(len(cgraph)), count)
+            started = time.perf_counter()
+            matrix, _ = trip.stop_distances(cgraph, stops)
+            matrix_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            order = trip.solve_order(matrix, round_trip=True)
+            order_ms = (time.perf_counter() - started) * 1000
+            gap = ""
+            if count <= trip.EXACT_MAX_STOPS:
+                heuristic = trip.improve_order(matrix, trip.nearest_neighbor(matrix, True), True)
+                gap = f"{trip.trip_length(matrix, heuristic, True) / trip.trip_length(matrix, order, True) - 1:+.1%}"
+            print(f"{count:>6} {matrix_ms:>10.1f} {order_ms:>9.1f} {gap:>19}")
+
+def bench_schedule(args):
+    """
+    Departure plans for --routes routes on each of --days dates: one
+    get_departure_time() call per route and date against one
+    schedule_departures() call for them all.
+    """
+    from datetime import date, timedelta
+    rng = random.Random(args.seed)
+    distances = [rng.uniform(20, 3000) for _ in range(args.routes)]
+    start = date.today() + timedelta(days=1)
+
+    started = time.perf_counter()
+    for distance in distances:
+        for _ in range(args.days):
+            G2.get_departure_time(distance)
+    single_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    records = G2.schedule_departures(distances, start_date=start, end_date=start + timedelta(days=args.days - 1))
+    batch_ms = (time.perf_counter() - started) * 1000
+    multi_day = sum(1 for record in records if record[4])
+
+    print(f"\n{args.routes} routes x {args.days} days ({len(records)} plans, {multi_day} with overnight stops)")
+    print(f"{'get_departure_time() loop':<28} {single_ms:>9.1f} ms")
+    print(f"{'schedule_departures()':<28} {batch_ms:>9.1f} ms   x{single_ms / batch_ms:.1f}")
+
+def synthetic_rows(count, towns, seed=0):
+    """Generates count (source, destination, distance) rows over `towns` names without storing them."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        a, b = rng.randrange(towns), rng.randrange(towns)
+        yield f"town {a}", f"town {b}", rng.randint(5, 400)
+
+def bench_import(args):
+    """
+    Imports growing synthetic streams into scratch DBs. Peak RSS levels off once
+    SQLite's page cache (see G1.IMPORT_PRAGMAS) is full, whatever the input size.
+    """
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as scratch:
+        print(f"\n{'rows':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS':>13}")
+        for i, size in enumerate(sorted(sizes)):
+            db_name = os.path.join(scratch, f"import_{i}.db")
+            stats = G1.import_roads(synthetic_rows(size, args.towns, args.seed), db_name,
+                                    chunk_size=args.chunk_size, report=None)
+            print(f"{stats['rows']:>10} {stats['seconds']:>9.2f} {stats['rows_per_sec']:>10.0f} {G1.format_mb(stats['peak_rss_mb']):>13}")
+
+# --- STARTUP ---
+# Each snippet runs in a fresh interpreter and prints one JSON object
+_IMPORT_SNIPPET = """
+import json, sys
+import G2
+print(json.dumps({"graph_loaded": G2._graph_cache["graph"] is not None,
+                  "gui_imported": "tkinter" in sys.modules}))
+"""
+_FIRST_ROUTE_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import G2
+if %(prewarm)s:
+    G2.prewarm()
+    started = time.perf_counter()
+result = G2.find_route(%(source)r, %(destination)r)
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000, "ok": result[0] is not None}))
+"""
+
+def _run_python(args, code):
+    """Runs code in a fresh interpreter from this directory. Returns (stdout JSON, stderr)."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # Time imports from bytecode, as installed code would be
+    done = subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    return json.loads(done.stdout.strip().splitlines()[-1]), done.stderr
+
+def _import_ms(importtime_output, module):
+    """Cumulative import time of module (ms) from python -X importtime output."""
+    for line in importtime_output.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+def bench_startup(args):
+    """
+    Startup cost in fresh interpreters, median of --repeats runs each: importing
+    G2 (which must load neither the graph nor tkinter), the first route with
+    nothing loaded, and the first route after G2.prewarm() as G3 does once
+    its window is up.
+    """
+    _run_python([], _IMPORT_SNIPPET)  # Compiles bytecode so the timed runs do not pay for it
+    imports = []
+    for _ in range(args.repeats):
+        flags, stderr = _run_python(["-X", "importtime"], _IMPORT_SNIPPET)
+        imports.append(_import_ms(stderr, "G2"))
+    cold = [_run_python([], _FIRST_ROUTE_SNIPPET % {"prewarm": False, "source": args.source,
+                                                    "destination": args.destination})[0]
+            for _ in range(args.repeats)]
+    warm = [_run_python([], _FIRST_ROUTE_SNIPPET % {"prewarm": True, "source": args.source,
+                                                    "destination": args.destination})[0]
+            for _ in range(args.repeats)]
+
+    def median(values):
+        return sorted(values)[len(values) // 2]
+
+    import_ms = median(imports)
+    cold_ms = median([run["ms"] for run in cold])
+    warm_ms = median([run["ms"] for run in warm])
+    print(f"\nimport G2 loads graph: {flags['graph_loaded']}, imports tkinter: {flags['gui_imported']}")
+    print(f"{'measure':<32} {'ms':>8} {'budget':>8}")
+    print(f"{'import G2':<32} {import_ms:>8.1f} {IMPORT_BUDGET_MS:>8}")
+    print(f"{'first route, cold':<32} {cold_ms:>8.1f} {FIRST_ROUTE_BUDGET_MS:>8}")
+    print(f"{'first route after prewarm()':<32} {warm_ms:>8.1f}")
+
+    failures = [name for name, ok in (
+        ("import G2 loads the graph", not flags["graph_loaded"]),
+        ("import G2 imports tkinter", not flags["gui_imported"]),
+        ("import time", import_ms <= IMPORT_BUDGET_MS),
+        ("time to first route", cold_ms <= FIRST_ROUTE_BUDGET_MS),
+        ("route found", all(run["ok"] for run in cold + warm)),
+    ) if not ok]
+    if failures:
+        print(f"Over budget / failed: {', '.join(failures)}", file=sys.stderr)
+        raise SystemExit(1)
+
+# --- REGRESSION SUITE ---
+
+def corridor_pairs(graph, count, seed=0):
+    """count queries over HOT_CORRIDORS popular pairs, the k-th most popular asked 1/k as often."""
+    rng = random.Random(seed)
+    corridors = random_pairs(graph, HOT_CORRIDORS, seed + 1)
+    weights = [1 / rank for rank in range(1, len(corridors) + 1)]
+    return rng.choices(corridors, weights, k=count)
+
+def long_haul_pairs(graph, coords, count, seed=0):
+    """Random pairs at least LONG_HAUL_KM apart as the crow flies (fewer if the graph is too small)."""
+    rng = random.Random(seed)
+    cities = sorted(graph)
+    pairs = []
+    for _ in range(count * 1000):
+        a, b = rng.choice(cities), rng.choice(cities)
+        if haversine_km(*coords[a], *coords[b]) >= LONG_HAUL_KM:
+            pairs.append((a, b))
+            if len(pairs) == count:
+                break
+    return pairs
+
+def run_workload(query, pairs):
+    """Times query(a, b) per pair. Returns latency percentiles plus throughput."""
+    latencies = []
+    started = time.perf_counter()
+    for a, b in pairs:
+        t = time.perf_counter()
+        query(a, b)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+    return dict(latency_summary(latencies), throughput_qps=len(pairs) / elapsed if elapsed else 0.0)
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(args):
+    """Runs the suite against a scratch database and returns the results as a JSON-ready dict."""
+    graph, coords = synthetic_graph(args.edges, args.seed)
+    rows = [(a, b, d) for a, neighbors in graph.items() for b, d in neighbors.items() if a < b]
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key != "func"},
+        },
+        "graph": {"cities": len(graph), "roads": len(rows)},
+    }
+    del graph
+
+    saved = G2.DB_NAME, G2.APSP_FILE, G2.CH_FILE, G2.SNAPSHOT_FILE
+    with tempfile.TemporaryDirectory() as scratch:
+        db_name = os.path.join(scratch, "suite.db")
+        G1.import_roads(rows, db_name, report=None)
+        G1.set_city_locations(coords, db_name)
+        # No precomputed files exist for the scratch data, so every path runs live
+        G2.DB_NAME = db_name
+        G2.APSP_FILE = os.path.join(scratch, "suite.apsp")
+        G2.CH_FILE = os.path.join(scratch, "suite.ch")
+        G2.SNAPSHOT_FILE = os.path.join(scratch, "suite.snap")
+        try:
+            load = run_workload(lambda a, b: G2.get_connections(), [(None, None)] * args.load_repeats)
+            _, _, load["retained_bytes"] = measure_build(G2.get_connections)
+            snapshot.export_snapshot()
+            from_snapshot = run_workload(lambda a, b: G2._load_snapshot(), [(None, None)] * args.load_repeats)
+            _, _, from_snapshot["retained_bytes"] = measure_build(G2._load_snapshot)
+            graph = G2.reload()
+            cgraph, _, compact_bytes = measure_build(G2.get_compact_graph)
+            results["load"] = {"get_connections": load, "snapshot": from_snapshot,
+                               "compact_graph_retained_bytes": compact_bytes}
+
+            engines = {
+                "dijkstra": lambda a, b: G2.dijkstra(graph, a, b),
+                "bidirectional": lambda a, b: G2.dijkstra(graph, a, b, bidirectional=True),
+                "compact": lambda a, b: dijkstra_compact(cgraph, a, b),
+                "astar": lambda a, b: G2.find_route(a, b, engine="astar"),
+                "find_route": lambda a, b: G2.find_route(a, b),
+            }
+            workloads = {
+                "random": random_pairs(graph, args.queries, args.seed),
+                "hot_corridors": corridor_pairs(graph, args.queries, args.seed),
+                "long_haul": long_haul_pairs(graph, coords, args.queries, args.seed),
+            }
+            G2.find_route(*workloads["random"][0], engine="astar")  # Landmarks are built once, not timed
+            results["workloads"] = {}
+            for name, pairs in workloads.items():
+                results["workloads"][name] = {}
+                for engine, query in engines.items():
+                    G2.clear_route_cache()
+                    results["workloads"][name][engine] = run_workload(query, pairs)
+            results["peak_rss_mb"] = G1.peak_rss_mb()
+        finally:
+            G2.DB_NAME, G2.APSP_FILE, G2.CH_FILE, G2.SNAPSHOT_FILE = saved
+            G2.reload()
+    return results
+
+def compare_results(baseline, current, tolerance):
+    """Prints p50/p95 changes per workload and engine. Returns the regressions beyond tolerance."""
+    regressions = []
+    for name, engines in current.get("workloads", {}).items():
+        for engine, stats in engines.items():
+            before = baseline.get("workloads", {}).get(name, {}).get(engine)
+            if not before:
+                continue
+            changes = []
+            for key in ("p50_ms", "p95_ms"):
+                if before.get(key):
+                    change = stats[key] / before[key] - 1
+                    changes.append(f"{key} {change:+7.1%}")
+                    if change > tolerance:
+                        regressions.append(f"{name}/{engine} {key}")
+            print(f"  {name:<14} {engine:<14} " + "  ".join(changes), file=sys.stderr)
+    return regressions
+
+def bench_suite(args):
+    results = run_suite(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.baseline}:", file=sys.stderr)
+        regressions = compare_results(baseline, results, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            raise SystemExit(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route planner benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("dijkstra", help="legacy vs heap vs bidirectional Dijkstra")
+    p.add_argument("--edges", type=int, default=100_000, help="roads in the synthetic graph")
+    p.add_argument("--queries", type=int, default=20)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--skip-legacy", action="store_true", help="skip the slow original implementation")
+    p.set_defaults(func=bench_dijkstra)
+
+    p = sub.add_parser("compact", help="nested-dict vs array-backed graph: memory and query time")
+    p.add_argument("--edges", type=int, default=100_000, help="roads in the synthetic graph")
+    p.add_argument("--queries", type=int, default=20)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_compact)
+
+    p = sub.add_parser("ch", help="contraction-hierarchies preprocessing cost, correctness and query time")
+    p.add_argument("--edges", type=int, default=10_000, help="roads in the synthetic graph")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_ch)
+
+    p = sub.add_parser("astar", help="A* (great-circle / landmark bounds) vs Dijkstra: cities settled and time")
+    p.add_argument("--edges", type=int, default=100_000, help="roads in the synthetic graph")
+    p.add_argument("--queries", type=int, default=100)
+    p.add_argument("--landmarks", type=int, default=G2.ASTAR_LANDMARKS)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_astar)
+
+    p = sub.add_parser("timedep", help="time-dependent earliest-arrival search vs distance Dijkstra")
+    p.add_argument("--edges", type=int, default=100_000, help="roads in the synthetic graph")
+    p.add_argument("--queries", type=int, default=50)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_timedep)
+
+    p = sub.add_parser("trip", help="multi-stop trip planning: matrix and ordering time per stop count")
+    p.add_argument("--edges", type=int, default=100_000, help="roads in the synthetic graph")
+    p.add_argument("--stops", default="5,10,13,20,50", help="comma-separated stop counts")
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_trip)
+
+    p = sub.add_parser("schedule", help="batch departure planning vs one get_departure_time() call per route and date")
+    p.add_argument("--routes", type=int, default=5000)
+    p.add_argument("--days", type=int, default=7)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_schedule)
+
+    p = sub.add_parser("import", help="bulk importer throughput and memory for growing inputs")
+    p.add_argument("--sizes", default="50000,200000,800000", help="comma-separated row counts")
+    p.add_argument("--towns", type=int, default=20_000)
+    p.add_argument("--chunk-size", type=int, default=G1.IMPORT_CHUNK_SIZE)
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=bench_import)
+
+    p = sub.add_parser("startup", help="import time and time to first route in fresh interpreters, against budgets")
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--source", default="Mumbai")
+    p.add_argument("--destination", default="Delhi")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("suite", help="regression suite: load cost and latency percentiles per workload, as JSON")
+    p.add_argument("--edges", type=int, default=100_000, help="roads in the synthetic graph")
+    p.add_argument("--queries", type=int, default=200, help="queries per workload")
+    p.add_argument("--load-repeats", type=int, default=3, help="timed get_connections() calls")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", help="write the JSON here instead of stdout")
+    p.add_argument("--baseline", help="earlier suite JSON to compare against")
+    p.add_argument("--tolerance", type=float, default=0.10, help="allowed p50/p95 slowdown before failing")
+    p.set_defaults(func=bench_suite)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
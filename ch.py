@@ -0,0 +1,351 @@
+"""
+Contraction hierarchies (CH) for large road networks.
+
+Preprocessing contracts cities one at a time, least important first. Whenever
+contracting city v would break a shortest path u -> v -> w, a shortcut u - w
+is added that remembers v as its middle city. Afterwards every query is a
+bidirectional Dijkstra that only climbs to more important cities, which
+settles a tiny fraction of what plain Dijkstra touches. Shortcuts are unpacked
+through their middle cities to give the full city-by-city path.
+
+Build the index for the current routes data with:
+    python ch.py [--output nh_routes.ch]
+Cross-check it against G2.dijkstra() with:
+    python ch.py --verify 1000
+
+File layout (little-endian, 8-byte aligned sections):
+    header   MAGIC, city count, upward edge count, names block length (uint32 each), checksum (40 ASCII hex)
+    names    newline-separated UTF-8 city names, zero padded
+    weights  m float64, length of each upward edge
+    rank     n int32, contraction order of each city
+    offsets  n+1 int32, upward edges of city i are [offsets[i], offsets[i+1])
+    targets  m int32, higher-ranked endpoint of each upward edge
+    middles  m int32, middle city of a shortcut, -1 for an original road
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+from array import array
+from heapq import heappush, heappop
+
+MAGIC = b"NHCH0001"
+HEADER = struct.Struct("<8sIII40s")
+INF = float('inf')
+
+# Witness searches give up after settling this many cities. Giving up early only
+# adds a shortcut that was not strictly needed, it never breaks correctness.
+WITNESS_SETTLE_LIMIT = 100
+
+
+def _pad8(size):
+    return (size + 7) & ~7
+
+
+class ContractionHierarchy:
+    """Upward CH graph in CSR arrays, either freshly built or memory-mapped from disk."""
+
+    def __init__(self, names, checksum, rank, offsets, targets, weights, middles, mapping=None):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.checksum = checksum
+        self.rank = rank
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.middles = middles
+        self._mapping = mapping   # keeps the mmap alive
+
+    def __len__(self):
+        return len(self.names)
+
+    def _middle(self, a, b):
+        """Middle city of the CH edge a - b (-1 for an original road)."""
+        if self.rank[a] > self.rank[b]:
+            a, b = b, a
+        offsets, targets = self.offsets, self.targets
+        for k in range(offsets[a], offsets[a + 1]):
+            if targets[k] == b:
+                return self.middles[k]
+        raise KeyError((a, b))
+
+    def _unpack(self, a, b):
+        """Expands the CH edge a - b into the original roads it stands for. Returns city IDs a..b."""
+        path = [a]
+        stack = [b]
+        current = a
+        while stack:
+            target = stack[-1]
+            middle = self._middle(current, target)
+            if middle == -1:
+                path.append(target)
+                current = stack.pop()
+            else:
+                stack.append(middle)
+        return path
+
+    def query(self, start_city, end_city):
+        """Same contract as G2.dijkstra(): (path_list, distance) or (None, error_message)."""
+        start, end = self.ids.get(start_city), self.ids.get(end_city)
+        if start is None or end is None:
+            return None, f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
+        if start == end:
+            return [start_city], 0
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        distances = ({start: 0}, {end: 0})
+        previous = ({start: -1}, {end: -1})
+        heaps = ([(0, start)], [(0, end)])
+        best_distance = INF
+        meeting = -1
+
+        while True:
+            # Each side stops once its frontier can no longer beat the best meeting point
+            live = [side for side in (0, 1) if heaps[side] and heaps[side][0][0] < best_distance]
+            if not live:
+                break
+            side = min(live, key=lambda s: heaps[s][0][0])
+            own, other = distances[side], distances[1 - side]
+
+            current_distance, current = heappop(heaps[side])
+            if current_distance > own[current]:
+                continue
+            if current in other and current_distance + other[current] < best_distance:
+                best_distance = current_distance + other[current]
+                meeting = current
+
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[k]
+                distance = current_distance + weights[k]
+                if distance < own.get(neighbor, INF):
+                    own[neighbor] = distance
+                    previous[side][neighbor] = current
+                    heappush(heaps[side], (distance, neighbor))
+
+        if meeting == -1:
+            return None, f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
+
+        # CH edges from start up to the meeting city, then down to end
+        up = []
+        city = meeting
+        while city != -1:
+            up.append(city)
+            city = previous[0][city]
+        up.reverse()
+        city = previous[1][meeting]
+        while city != -1:
+            up.append(city)
+            city = previous[1][city]
+
+        path = [start]
+        for a, b in zip(up, up[1:]):
+            path.extend(self._unpack(a, b)[1:])
+        return [self.names[k] for k in path], best_distance
+
+
+# --- PREPROCESSING ---
+
+def _witness_distances(adj, source, skip, limit):
+    """Dijkstra from source over the remaining graph, avoiding skip, bounded by limit."""
+    distances = {source: 0}
+    heap = [(0, source)]
+    settled = 0
+    while heap and settled < WITNESS_SETTLE_LIMIT:
+        current_distance, current = heappop(heap)
+        if current_distance > distances[current]:
+            continue
+        settled += 1
+        for neighbor, (weight, _) in adj[current].items():
+            if neighbor == skip:
+                continue
+            distance = current_distance + weight
+            if distance <= limit and distance < distances.get(neighbor, INF):
+                distances[neighbor] = distance
+                heappush(heap, (distance, neighbor))
+    return distances
+
+def _shortcuts_for(adj, v):
+    """Lists the (u, w, length) shortcuts contracting v would need."""
+    neighbors = [(u, weight) for u, (weight, _) in adj[v].items()]
+    shortcuts = []
+    for i, (u, weight_u) in enumerate(neighbors):
+        rest = neighbors[i + 1:]
+        if not rest:
+            continue
+        limit = weight_u + max(weight for _, weight in rest)
+        witness = _witness_distances(adj, u, v, limit)
+        for w, weight_w in rest:
+            via_v = weight_u + weight_w
+            if witness.get(w, INF) > via_v:
+                shortcuts.append((u, w, via_v))
+    return shortcuts
+
+def build_hierarchy(cgraph, checksum=None):
+    """
+    Contracts every city of a compact.CompactGraph, ordered by edge difference
+    (shortcuts added minus roads removed) plus the number of already-contracted
+    neighbours, with lazy priority updates. Returns a ContractionHierarchy.
+    """
+    n = len(cgraph)
+    # Remaining (not yet contracted) graph: neighbour -> (length, middle city or -1)
+    adj = [{} for _ in range(n)]
+    for u in range(n):
+        for v, weight in cgraph.neighbors(u):
+            if u != v and weight < adj[u].get(v, (INF, -1))[0]:
+                adj[u][v] = (weight, -1)
+
+    upward = [None] * n   # city -> its edges to cities contracted after it
+    deleted_neighbors = [0] * n
+    rank = array('i', bytes(4 * n))
+
+    def priority(v):
+        return len(_shortcuts_for(adj, v)) - len(adj[v]) + deleted_neighbors[v]
+
+    heap = [(priority(v), v) for v in range(n)]
+    heap.sort()
+    order = 0
+    while heap:
+        _, v = heappop(heap)
+        if upward[v] is not None:
+            continue
+        # Lazy update: re-evaluate and put back if v is no longer the cheapest
+        current = priority(v)
+        if heap and current > heap[0][0]:
+            heappush(heap, (current, v))
+            continue
+
+        for u, w, length in _shortcuts_for(adj, v):
+            if length < adj[u].get(w, (INF, -1))[0]:
+                adj[u][w] = (length, v)
+                adj[w][u] = (length, v)
+        # Every remaining neighbour is contracted later, so all of v's edges point up
+        upward[v] = adj[v]
+        adj[v] = {}
+        for u in upward[v]:
+            del adj[u][v]
+            deleted_neighbors[u] += 1
+        rank[v] = order
+        order += 1
+
+    offsets = array('i', [0])
+    targets = array('i')
+    weights = array('d')
+    middles = array('i')
+    for u in range(n):
+        for v, (weight, middle) in upward[u].items():
+            targets.append(v)
+            weights.append(weight)
+            middles.append(middle)
+        offsets.append(len(targets))
+    return ContractionHierarchy(list(cgraph.names), checksum or "", rank, offsets, targets, weights, middles)
+
+
+# --- STORAGE ---
+
+def write_hierarchy(path, ch):
+    """Writes the index atomically (temp file + rename)."""
+    names_block = "\n".join(ch.names).encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(ch.names), len(ch.targets), len(names_block), ch.checksum.encode("ascii")))
+        f.write(names_block.ljust(_pad8(len(names_block)), b"\0"))
+        for section in (ch.weights, ch.rank, ch.offsets, ch.targets, ch.middles):
+            f.write(section.tobytes())
+    os.replace(tmp_path, path)
+
+def load_hierarchy(path):
+    """Memory-maps an index file read-only. Returns a ContractionHierarchy, or None if the file is invalid."""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        return None
+    magic, n, m, names_len, checksum = HEADER.unpack_from(mapping, 0)
+    offset = HEADER.size + _pad8(names_len)
+    if magic != MAGIC or len(mapping) != offset + 8 * m + 4 * n + 4 * (n + 1) + 8 * m:
+        mapping.close()
+        return None
+
+    view = memoryview(mapping)
+    sections = []
+    for code, count, size in (("d", m, 8), ("i", n, 4), ("i", n + 1, 4), ("i", m, 4), ("i", m, 4)):
+        sections.append(view[offset:offset + count * size].cast(code))
+        offset += count * size
+    weights, rank, offsets, targets, middles = sections
+    names = mapping[HEADER.size:HEADER.size + names_len].decode("utf-8").split("\n") if n else []
+    return ContractionHierarchy(names, checksum.decode("ascii"), rank, offsets, targets, weights, middles, mapping)
+
+def build_index(path=None):
+    """Builds the CH index for the current road data and saves it. Returns the hierarchy."""
+    import G2
+    path = path or G2.CH_FILE
+    cgraph = G2.get_compact_graph()
+    if cgraph is None:
+        raise RuntimeError("Road network database not accessible or corrupt.")
+    ch = build_hierarchy(cgraph, G2.routes_checksum())
+    write_hierarchy(path, ch)
+    return ch
+
+
+# --- VERIFICATION ---
+
+def verify(ch, graph, pairs):
+    """
+    Cross-checks CH answers against G2.dijkstra() on the nested-dict graph: same
+    reachability, same distance, and a returned path made of real roads whose
+    lengths add up to that distance. Returns a list of failure descriptions.
+    """
+    import G2
+    failures = []
+    for a, b in pairs:
+        expected_path, expected = G2.dijkstra(graph, a, b)
+        path, distance = ch.query(a, b)
+        if (expected_path is None) != (path is None):
+            failures.append(f"{a} -> {b}: reachability differs")
+            continue
+        if path is None:
+            continue
+        if abs(distance - expected) > 1e-6:
+            failures.append(f"{a} -> {b}: distance {distance} != {expected}")
+            continue
+        if path[0] != a or path[-1] != b:
+            failures.append(f"{a} -> {b}: path endpoints {path[0]} .. {path[-1]}")
+            continue
+        try:
+            length = sum(graph[x][y] for x, y in zip(path, path[1:]))
+        except KeyError as e:
+            failures.append(f"{a} -> {b}: path uses a road that does not exist ({e})")
+            continue
+        if abs(length - expected) > 1e-6:
+            failures.append(f"{a} -> {b}: path length {length} != {expected}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or verify the contraction-hierarchies index")
+    parser.add_argument("--output", help="index file (default: G2.CH_FILE)")
+    parser.add_argument("--verify", type=int, metavar="N", help="after building, cross-check N random pairs against Dijkstra")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ch = build_index(args.output)
+    print(f"CH index for {len(ch)} cities ({len(ch.targets)} upward edges) written in {time.perf_counter() - started:.2f} s.")
+
+    if args.verify:
+        import G2
+        graph = G2.get_graph()
+        rng = random.Random(args.seed)
+        cities = sorted(graph)
+        pairs = [(rng.choice(cities), rng.choice(cities)) for _ in range(args.verify)]
+        failures = verify(ch, graph, pairs)
+        for failure in failures[:20]:
+            print("  FAIL", failure)
+        print(f"Verified {len(pairs)} pairs: {len(failures)} failures.")
+        raise SystemExit(1 if failures else 0)
@@ -0,0 +1,191 @@
+"""
+Road closures, avoid-lists and changed road lengths.
+
+    - RoadOverlay describes per-query changes (closed cities and roads, roads
+      with a different length) and overlay_dijkstra() searches the cached
+      nested-dict graph through it, so nothing is copied.
+    - graph_changes() and repair_tree() keep shortest-path trees valid when the
+      graph itself changes (a closure from G2.close_roads(), or edits replayed
+      from the database): only the part of a tree hanging off a lengthened or
+      removed road is searched again, and shortened or new roads are relaxed
+      outwards from their ends.
+"""
+from heapq import heappush, heappop
+
+INF = float('inf')
+
+
+def road_key(a, b):
+    """Order-independent key for the road between cities a and b."""
+    return (a, b) if a <= b else (b, a)
+
+
+class RoadOverlay:
+    """Per-query changes on top of a graph; cities and roads are given as graph city names."""
+
+    __slots__ = ("cities", "roads", "lengths")
+
+    def __init__(self, cities=(), roads=(), lengths=None):
+        self.cities = frozenset(cities)                                    # Closed cities
+        self.roads = frozenset(road_key(a, b) for a, b in roads)           # Closed roads
+        self.lengths = {road_key(a, b): km for (a, b), km in (lengths or {}).items()}  # Changed lengths
+
+    def __bool__(self):
+        return bool(self.cities or self.roads or self.lengths)
+
+
+def overlay_dijkstra(graph, start_city, end_city, overlay):
+    """
+    Heap Dijkstra over graph as changed by overlay, with early exit.
+    Returns: (path_list, distance), or (None, None) if overlay leaves no route.
+    """
+    if start_city in overlay.cities or end_city in overlay.cities:
+        return None, None
+    closed_cities, closed_roads, lengths = overlay.cities, overlay.roads, overlay.lengths
+    distances = {start_city: 0}
+    previous_cities = {start_city: None}
+    heap = [(0, start_city)]
+
+    while heap:
+        current_distance, current_city = heappop(heap)
+        if current_distance > distances[current_city]:
+            continue
+        if current_city == end_city:
+            path = []
+            city = end_city
+            while city is not None:
+                path.append(city)
+                city = previous_cities[city]
+            path.reverse()
+            return path, current_distance
+
+        for neighbor, weight in graph[current_city].items():
+            if neighbor in closed_cities:
+                continue
+            if closed_roads or lengths:
+                key = road_key(current_city, neighbor)
+                if key in closed_roads:
+                    continue
+                weight = lengths.get(key, weight)
+            distance = current_distance + weight
+            if distance < distances.get(neighbor, INF):
+                distances[neighbor] = distance
+                previous_cities[neighbor] = current_city
+                heappush(heap, (distance, neighbor))
+    return None, None
+
+
+# --- TREE REPAIR ---
+
+def graph_changes(old, new, limit):
+    """
+    Roads whose length differs between two nested-dict graphs, as
+    {road_key: (old_km or None, new_km or None)}; None where the road is missing.
+    Rows shared by both graphs (copy-on-write updates) are skipped unseen.
+    Returns None once more than limit roads differ.
+    """
+    changes = {}
+    for graph, other in ((new, old), (old, new)):
+        for city, row in graph.items():
+            other_row = other.get(city)
+            if other_row is row or other_row == row:
+                continue
+            other_row = other_row or {}
+            for neighbor in row.keys() | other_row.keys():
+                key = road_key(city, neighbor)
+                if key not in changes and row.get(neighbor) != other_row.get(neighbor):
+                    before, after = (other_row, row) if graph is new else (row, other_row)
+                    changes[key] = (before.get(neighbor), after.get(neighbor))
+                    if len(changes) > limit:
+                        return None
+    return changes
+
+def repair_tree(old_cgraph, new_cgraph, distances, previous, changes):
+    """
+    Turns a shortest-path tree (distances, previous) over old_cgraph into the
+    tree of the same source over new_cgraph, which differs by changes (see
+    graph_changes()). The old lists are left untouched.
+    Returns (distances, previous) lists, or None if the source itself is gone.
+    """
+    n = len(new_cgraph)
+    if old_cgraph.names == new_cgraph.names:
+        distances, previous = list(distances), list(previous)
+    else:
+        # City IDs moved: carry every entry over by name
+        to_new = [new_cgraph.ids.get(name, -1) for name in old_cgraph.names]
+        old_distances, old_previous = distances, previous
+        distances, previous = [INF] * n, [-1] * n
+        for i, j in enumerate(to_new):
+            if j != -1:
+                distances[j] = old_distances[i]
+                parent = old_previous[i]
+                previous[j] = to_new[parent] if parent != -1 else -1
+                if parent != -1 and previous[j] == -1:
+                    distances[j] = -INF  # Parent city removed: repaired below with the cut subtrees
+    sources = [i for i in range(n) if distances[i] == 0 and previous[i] == -1]
+    if not sources:
+        return None
+
+    ids = new_cgraph.ids
+    cut_roots = [i for i in range(n) if distances[i] == -INF]
+    improved = []
+    for (a, b), (before, after) in changes.items():
+        i, j = ids.get(a), ids.get(b)
+        if i is None or j is None:
+            continue
+        if after is None or (before is not None and after > before):
+            # Lengthened or removed: whatever hung off this road in the tree is cut loose
+            if previous[j] == i:
+                cut_roots.append(j)
+            elif previous[i] == j:
+                cut_roots.append(i)
+        else:
+            improved.append((i, j, after))
+
+    offsets, targets, weights = new_cgraph.offsets, new_cgraph.targets, new_cgraph.weights
+    heap = []
+    if cut_roots:
+        children = {}
+        for city in range(n):
+            if previous[city] != -1:
+                children.setdefault(previous[city], []).append(city)
+        cut = set()
+        stack = list(cut_roots)
+        while stack:
+            city = stack.pop()
+            if city not in cut:
+                cut.add(city)
+                stack.extend(children.get(city, ()))
+        for city in cut:
+            distances[city] = INF
+            previous[city] = -1
+        # Re-attach each cut city through its best neighbour outside the cut
+        for city in cut:
+            for k in range(offsets[city], offsets[city + 1]):
+                neighbor = targets[k]
+                if neighbor not in cut and distances[neighbor] + weights[k] < distances[city]:
+                    distances[city] = distances[neighbor] + weights[k]
+                    previous[city] = neighbor
+            if distances[city] < INF:
+                heappush(heap, (distances[city], city))
+
+    # Shortened or new roads can only pull cities closer
+    for i, j, km in improved:
+        for a, b in ((i, j), (j, i)):
+            if distances[a] + km < distances[b]:
+                distances[b] = distances[a] + km
+                previous[b] = a
+                heappush(heap, (distances[b], b))
+
+    while heap:
+        current_distance, current = heappop(heap)
+        if current_distance > distances[current]:
+            continue
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            distance = current_distance + weights[k]
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                heappush(heap, (distance, neighbor))
+    return distances, previous
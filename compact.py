@@ -0,0 +1,232 @@
+"""
+Compact array-backed road graph (CSR layout) with integer city IDs.
+
+City names are interned to IDs 0..n-1. The roads leaving city i are
+targets[offsets[i]:offsets[i + 1]], with lengths at the same positions in
+weights. Each undirected road is stored once in each direction, as in the
+nested-dict graph from G2.get_connections().
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+
+INF = float('inf')
+
+
+class CompactGraph:
+    """Read-only road graph held in three flat arrays plus the city name table."""
+
+    __slots__ = ("names", "ids", "offsets", "targets", "weights")
+
+    def __init__(self, names, offsets, targets, weights):
+        self.names = names                            # ID -> city name
+        self.ids = {name: i for i, name in enumerate(names)}  # city name -> ID
+        self.offsets = offsets                        # array('i'), len(names) + 1 entries
+        self.targets = targets                        # array('i'), neighbour IDs
+        self.weights = weights                        # array('d'), road lengths in km
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, city):
+        return city in self.ids
+
+    def neighbors(self, city_id):
+        """Yields (neighbour_id, distance) for every road leaving city_id."""
+        targets, weights = self.targets, self.weights
+        for k in range(self.offsets[city_id], self.offsets[city_id + 1]):
+            yield targets[k], weights[k]
+
+    def edge_count(self):
+        """Number of undirected roads."""
+        return len(self.targets) // 2
+
+
+def compact_from_edges(edges):
+    """
+    Builds a CompactGraph straight from (source, destination, distance) rows whose
+    names are already standardized, without going through a nested-dict graph.
+    A repeated pair keeps the last distance seen, as get_connections() does.
+    """
+    ids = {}
+    names = []
+    roads = {}
+    for src, dest, dist in edges:
+        for city in (src, dest):
+            if city not in ids:
+                ids[city] = len(names)
+                names.append(city)
+        a, b = ids[src], ids[dest]
+        roads[(a, b)] = dist
+        roads[(b, a)] = dist
+
+    # Counting sort of the directed roads by source ID
+    offsets = array('i', bytes(4 * (len(names) + 1)))
+    for a, _ in roads:
+        offsets[a + 1] += 1
+    for i in range(len(names)):
+        offsets[i + 1] += offsets[i]
+
+    targets = array('i', bytes(4 * len(roads)))
+    weights = array('d', bytes(8 * len(roads)))
+    fill = array('i', offsets[:-1])
+    for (a, b), dist in roads.items():
+        k = fill[a]
+        targets[k] = b
+        weights[k] = dist
+        fill[a] = k + 1
+    return CompactGraph(names, offsets, targets, weights)
+
+
+def build_compact_graph(graph):
+    """Converts a nested-dict graph (as from G2.get_connections()) into a CompactGraph."""
+    names = list(graph)
+    ids = {name: i for i, name in enumerate(names)}
+    offsets = array('i', [0])
+    targets = array('i')
+    weights = array('d')
+    for name in names:
+        for neighbor, dist in graph[name].items():
+            targets.append(ids[neighbor])
+            weights.append(dist)
+        offsets.append(len(targets))
+    return CompactGraph(names, offsets, targets, weights)
+
+
+def shortest_path_tree(cgraph, source, limit=INF):
+    """
+    Runs a full single-source Dijkstra from city ID source (no target, no early exit).
+    Cities further than limit are left unsettled.
+    Returns: (distances, previous) lists indexed by city ID; INF / -1 where unreachable.
+    """
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    distances = [INF] * len(cgraph)
+    previous = [-1] * len(cgraph)
+    distances[source] = 0
+    heap = [(0, source)]
+
+    while heap:
+        current_distance, current = heappop(heap)
+        if current_distance > distances[current]:
+            continue
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            distance = current_distance + weights[k]
+            if distance < distances[neighbor] and distance <= limit:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                heappush(heap, (distance, neighbor))
+    return distances, previous
+
+
+def tree_path(cgraph, previous, end):
+    """Walks a predecessor list from shortest_path_tree() back from city ID end. Returns city names."""
+    path = []
+    while end != -1:
+        path.append(cgraph.names[end])
+        end = previous[end]
+    path.reverse()
+    return path
+
+
+def bounded_search(cgraph, sources, limit=INF):
+    """
+    Multi-source Dijkstra from the city IDs in sources (all at distance 0) that
+    never goes past limit. Uses dicts, so the cost follows the explored region
+    rather than the size of the graph.
+    Returns (distances, previous, origin): dicts over every city within limit,
+    in the order they were settled; origin is the closest source of each city.
+    """
+    distances = {}   # Settled cities only
+    tentative = {source: 0 for source in sources}
+    previous = {source: -1 for source in sources}
+    origin = {source: source for source in sources}
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    heap = [(0, source) for source in tentative]
+
+    while heap:
+        current_distance, current = heappop(heap)
+        if current in distances:
+            continue
+        distances[current] = current_distance
+        root = origin[current]
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            distance = current_distance + weights[k]
+            if distance <= limit and distance < tentative.get(neighbor, INF):
+                tentative[neighbor] = distance
+                previous[neighbor] = current
+                origin[neighbor] = root
+                heappush(heap, (distance, neighbor))
+    # Every city pushed is within limit and so gets settled: all three dicts share their keys
+    return distances, previous, origin
+
+
+_worker_graph = None
+
+def _init_worker(cgraph):
+    global _worker_graph
+    _worker_graph = cgraph
+
+def _trees_for(sources):
+    """Computes shortest-path trees for a chunk of source IDs inside a worker process."""
+    out = []
+    for source in sources:
+        distances, previous = shortest_path_tree(_worker_graph, source)
+        out.append((source, array('d', distances), array('i', previous)))
+    return out
+
+def shortest_path_trees(cgraph, sources, workers=None):
+    """
+    Computes one full shortest-path tree per distinct source ID. With workers > 1
+    the sources are spread over a process pool, each worker receiving the graph
+    once. Returns {source_id: (distances, previous)}.
+    """
+    sources = list(dict.fromkeys(sources))
+    if not workers or workers <= 1 or len(sources) < 2:
+        return {source: shortest_path_tree(cgraph, source) for source in sources}
+
+    chunk = max(1, len(sources) // (workers * 4))
+    chunks = [sources[k:k + chunk] for k in range(0, len(sources), chunk)]
+    trees = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cgraph,)) as pool:
+        for rows in pool.map(_trees_for, chunks):
+            for source, distances, previous in rows:
+                trees[source] = (distances, previous)
+    return trees
+
+
+def dijkstra_compact(cgraph, start_city, end_city):
+    """
+    Heap Dijkstra over a CompactGraph with early exit at end_city.
+    Same contract as G2.dijkstra(): (path_list, distance) or (None, error_message).
+    """
+    if not len(cgraph):
+        return None, "Error: Could not load road network data."
+    start = cgraph.ids.get(start_city)
+    end = cgraph.ids.get(end_city)
+    if start is None or end is None:
+        return None, f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
+
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    distances = [INF] * len(cgraph)
+    previous = [-1] * len(cgraph)
+    distances[start] = 0
+    heap = [(0, start)]
+
+    while heap:
+        current_distance, current = heappop(heap)
+        if current_distance > distances[current]:
+            continue
+        if current == end:
+            return tree_path(cgraph, previous, end), current_distance
+
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            distance = current_distance + weights[k]
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                heappush(heap, (distance, neighbor))
+
+    return None, f"No route found between {start_city} and {end_city}. Check city spelling or database connections."
@@ -0,0 +1,110 @@
+"""
+Connectivity of the road network over a compact.CompactGraph.
+
+    - ComponentIndex labels every city with its connected component, so
+      "is there any route from a to b?" is two array lookups. G2 keeps one per
+      graph version and answers unreachable pairs from it without searching.
+    - cut_points() finds the articulation cities and bridge roads: the single
+      points whose closure would split a part of the network off (e.g. the
+      road joining the north-east to the rest at Kolkata). It is only computed
+      on request.
+"""
+from array import array
+
+
+class ComponentIndex:
+    """Connected-component label per city ID, plus the size of each component."""
+
+    __slots__ = ("component", "sizes")
+
+    def __init__(self, component, sizes):
+        self.component = component  # array('i'), city ID -> component number
+        self.sizes = sizes          # component number -> city count, largest first
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def connected(self, a, b):
+        """True if city IDs a and b are joined by some route."""
+        return self.component[a] == self.component[b]
+
+
+def build_components(cgraph):
+    """Labels the components of cgraph with an iterative graph walk, largest component first."""
+    n = len(cgraph)
+    offsets, targets = cgraph.offsets, cgraph.targets
+    label = array('i', [-1]) * n
+    sizes = []
+    for start in range(n):
+        if label[start] != -1:
+            continue
+        number = len(sizes)
+        label[start] = number
+        stack = [start]
+        size = 0
+        while stack:
+            city = stack.pop()
+            size += 1
+            for k in range(offsets[city], offsets[city + 1]):
+                neighbor = targets[k]
+                if label[neighbor] == -1:
+                    label[neighbor] = number
+                    stack.append(neighbor)
+        sizes.append(size)
+
+    # Renumber so component 0 is the largest
+    ranking = sorted(range(len(sizes)), key=lambda c: -sizes[c])
+    renumber = array('i', [0]) * len(sizes)
+    for new, old in enumerate(ranking):
+        renumber[old] = new
+    component = array('i', (renumber[c] for c in label))
+    return ComponentIndex(component, [sizes[c] for c in ranking])
+
+
+def cut_points(cgraph):
+    """
+    Articulation cities and bridge roads, from an iterative Tarjan lowlink walk.
+    Returns (articulation_ids, bridges): a set of city IDs and a list of
+    (low ID, high ID) road pairs.
+    """
+    n = len(cgraph)
+    offsets, targets = cgraph.offsets, cgraph.targets
+    order = [-1] * n     # Discovery time
+    low = [0] * n
+    articulation = set()
+    bridges = []
+    clock = 0
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = clock
+        clock += 1
+        root_children = 0
+        # (city, parent, next road index to look at)
+        stack = [(root, -1, offsets[root])]
+        while stack:
+            city, parent, k = stack[-1]
+            if k < offsets[city + 1]:
+                stack[-1] = (city, parent, k + 1)
+                neighbor = targets[k]
+                if order[neighbor] == -1:
+                    order[neighbor] = low[neighbor] = clock
+                    clock += 1
+                    stack.append((neighbor, city, offsets[neighbor]))
+                elif neighbor != parent:
+                    low[city] = min(low[city], order[neighbor])
+                continue
+
+            stack.pop()
+            if parent == -1:
+                continue
+            low[parent] = min(low[parent], low[city])
+            if low[city] > order[parent]:
+                bridges.append((min(parent, city), max(parent, city)))
+            if parent == root:
+                root_children += 1
+            elif low[city] >= order[parent]:
+                articulation.add(parent)
+        if root_children > 1:
+            articulation.add(root)
+    return articulation, bridges
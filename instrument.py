@@ -0,0 +1,179 @@
+"""
+Opt-in instrumentation for the routing code: counters, timers, structured
+logging and on-demand profiling.
+
+Everything is off by default. G2 checks the module-level `enabled` flag once
+per operation and only then records anything, so the disabled cost is one
+attribute lookup per query (searches keep their counts in local variables).
+
+Turn it on with enable(), or for a whole process with the environment variable
+NH_ROUTE_STATS=1 (NH_ROUTE_STATS=log also writes one JSON log line per query
+to the "nh_routes" logger, see LOGGER_NAME). Read the numbers with stats():
+
+    import G2, instrument
+    instrument.enable()
+    G2.find_route("Mumbai", "Delhi")
+    instrument.stats()   # {"counters": {...}, "timers": {"db.fetch": {...}, ...}}
+
+Profile one block on demand:
+
+    with instrument.capture("cprofile") as report:
+        G2.find_route("Mumbai", "Delhi")
+    print(report.text)
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+enabled = False
+log_queries = False
+LOGGER_NAME = "nh_routes"  # json and logging are only imported once query logging is on
+
+_lock = threading.Lock()
+_counters = {}  # name -> total
+_timers = {}    # name -> [calls, total seconds, max seconds]
+
+
+def enable(log=False):
+    """Starts recording. With log=True each query is also logged as one JSON line."""
+    global enabled, log_queries
+    enabled = True
+    log_queries = log
+
+def disable():
+    global enabled, log_queries
+    enabled = False
+    log_queries = False
+
+def reset():
+    """Clears all counters and timers."""
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+
+
+def count(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def add_time(name, seconds):
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add_time(self.name, time.perf_counter() - self.started)
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+_NO_TIMER = _NoTimer()
+
+def timed(name):
+    """Context manager adding the block's wall time to timer `name`; does nothing while disabled."""
+    return _Timer(name) if enabled else _NO_TIMER
+
+def record_search(settled, relaxed, pushes):
+    """
+    Adds one search's work: cities settled, roads relaxed and heap pushes
+    (see G2._record_search()).
+    """
+    with _lock:
+        for name, amount in (("search.count", 1), ("search.settled", settled),
+                             ("search.edges_relaxed", relaxed), ("search.heap_pushes", pushes)):
+            _counters[name] = _counters.get(name, 0) + amount
+
+def log_event(event, **fields):
+    """Writes one structured (JSON) log line when query logging is on."""
+    if log_queries:
+        import json
+        import logging
+        logging.getLogger(LOGGER_NAME).info(json.dumps(dict(fields, event=event), default=str))
+
+
+def stats():
+    """Snapshot of every counter and timer (timers in milliseconds)."""
+    with _lock:
+        return {
+            "enabled": enabled,
+            "counters": dict(_counters),
+            "timers": {
+                name: {"calls": calls, "total_ms": total * 1000, "mean_ms": total / calls * 1000, "max_ms": peak * 1000}
+                for name, (calls, total, peak) in _timers.items()
+            },
+        }
+
+
+class CaptureReport:
+    """Result of capture(): the formatted report, filled in when the block exits."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.text = ""
+
+@contextmanager
+def capture(kind="cprofile", limit=25):
+    """
+    Profiles the enclosed block. kind="cprofile" reports the top `limit` functions
+    by cumulative time; kind="tracemalloc" reports the top `limit` allocation
+    sites still held at the end of the block, plus the peak.
+    Yields a CaptureReport whose .text is set when the block ends.
+    """
+    report = CaptureReport(kind)
+    if kind == "cprofile":
+        import cProfile
+        import io
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            report.text = out.getvalue()
+    elif kind == "tracemalloc":
+        import tracemalloc
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        try:
+            yield report
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().compare_to(before, "lineno")[:limit]
+            if not already_tracing:
+                tracemalloc.stop()
+            report.text = f"peak traced memory: {peak / 2**20:.2f} MiB\n" + "\n".join(str(line) for line in top)
+    else:
+        raise ValueError(f"Unknown capture kind '{kind}', expected 'cprofile' or 'tracemalloc'.")
+
+
+if os.environ.get("NH_ROUTE_STATS"):
+    enable(log=os.environ["NH_ROUTE_STATS"].lower() == "log")
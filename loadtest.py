@@ -0,0 +1,103 @@
+"""
+Load test for the routing service in server.py.
+
+Start the server first, then run for example:
+    python loadtest.py --port 8080 --concurrency 32 --requests 5000
+    python loadtest.py --endpoint batch --batch-size 50 --requests 200
+
+Each of --concurrency clients keeps one keep-alive connection open and sends
+requests back to back with random city pairs from the shipped network.
+Prints throughput and client-side latency percentiles as JSON, plus the
+server's own /metrics.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode
+
+import G2
+from server import latency_summary
+
+
+async def _request(reader, writer, method, path, body=None):
+    """Sends one HTTP/1.1 request on an open connection. Returns (status, payload)."""
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+def _make_request(args, cities, rng):
+    if args.endpoint == "route":
+        a, b = rng.choice(cities), rng.choice(cities)
+        return "GET", "/route?" + urlencode({"source": a, "destination": b}), None
+    pairs = [[rng.choice(cities), rng.choice(cities)] for _ in range(args.batch_size)]
+    return "POST", "/batch", {"pairs": pairs}
+
+async def _client(args, cities, seed, counter, latencies, failures):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while counter[0] < args.requests:
+            counter[0] += 1
+            method, path, body = _make_request(args, cities, rng)
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, method, path, body)
+            latencies.append(time.perf_counter() - started)
+            if status >= 500:
+                failures.append(status)
+    finally:
+        writer.close()
+
+async def run(args):
+    graph = G2.get_graph()
+    if not graph:
+        raise SystemExit("Road network database not accessible; cannot pick test cities.")
+    cities = sorted(graph)
+
+    counter, latencies, failures = [0], [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(args, cities, args.seed + i, counter, latencies, failures)
+                           for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, server_metrics = await _request(reader, writer, "GET", "/metrics")
+    writer.close()
+
+    return {
+        "endpoint": args.endpoint,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "server_errors": len(failures),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+        "server_metrics": server_metrics,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test the routing service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--endpoint", choices=("route", "batch"), default="route")
+    parser.add_argument("--batch-size", type=int, default=20, help="pairs per /batch request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
@@ -0,0 +1,181 @@
+"""
+Fast city-name resolution: aliases, prefix completion and fuzzy suggestions.
+
+CityNameIndex is built once per road graph (see G2.get_name_index()). Lookups
+never scan every city:
+    - exact names and known aliases ("Bangalore", "Vizag") are one dict lookup,
+    - prefix completion is a binary search over the sorted name keys,
+    - misspellings are narrowed down by shared character n-grams, and only
+      those candidates are ranked by edit distance.
+"""
+import re
+from bisect import bisect_left
+from heapq import nlargest
+
+# Common alternative, historical and colloquial names -> name used in the network
+ALIASES = {
+    "Bangalore": "Bengaluru",
+    "Bombay": "Mumbai",
+    "Calcutta": "Kolkata",
+    "Madras": "Chennai",
+    "Vizag": "Visakhapatnam",
+    "Vishakhapatnam": "Visakhapatnam",
+    "Trivandrum": "Thiruvananthapuram",
+    "Cochin": "Kochi",
+    "Ernakulam": "Kochi",
+    "Mysore": "Mysuru",
+    "Mangaluru": "Mangalore",
+    "Belagavi": "Belgaum",
+    "Hubli": "Hubballi",
+    "Trichy": "Tiruchirappalli",
+    "Tiruchi": "Tiruchirappalli",
+    "Pondicherry": "Puducherry",
+    "Pondy": "Puducherry",
+    "Prayagraj": "Allahabad",
+    "Baroda": "Vadodara",
+    "Calicut": "Kozhikode",
+    "Benares": "Varanasi",
+    "Banaras": "Varanasi",
+    "Kashi": "Varanasi",
+    "Poona": "Pune",
+    "Simla": "Shimla",
+    "Cawnpore": "Kanpur",
+    "Gauhati": "Guwahati",
+    "Ahmadabad": "Ahmedabad",
+    "Amdavad": "Ahmedabad",
+    "New Delhi": "Delhi",
+    "Jamnagar City": "Jamnagar",
+    "Somnath": "Veraval",
+    "Nasik": "Nashik",
+    "Gandhi Nagar": "Gandhinagar",
+}
+
+SUGGESTION_COUNT = 5
+NGRAM = 2            # Letters per n-gram; pairs still match short names like "Pnue"
+MAX_CANDIDATES = 50  # N-gram candidates that get a full edit-distance check
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def name_key(text):
+    """Lookup key for a city name: case, spacing and punctuation insensitive."""
+    return _NON_ALNUM.sub("", text.casefold())
+
+def _ngrams(key):
+    padded = f"^{key}$"
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+def edit_distance(a, b, limit=None):
+    """
+    Edit distance counting insertions, deletions, substitutions and swaps of two
+    adjacent letters ("Delih") as one edit each. Gives up with limit + 1 as soon
+    as the result must exceed limit.
+    """
+    if a == b:
+        return 0
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class CityNameIndex:
+    """Prebuilt lookup structures over the city names of one road graph."""
+
+    def __init__(self, names, aliases=None):
+        self.names = sorted(names)
+        self.by_key = {}   # exact and alias keys -> canonical name
+        for name in self.names:
+            self.by_key[name_key(name)] = name
+        for alias, name in (ALIASES if aliases is None else aliases).items():
+            if name in names and name_key(alias) not in self.by_key:
+                self.by_key[name_key(alias)] = name
+
+        # Sorted (key, canonical name) pairs for prefix search, aliases included
+        self._prefix_keys = sorted(self.by_key.items())
+        self._prefix_only = [key for key, _ in self._prefix_keys]
+
+        self._grams = {}   # n-gram -> keys containing it
+        for key in self.by_key:
+            for gram in _ngrams(key):
+                self._grams.setdefault(gram, []).append(key)
+
+    def __len__(self):
+        return len(self.names)
+
+    def exact(self, text):
+        """Canonical name for an exact (case/spacing-insensitive) name or alias, else None."""
+        return self.by_key.get(name_key(text))
+
+    def complete(self, prefix, k=SUGGESTION_COUNT):
+        """Up to k canonical names whose name or alias starts with prefix, shortest first."""
+        key = name_key(prefix)
+        if not key:
+            return []
+        matches = []
+        seen = set()
+        for i in range(bisect_left(self._prefix_only, key), len(self._prefix_keys)):
+            candidate, name = self._prefix_keys[i]
+            if not candidate.startswith(key):
+                break
+            if name not in seen:
+                seen.add(name)
+                matches.append(name)
+        matches.sort(key=lambda name: (len(name), name))
+        return matches[:k]
+
+    def fuzzy(self, text, k=SUGGESTION_COUNT, max_distance=None):
+        """
+        Up to k (name, distance) pairs closest to text by edit distance, among the
+        keys sharing the most n-grams with it. max_distance defaults to a third
+        of the query length (at least 2).
+        """
+        key = name_key(text)
+        if not key:
+            return []
+        if max_distance is None:
+            max_distance = max(2, len(key) // 3)
+
+        grams = _ngrams(key)
+        shared = {}
+        for gram in grams:
+            for candidate in self._grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        # One edit (or swap) changes at most NGRAM + 1 n-grams, so anything sharing fewer is too far away
+        needed = len(grams) - (NGRAM + 1) * max_distance
+        candidates = nlargest(MAX_CANDIDATES, (c for c, count in shared.items() if count >= needed), key=shared.get)
+
+        best = {}
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                name = self.by_key[candidate]
+                best[name] = min(distance, best.get(name, distance))
+        return sorted(best.items(), key=lambda item: (item[1], item[0]))[:k]
+
+    def resolve(self, text):
+        """
+        Canonical name for text: exact name or alias only, else None. A close
+        misspelling is never taken as the city (a town missing from the network
+        would silently become a different one); suggest() offers it instead.
+        """
+        return self.exact(text)
+
+    def suggest(self, text, k=SUGGESTION_COUNT):
+        """Top-k suggestions for a partly typed or misspelled name: completions first, then fuzzy matches."""
+        suggestions = self.complete(text, k)
+        if len(suggestions) < k:
+            for name, _ in self.fuzzy(text, k):
+                if name not in suggestions:
+                    suggestions.append(name)
+        return suggestions[:k]
@@ -0,0 +1,91 @@
+"""
+Departure and arrival plans for many routes over a range of dates, behind
+G2.schedule_departures().
+
+Driving only happens inside the daily daylight window [day_start, day_end)
+hours. A drive that fits in one window leaves so that it arrives exactly at
+day_end, as G2.get_departure_time() suggests. A longer one leaves at
+day_start and drives whole windows with an overnight stop after each. It
+arrives on the last day, once the rest of the drive is done.
+
+    - plan_offsets() does the arithmetic for every route in one pass over
+      plain arrays. Its results are hours from midnight of the departure date,
+      so they are the same for every date.
+    - expand() turns those offsets into records for each date. The
+      timedeltas are built once per route and one midnight once per date, so
+      the inner loop only adds datetimes.
+    - driving_days() splits a single plan into its daily stretches for display.
+"""
+import math
+from array import array
+from datetime import datetime, time, timedelta
+
+INF = float('inf')
+
+
+def plan_offsets(hours, day_start, day_end):
+    """
+    Departure and arrival times for driving times in hours, as offsets in hours
+    from midnight of the departure date.
+    Returns (depart, arrive, overnight_stops) arrays. Routes that cannot be
+    driven (infinite or negative hours) get overnight_stops == -1.
+    """
+    window = day_end - day_start
+    n = len(hours)
+    depart = array('d', bytes(8 * n))
+    arrive = array('d', bytes(8 * n))
+    overnight = array('i', bytes(4 * n))
+    for i, h in enumerate(hours):
+        if not 0 <= h < INF:
+            overnight[i] = -1
+        elif h <= window:
+            depart[i] = day_end - h
+            arrive[i] = day_end
+        else:
+            nights = math.ceil(h / window) - 1
+            depart[i] = day_start
+            arrive[i] = nights * 24 + day_start + (h - nights * window)
+            overnight[i] = nights
+    return depart, arrive, overnight
+
+def expand(hours, offsets, dates, not_before=None):
+    """
+    Records for every route on every date, as
+    (route index, departure datetime, arrival datetime, driving hours, overnight stops),
+    date by date. Routes that cannot be driven and departures before not_before
+    are left out.
+    """
+    depart, arrive, overnight = offsets
+    drivable = [i for i in range(len(hours)) if overnight[i] >= 0]
+    depart_delta = {i: timedelta(hours=depart[i]) for i in drivable}
+    arrive_delta = {i: timedelta(hours=arrive[i]) for i in drivable}
+    records = []
+    for date in dates:
+        midnight = datetime.combine(date, time())
+        for i in drivable:
+            departure = midnight + depart_delta[i]
+            if not_before is not None and departure < not_before:
+                continue
+            records.append((i, departure, midnight + arrive_delta[i], hours[i], overnight[i]))
+    return records
+
+def date_range(start_date, end_date):
+    """Dates from start_date to end_date, both included."""
+    return [start_date + timedelta(days=k) for k in range((end_date - start_date).days + 1)]
+
+def driving_days(departure, hours, day_start, day_end):
+    """
+    The daily (start, end) datetime stretches of one drive of hours leaving at
+    departure, split at day_end and resumed at day_start the next morning.
+    """
+    stretches = []
+    start = departure
+    left = hours
+    while True:
+        end_of_day = datetime.combine(start.date(), time()) + timedelta(hours=day_end)
+        today = max(0.0, min(left, (end_of_day - start) / timedelta(hours=1)))
+        stretches.append((start, start + timedelta(hours=today)))
+        left -= today
+        if left <= 1e-9:
+            return stretches
+        start = datetime.combine(start.date() + timedelta(days=1), time()) + timedelta(hours=day_start)
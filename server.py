@@ -0,0 +1,297 @@
+"""
+Headless HTTP/JSON routing service.
+
+Run it with:
+    python server.py [--host 127.0.0.1] [--port 8080] [--workers N] [--threads]
+
+Endpoints (all responses are JSON):
+    GET  /route?source=Mumbai&destination=Delhi
+    POST /route     {"source": "Mumbai", "destination": "Delhi"}
+    POST /batch     {"pairs": [["Mumbai", "Delhi"], ["Pune", "Goa"]]}
+    POST /matrix    {"sources": ["Mumbai"], "targets": ["Delhi", "Goa"]}
+    GET  /metrics   request counts and latency percentiles per endpoint
+    GET  /health    graph version and size as seen by one pool worker
+
+The asyncio event loop only parses requests and writes responses. Every search
+runs in a worker pool (processes by default, threads with --threads) whose
+workers load the road graph once at start-up and keep it resident.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import G2
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+LATENCY_WINDOW = 10_000  # Latest requests kept per endpoint for percentiles
+
+
+# --- WORKER SIDE ---
+
+def _warm_worker():
+    """Pool initializer: loads the graph and everything derived from it before the first request."""
+    G2.prewarm()
+
+def _health_job():
+    """Graph state of the worker that runs it; get_graph() also picks up database changes."""
+    graph = G2.get_graph()
+    return {"worker": os.getpid(), "graph_version": G2.graph_version(),
+            "cities": len(graph) if graph is not None else 0}
+
+def _route_job(source, destination):
+    return G2.find_route(source, destination)
+
+def _batch_job(pairs):
+    return G2.find_routes_batch(pairs)
+
+def _matrix_job(sources, targets):
+    return G2.distance_matrix(sources, targets)
+
+
+# --- METRICS ---
+
+def latency_summary(samples):
+    """Returns count, mean and p50/p95/p99/max in milliseconds for a list of durations in seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+class Metrics:
+    """Request counters and a sliding window of latencies per endpoint."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = {}
+        self.errors = {}
+        self.latencies = {}
+        self.in_flight = 0
+
+    def record(self, endpoint, seconds, ok):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def snapshot(self):
+        return {
+            "uptime_s": time.time() - self.started,
+            "in_flight": self.in_flight,
+            "endpoints": {
+                endpoint: dict(latency_summary(list(window)),
+                               requests=self.requests.get(endpoint, 0),
+                               errors=self.errors.get(endpoint, 0))
+                for endpoint, window in self.latencies.items()
+            },
+        }
+
+
+# --- HTTP ---
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+ENDPOINTS = ("/route", "/batch", "/matrix", "/metrics", "/health")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+def route_to_json(result):
+    """Turns a find_route()-shaped tuple into a JSON-ready dict."""
+    if result[0] is None:
+        return {"error": result[1]}
+    path, distance, departure_time, total_time_hours = result
+    return {"path": path, "distance_km": distance, "departure_time": departure_time,
+            "total_time_hours": total_time_hours}
+
+def _error_status(message):
+    # G2 prefixes infrastructure failures with "Error:"; everything else is a routing miss
+    return 503 if message.startswith("Error:") else 404
+
+class RouteServer:
+    def __init__(self, pool):
+        self.pool = pool
+        self.metrics = Metrics()
+
+    async def run_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    async def dispatch(self, method, target, body):
+        """Returns (status, payload, endpoint) for one request."""
+        url = urlsplit(target)
+        endpoint = url.path.rstrip("/") or "/"
+
+        if endpoint == "/health":
+            # Asked of a pool worker: the event-loop process never loads the graph
+            worker = await self.run_job(_health_job)
+            status = "ok" if worker["cities"] else "unavailable"
+            return (200 if worker["cities"] else 503), {"status": status, **worker}, endpoint
+        if endpoint == "/metrics":
+            return 200, self.metrics.snapshot(), endpoint
+
+        if endpoint == "/route":
+            if method == "GET":
+                query = parse_qs(url.query)
+                params = {key: values[0] for key, values in query.items()}
+            elif method == "POST":
+                params = _json_body(body)
+            else:
+                raise HTTPError(405, "Use GET or POST.")
+            source, destination = params.get("source"), params.get("destination")
+            if not isinstance(source, str) or not isinstance(destination, str) or not source.strip() or not destination.strip():
+                raise HTTPError(400, "Both 'source' and 'destination' are required.")
+            result = await self.run_job(_route_job, source, destination)
+            payload = route_to_json(result)
+            return (200 if "error" not in payload else _error_status(payload["error"])), payload, endpoint
+
+        if endpoint == "/batch":
+            if method != "POST":
+                raise HTTPError(405, "Use POST.")
+            pairs = _json_body(body).get("pairs")
+            if not isinstance(pairs, list) or not all(
+                    isinstance(pair, list) and len(pair) == 2 and all(isinstance(c, str) for c in pair) for pair in pairs):
+                raise HTTPError(400, "'pairs' must be a list of [source, destination] string pairs.")
+            results = await self.run_job(_batch_job, [tuple(pair) for pair in pairs])
+            return 200, {"results": [route_to_json(r) for r in results]}, endpoint
+
+        if endpoint == "/matrix":
+            if method != "POST":
+                raise HTTPError(405, "Use POST.")
+            params = _json_body(body)
+            sources, targets = params.get("sources"), params.get("targets")
+            if not all(isinstance(v, list) and all(isinstance(c, str) for c in v) for v in (sources, targets)):
+                raise HTTPError(400, "'sources' and 'targets' must be lists of city names.")
+            rows = await self.run_job(_matrix_job, sources, targets)
+            return 200, {"sources": sources, "targets": targets,
+                         "rows": [[route_to_json(r) for r in row] for row in rows]}, endpoint
+
+        raise HTTPError(404, f"Unknown endpoint {endpoint}.")
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    request_line = None  # Longer than the stream limit; answered with a 400
+                if request_line == b"":
+                    break
+                started = time.perf_counter()
+                keep_alive, status, payload, endpoint = await self.handle_request(request_line, reader)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                self.metrics.record(endpoint, time.perf_counter() - started, status < 400)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, request_line, reader):
+        """Reads headers and body of one request. Returns (keep_alive, status, payload, endpoint)."""
+        if request_line is None:
+            return False, 400, {"error": "Request line too long."}, "invalid"
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                return False, 400, {"error": "Header line too long."}, "invalid"
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            return False, 400, {"error": "Malformed request line."}, "invalid"
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            return False, 400, {"error": "Invalid Content-Length."}, "invalid"
+        if length > MAX_BODY_BYTES:
+            return False, 413, {"error": "Request body too large."}, "invalid"
+        body = await reader.readexactly(length) if length else b""
+
+        self.metrics.in_flight += 1
+        try:
+            status, payload, endpoint = await self.dispatch(method.upper(), target, body)
+        except HTTPError as e:
+            status, payload, endpoint = e.status, {"error": str(e)}, urlsplit(target).path.rstrip("/")
+        except Exception as e:
+            status, payload, endpoint = 500, {"error": f"Unexpected server error: {e}"}, urlsplit(target).path.rstrip("/")
+        finally:
+            self.metrics.in_flight -= 1
+        # Keep the metrics keyed by a fixed set of names, whatever paths clients send
+        return keep_alive, status, payload, endpoint if endpoint in ENDPOINTS else "other"
+
+def _json_body(body):
+    try:
+        params = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON.")
+    if not isinstance(params, dict):
+        raise HTTPError(400, "Request body must be a JSON object.")
+    return params
+
+
+async def serve(host, port, pool, workers):
+    server = RouteServer(pool)
+    # Workers load the graph in the pool initializer (or before the thread pool is made);
+    # the no-op jobs only start every worker process before the first request comes in
+    await asyncio.gather(*(server.run_job(_health_job) for _ in range(workers)))
+    listener = await asyncio.start_server(server.handle_connection, host, port, limit=MAX_BODY_BYTES)
+    print(f"Route service listening on http://{host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="HTTP/JSON routing service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", action="store_true", help="use a thread pool instead of worker processes")
+    args = parser.parse_args()
+
+    if args.threads:
+        _warm_worker()
+        pool = ThreadPoolExecutor(max_workers=args.workers)
+    else:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_warm_worker)
+    try:
+        asyncio.run(serve(args.host, args.port, pool, args.workers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,197 @@
+"""
+Binary snapshot of the road network, so processes start without reading and
+normalizing every row of the database.
+
+Export it with:
+    python snapshot.py [--output nh_routes.snap]
+    python snapshot.py --verify        # re-checks the file against its checksum and the database
+
+The file holds the interned city names and the compact (CSR) adjacency arrays
+of compact.CompactGraph. G2.get_graph() memory-maps it read-only, so worker
+processes share its pages instead of each holding a private copy, and only
+builds the neighbour dict of a city when a search first reaches it.
+
+Freshness: the header stores the routes checksum (G2.routes_checksum()) and
+the road_changes position the data was read at, and export records the same
+pair in the database's snapshots table (see G1.record_snapshot). G2 uses a
+snapshot only when the database vouches for that pair, then replays the road
+changes made since on top of it.
+
+File layout (little-endian, 8-byte aligned sections):
+    header   MAGIC, city count (uint32), directed road count (uint32),
+             names block length (uint32), change_seq (int64), checksum (40 ASCII hex)
+    names    newline-separated UTF-8 city names, zero padded
+    offsets  (n + 1) int32, zero padded
+    targets  m int32, zero padded
+    weights  m float64
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+
+from compact import CompactGraph
+
+MAGIC = b"NHSNAP01"
+HEADER = struct.Struct("<8sIIIq40s")
+
+
+def _pad8(size):
+    return (size + 7) & ~7
+
+
+class MappedCompactGraph(CompactGraph):
+    """CompactGraph whose arrays are views into a memory-mapped snapshot."""
+
+    __slots__ = ("_mapping",)
+
+    def __init__(self, names, offsets, targets, weights, mapping):
+        super().__init__(names, offsets, targets, weights)
+        self._mapping = mapping  # keeps the mmap alive
+
+    def __reduce__(self):
+        # Memory views cannot be pickled; worker pools get plain array copies
+        return (CompactGraph, (self.names, array('i', self.offsets), array('i', self.targets), array('d', self.weights)))
+
+
+class SnapshotGraph(Mapping):
+    """
+    Read-only nested-dict view (city -> {neighbour: km}) over a snapshot, usable
+    wherever G2 expects its graph. A city's neighbour dict is built the first
+    time it is looked up and then kept.
+    """
+
+    def __init__(self, compact, checksum, change_seq):
+        self.compact = compact        # MappedCompactGraph; G2.get_compact_graph() returns it as is
+        self.checksum = checksum      # routes checksum of the data the snapshot was taken from
+        self.change_seq = change_seq  # road_changes position the data was read at
+        self._rows = {}
+
+    def __getitem__(self, city):
+        row = self._rows.get(city)
+        if row is None:
+            cgraph = self.compact
+            i = cgraph.ids[city]
+            names, targets, weights = cgraph.names, cgraph.targets, cgraph.weights
+            row = {names[targets[k]]: weights[k] for k in range(cgraph.offsets[i], cgraph.offsets[i + 1])}
+            self._rows[city] = row
+        return row
+
+    def __contains__(self, city):
+        return city in self.compact.ids
+
+    def __iter__(self):
+        return iter(self.compact.names)
+
+    def __len__(self):
+        return len(self.compact.names)
+
+
+# --- EXPORT ---
+
+def write_snapshot(path, cgraph, checksum, change_seq):
+    """Writes cgraph atomically (temp file + rename) so readers never see a partial file."""
+    names_block = "\n".join(cgraph.names).encode("utf-8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        header = HEADER.pack(MAGIC, len(cgraph), len(cgraph.targets), len(names_block),
+                             change_seq, checksum.encode("ascii"))
+        f.write(header.ljust(_pad8(HEADER.size), b"\0"))
+        f.write(names_block.ljust(_pad8(len(names_block)), b"\0"))
+        for section in (array('i', cgraph.offsets), array('i', cgraph.targets)):
+            data = section.tobytes()
+            f.write(data.ljust(_pad8(len(data)), b"\0"))
+        f.write(array('d', cgraph.weights).tobytes())
+    os.replace(tmp_path, path)
+
+def export_snapshot(path=None):
+    """
+    Reads the road network from the database, writes the snapshot and records
+    it in the database. Returns (city count, checksum, change_seq).
+    """
+    import G1
+    import G2
+    from compact import build_compact_graph
+    path = path or G2.SNAPSHOT_FILE
+    graph, change_seq = G2._load_network()
+    if graph is None:
+        raise RuntimeError("Road network database not accessible or corrupt.")
+    if change_seq is None:
+        raise RuntimeError("Database has no road change log; run G1.py to migrate it first.")
+    checksum = G2.routes_checksum(graph)
+    write_snapshot(path, build_compact_graph(graph), checksum, change_seq)
+    G1.record_snapshot(checksum, change_seq, G2.DB_NAME)
+    return len(graph), checksum, change_seq
+
+
+# --- LOAD ---
+
+def load_snapshot(path):
+    """Memory-maps a snapshot file read-only. Returns a SnapshotGraph, or None if the file is invalid."""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        return None
+    magic, n, m, names_len, change_seq, checksum = HEADER.unpack_from(mapping, 0)
+    names_offset = _pad8(HEADER.size)
+    offsets_offset = names_offset + _pad8(names_len)
+    targets_offset = offsets_offset + _pad8(4 * (n + 1))
+    weights_offset = targets_offset + _pad8(4 * m)
+    if magic != MAGIC or len(mapping) != weights_offset + 8 * m:
+        mapping.close()
+        return None
+
+    block = mapping[names_offset:names_offset + names_len].decode("utf-8")
+    names = [sys.intern(name) for name in block.split("\n")] if n else []
+    view = memoryview(mapping)
+    cgraph = MappedCompactGraph(
+        names,
+        view[offsets_offset:offsets_offset + 4 * (n + 1)].cast("i"),
+        view[targets_offset:targets_offset + 4 * m].cast("i"),
+        view[weights_offset:weights_offset + 8 * m].cast("d"),
+        mapping,
+    )
+    return SnapshotGraph(cgraph, checksum.decode("ascii"), change_seq)
+
+
+def verify(path=None):
+    """
+    Checks a snapshot file: its contents must hash to the checksum in its header,
+    and the database must have recorded that checksum at the same change position.
+    Returns (ok, message).
+    """
+    import G2
+    snapshot = load_snapshot(path or G2.SNAPSHOT_FILE)
+    if snapshot is None:
+        return False, "Snapshot missing or not a valid snapshot file."
+    if G2.routes_checksum(dict(snapshot)) != snapshot.checksum:
+        return False, "Snapshot contents do not match its checksum (corrupt file)."
+    if G2.recorded_snapshot_seq(snapshot.checksum) != snapshot.change_seq:
+        return False, "Database has no record of this snapshot; export it again."
+    return True, f"Snapshot OK: {len(snapshot)} cities at change {snapshot.change_seq}."
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the road network as a memory-mappable snapshot")
+    parser.add_argument("--output", help="snapshot file (default: G2.SNAPSHOT_FILE)")
+    parser.add_argument("--verify", action="store_true", help="check an existing snapshot instead of exporting")
+    args = parser.parse_args()
+
+    if args.verify:
+        ok, message = verify(args.output)
+        print(message)
+        raise SystemExit(0 if ok else 1)
+
+    started = time.perf_counter()
+    count, checksum, change_seq = export_snapshot(args.output)
+    print(f"Snapshot of {count} cities (checksum {checksum[:12]}, change {change_seq}) "
+          f"written in {time.perf_counter() - started:.2f} s.")
@@ -0,0 +1,131 @@
+"""
+Contraction hierarchies (ch.py) against plain G2.dijkstra(): distances,
+reachability and unpacked paths on the shipped network and on small edge-case
+graphs.
+"""
+import os
+import random
+from array import array
+
+import pytest
+
+import G2
+from ch import build_hierarchy, load_hierarchy, verify, write_hierarchy
+from compact import CompactGraph, build_compact_graph
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nh_routes.db")
+
+
+def compact_from_pairs(names, roads):
+    """CompactGraph over (a, b, km) roads, repeated pairs kept as parallel roads."""
+    rows = [[] for _ in names]
+    for a, b, km in roads:
+        rows[a].append((b, km))
+        rows[b].append((a, km))
+    offsets, targets, weights = array('i', [0]), array('i'), array('d')
+    for row in rows:
+        for b, km in row:
+            targets.append(b)
+            weights.append(km)
+        offsets.append(len(targets))
+    return CompactGraph(list(names), offsets, targets, weights)
+
+def nested_graph(cgraph):
+    """Nested-dict graph of cgraph, keeping the shortest of parallel roads."""
+    graph = {name: {} for name in cgraph.names}
+    for i, name in enumerate(cgraph.names):
+        for j, km in cgraph.neighbors(i):
+            other = cgraph.names[j]
+            if other != name and km < graph[name].get(other, float('inf')):
+                graph[name][other] = km
+    return graph
+
+def all_pairs(names):
+    return [(a, b) for a in names for b in names]
+
+def assert_unpacks_to_roads(ch, graph):
+    """Every upward CH edge unpacks into consecutive real roads adding up to its length."""
+    for a in range(len(ch)):
+        for k in range(ch.offsets[a], ch.offsets[a + 1]):
+            b = ch.targets[k]
+            path = [ch.names[i] for i in ch._unpack(a, b)]
+            assert path[0] == ch.names[a] and path[-1] == ch.names[b]
+            assert len(set(path)) == len(path)
+            length = sum(graph[x][y] for x, y in zip(path, path[1:]))
+            assert length == pytest.approx(ch.weights[k])
+            if ch.middles[k] == -1:
+                assert len(path) == 2
+
+
+@pytest.fixture(scope="module")
+def shipped():
+    db_name, G2.DB_NAME = G2.DB_NAME, DB_PATH
+    try:
+        graph, _ = G2._load_network()
+    finally:
+        G2.DB_NAME = db_name
+    if not graph:
+        pytest.skip("shipped database not readable")
+    return graph, build_hierarchy(build_compact_graph(graph))
+
+
+def test_shipped_network_matches_dijkstra(shipped):
+    graph, ch = shipped
+    assert verify(ch, graph, all_pairs(sorted(graph))) == []
+
+def test_shipped_network_unpacks_to_real_roads(shipped):
+    graph, ch = shipped
+    assert_unpacks_to_roads(ch, graph)
+
+def test_saved_index_answers_like_the_built_one(shipped, tmp_path):
+    graph, ch = shipped
+    path = str(tmp_path / "test.ch")
+    write_hierarchy(path, ch)
+    loaded = load_hierarchy(path)
+    pairs = random.Random(1).sample(all_pairs(sorted(graph)), 300)
+    assert [loaded.query(a, b) for a, b in pairs] == [ch.query(a, b) for a, b in pairs]
+
+def test_single_city():
+    cgraph = compact_from_pairs(["A"], [])
+    ch = build_hierarchy(cgraph)
+    assert ch.query("A", "A") == (["A"], 0)
+    assert ch.query("A", "B")[0] is None
+
+def test_disconnected_parts():
+    names = ["A", "B", "C", "D", "E"]
+    cgraph = compact_from_pairs(names, [(0, 1, 5), (1, 2, 7), (3, 4, 2)])
+    ch = build_hierarchy(cgraph)
+    graph = nested_graph(cgraph)
+    assert verify(ch, graph, all_pairs(names)) == []
+    assert ch.query("A", "E")[0] is None
+    assert ch.query("D", "E") == (["D", "E"], 2)
+
+def test_parallel_roads_use_the_shortest():
+    names = ["A", "B", "C"]
+    cgraph = compact_from_pairs(names, [(0, 1, 9), (0, 1, 4), (1, 2, 3), (1, 2, 8), (0, 2, 20)])
+    ch = build_hierarchy(cgraph)
+    graph = nested_graph(cgraph)
+    assert verify(ch, graph, all_pairs(names)) == []
+    assert ch.query("A", "C") == (["A", "B", "C"], 7)
+    assert_unpacks_to_roads(ch, graph)
+
+def test_zero_length_roads():
+    names = ["A", "B", "C", "D"]
+    cgraph = compact_from_pairs(names, [(0, 1, 0), (1, 2, 0), (2, 3, 5), (0, 3, 6)])
+    ch = build_hierarchy(cgraph)
+    graph = nested_graph(cgraph)
+    assert verify(ch, graph, all_pairs(names)) == []
+    assert ch.query("A", "D")[1] == 5
+    assert_unpacks_to_roads(ch, graph)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_graphs_match_dijkstra(seed):
+    rng = random.Random(seed)
+    n = 40
+    names = [f"City {i}" for i in range(n)]
+    roads = [(rng.randrange(n), rng.randrange(n), rng.choice([0, rng.randint(1, 100)])) for _ in range(90)]
+    cgraph = compact_from_pairs(names, [(a, b, km) for a, b, km in roads if a != b])
+    ch = build_hierarchy(cgraph)
+    graph = nested_graph(cgraph)
+    assert verify(ch, graph, all_pairs(names)) == []
+    assert_unpacks_to_roads(ch, graph)
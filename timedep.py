@@ -0,0 +1,166 @@
+"""
+Time-dependent travel times: per-road speeds by road class and hour of day,
+and an earliest-arrival search over a compact.CompactGraph.
+
+Speeds are looked up from a SpeedTable: one small class code per directed road
+(parallel to CompactGraph.targets) and one flat table of hours-per-km for every
+(class, hour) bucket, so the search does an array index and a multiply per road
+instead of any dict lookups. Speeds only change at a few hours of the day, so
+a road that ends before the next change, or the one after it, is worked out
+inline. Longer ones are looked up in the km their class covers from midnight
+to every bucket boundary, however many buckets they span.
+
+A road is driven at the speed of the bucket the car is in, and a road crossing
+a bucket boundary continues at the next bucket's speed. Under that model
+leaving later never gets you there earlier, so Dijkstra on arrival times finds
+the true earliest arrival.
+"""
+from array import array
+from bisect import bisect_right
+from heapq import heappush, heappop
+
+INF = float('inf')
+
+BUCKETS_PER_DAY = 24  # One speed per hour of the day
+BUCKET_HOURS = 24 / BUCKETS_PER_DAY
+
+def _profile(night, day, peak):
+    """Hourly speeds (km/h): night 21:00-06:00, rush hours 08:00-11:00 and 17:00-21:00, day otherwise."""
+    return [night if hour < 6 or hour >= 21 else peak if 8 <= hour < 11 or 17 <= hour < 21 else day
+            for hour in range(BUCKETS_PER_DAY)]
+
+# Hourly speed profile (km/h) per road class (see G1.ROAD_CLASSES)
+SPEED_PROFILES = {
+    "expressway": _profile(night=90, day=85, peak=70),
+    "nh": _profile(night=65, day=60, peak=45),
+    "sh": _profile(night=45, day=50, peak=35),
+    "hill": _profile(night=20, day=35, peak=30),
+}
+DEFAULT_ROAD_CLASS = "nh"
+
+
+class SpeedTable:
+    """Road classes of a CompactGraph's directed roads plus hours-per-km per (class, bucket)."""
+
+    __slots__ = ("classes", "road_class", "hours_per_km", "km_at", "bucket_paces", "run_lengths")
+
+    def __init__(self, classes, road_class, hours_per_km):
+        self.classes = classes            # class code -> class name
+        self.road_class = road_class      # array('B'), class code per directed road
+        self.hours_per_km = hours_per_km  # array('d'), code * BUCKETS_PER_DAY + bucket -> 1 / speed
+        # array('d'), code * (BUCKETS_PER_DAY + 1) + bucket -> km driven from midnight
+        # to the start of bucket; the last entry of each class is a whole day's km
+        self.km_at = array('d')
+        for row in range(0, len(hours_per_km), BUCKETS_PER_DAY):
+            km = 0.0
+            self.km_at.append(km)
+            for pace in hours_per_km[row:row + BUCKETS_PER_DAY]:
+                km += BUCKET_HOURS / pace
+                self.km_at.append(km)
+        # bucket -> [hours per km of each class], so a road's pace is one list index
+        self.bucket_paces = [hours_per_km[bucket::BUCKETS_PER_DAY].tolist() for bucket in range(BUCKETS_PER_DAY)]
+        # bucket -> buckets from it until any class's speed changes, at most a day
+        self.run_lengths = [_run_length(self.bucket_paces, bucket) for bucket in range(BUCKETS_PER_DAY)]
+
+
+def _run_length(bucket_paces, bucket):
+    """Buckets from bucket on (wrapping past midnight, at most a day) with the same pace for every class."""
+    length = 1
+    while length < BUCKETS_PER_DAY and bucket_paces[(bucket + length) % BUCKETS_PER_DAY] == bucket_paces[bucket]:
+        length += 1
+    return length
+
+
+def build_speed_table(cgraph, road_classes, profiles=None):
+    """
+    Builds the SpeedTable for cgraph. road_classes maps (city, city) name pairs,
+    in either order, to a class in profiles (default SPEED_PROFILES); other roads
+    get DEFAULT_ROAD_CLASS.
+    """
+    profiles = SPEED_PROFILES if profiles is None else profiles
+    classes = sorted(profiles)
+    codes = {name: code for code, name in enumerate(classes)}
+    hours_per_km = array('d', [1 / speed for name in classes for speed in profiles[name]])
+
+    default = codes[DEFAULT_ROAD_CLASS]
+    road_class = array('B', bytes(len(cgraph.targets)))
+    names, targets = cgraph.names, cgraph.targets
+    for a in range(len(cgraph)):
+        for k in range(cgraph.offsets[a], cgraph.offsets[a + 1]):
+            pair = (names[a], names[targets[k]])
+            name = road_classes.get(pair) or road_classes.get(pair[::-1])
+            road_class[k] = codes.get(name, default)
+    return SpeedTable(classes, road_class, hours_per_km)
+
+
+def arrival_time(table, code, km, hours):
+    """
+    Arrival time (hours after midnight of the departure day) when driving km
+    from `hours` on a road of class code. The drive is moved onto the class's
+    km-from-midnight scale (table.km_at), so a road spanning any number of
+    buckets costs one bisect.
+    """
+    hours_per_km, km_at = table.hours_per_km, table.km_at
+    row = code * BUCKETS_PER_DAY
+    base = row + code  # code * (BUCKETS_PER_DAY + 1)
+    days, hours = divmod(hours, 24)
+    bucket = min(int(hours // BUCKET_HOURS), BUCKETS_PER_DAY - 1)
+    position = km_at[base + bucket] + (hours - bucket * BUCKET_HOURS) / hours_per_km[row + bucket] + km
+    more_days, position = divmod(position, km_at[base + BUCKETS_PER_DAY])
+    bucket = bisect_right(km_at, position, base, base + BUCKETS_PER_DAY) - 1 - base
+    return ((days + more_days) * 24 + bucket * BUCKET_HOURS
+            + (position - km_at[base + bucket]) * hours_per_km[row + bucket])
+
+
+def earliest_arrival(cgraph, table, source, target, depart_hours):
+    """
+    Time-dependent Dijkstra from city ID source, leaving depart_hours after
+    midnight. Settles cities in order of arrival time and stops at target.
+    Returns: (path_ids, arrival_hours, distance_km), or None if target is unreachable.
+    """
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    road_class, bucket_paces, run_lengths = table.road_class, table.bucket_paces, table.run_lengths
+    arrivals = [INF] * len(cgraph)
+    previous = [-1] * len(cgraph)
+    via = [-1] * len(cgraph)  # Road index used to reach each city
+    arrivals[source] = depart_hours
+    heap = [(depart_hours, source)]
+
+    while heap:
+        current_time, current = heappop(heap)
+        if current_time > arrivals[current]:
+            continue
+        if current == target:
+            path = []
+            distance = 0.0
+            while current != -1:
+                path.append(current)
+                if via[current] != -1:
+                    distance += weights[via[current]]
+                current = previous[current]
+            path.reverse()
+            return path, current_time, distance
+
+        # Roads ending before the next speed change, or the one after, are
+        # worked out inline; only longer ones go to arrival_time()
+        bucket_index = int(current_time // BUCKET_HOURS)
+        bucket = bucket_index % BUCKETS_PER_DAY
+        paces = bucket_paces[bucket]
+        change_index = bucket_index + run_lengths[bucket]
+        next_paces = bucket_paces[change_index % BUCKETS_PER_DAY]
+        change = change_index * BUCKET_HOURS
+        next_change = (change_index + run_lengths[change_index % BUCKETS_PER_DAY]) * BUCKET_HOURS
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            arrival = current_time + weights[k] * paces[road_class[k]]
+            if arrival > change:
+                code = road_class[k]
+                arrival = change + (weights[k] - (change - current_time) / paces[code]) * next_paces[code]
+                if arrival > next_change:
+                    arrival = arrival_time(table, code, weights[k], current_time)
+            if arrival < arrivals[neighbor]:
+                arrivals[neighbor] = arrival
+                previous[neighbor] = current
+                via[neighbor] = k
+                heappush(heap, (arrival, neighbor))
+    return None
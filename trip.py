@@ -0,0 +1,194 @@
+"""
+Multi-stop trips: the order to visit a set of stops in, over a
+compact.CompactGraph.
+
+    - stop_distances() fills the stop-to-stop distance matrix with one
+      Dijkstra per stop that ends as soon as the remaining stops are settled.
+      Roads are undirected, so stop i only searches for stops after it and
+      the matrix is mirrored.
+    - solve_order() picks the visiting order: Held-Karp dynamic programming
+      (exact) up to EXACT_MAX_STOPS stops, otherwise nearest neighbour
+      followed by 2-opt and Or-opt moves until neither improves the trip.
+
+The first stop is always the start. A round trip returns to it; with
+fixed_end the last stop given stays last; otherwise the trip may end anywhere.
+G2.plan_trip() resolves names, stitches the legs and adds the times.
+"""
+from heapq import heappush, heappop
+
+INF = float('inf')
+
+EXACT_MAX_STOPS = 13  # Held-Karp costs O(2^n * n^2) (about 30 ms at 13); beyond this the heuristic runs
+OR_OPT_SEGMENT = 3    # Longest run of consecutive stops Or-opt tries to move
+
+
+def stop_distances(cgraph, stops):
+    """
+    Shortest distances between the city IDs in stops.
+    Returns (matrix, previous): matrix[i][j] in km (INF if unreachable), and for
+    each stop i the predecessor dict of its search, which covers every stop after i.
+    """
+    n = len(stops)
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    matrix = [[0.0] * n for _ in range(n)]
+    trees = []
+    for i, source in enumerate(stops):
+        wanted = {stop: j for j, stop in enumerate(stops[i + 1:], i + 1)}
+        distances = [INF] * len(cgraph)
+        distances[source] = 0
+        previous = {source: -1}  # Only reached cities, to keep n trees small
+        heap = [(0, source)]
+        remaining = len(wanted)
+        while heap and remaining:
+            current_distance, current = heappop(heap)
+            if current_distance > distances[current]:
+                continue
+            if current in wanted:
+                remaining -= 1
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[k]
+                distance = current_distance + weights[k]
+                if distance < distances[neighbor]:
+                    distances[neighbor] = distance
+                    previous[neighbor] = current
+                    heappush(heap, (distance, neighbor))
+        for stop, j in wanted.items():
+            matrix[i][j] = matrix[j][i] = distances[stop]
+        trees.append(previous)
+    return matrix, trees
+
+def leg_path(stops, trees, i, j):
+    """City IDs of the shortest path from stops[i] to stops[j], from the stop_distances() trees."""
+    if i > j:
+        path = leg_path(stops, trees, j, i)
+        path.reverse()
+        return path
+    previous = trees[i]
+    path = []
+    city = stops[j]
+    while city != -1:
+        path.append(city)
+        city = previous[city]
+    path.reverse()
+    return path
+
+
+# --- ORDERING ---
+
+def trip_length(matrix, order, round_trip=False):
+    """Total km of visiting order (stop indices), returning to order[0] if round_trip."""
+    total = sum(matrix[a][b] for a, b in zip(order, order[1:]))
+    return total + matrix[order[-1]][order[0]] if round_trip else total
+
+def held_karp(matrix, round_trip=False, fixed_end=False):
+    """Exact shortest visiting order starting at stop 0. Returns a list of stop indices."""
+    n = len(matrix)
+    last_stop = n - 1 if fixed_end and n > 1 else None
+    free = [s for s in range(1, n) if s != last_stop]
+    m = len(free)
+    if m == 0:
+        return [0] + ([last_stop] if last_stop is not None else [])
+
+    # cost[mask * m + k]: shortest path from stop 0 through the free stops in mask, ending at free[k]
+    size = 1 << m
+    cost = [INF] * (size * m)
+    parent = [-1] * (size * m)
+    for k, stop in enumerate(free):
+        cost[(1 << k) * m + k] = matrix[0][stop]
+    for mask in range(1, size):
+        base = mask * m
+        for k in range(m):
+            current = cost[base + k]
+            if current == INF:
+                continue
+            row = matrix[free[k]]
+            for nxt in range(m):
+                bit = 1 << nxt
+                if mask & bit:
+                    continue
+                index = (mask | bit) * m + nxt
+                candidate = current + row[free[nxt]]
+                if candidate < cost[index]:
+                    cost[index] = candidate
+                    parent[index] = k
+
+    # Close the path: back to the start, on to the fixed last stop, or nowhere
+    full = (size - 1) * m
+    end = 0 if round_trip else last_stop
+    _, k = min((cost[full + k] + (matrix[free[k]][end] if end is not None else 0), k) for k in range(m))
+    order = []
+    mask = size - 1
+    while k != -1:
+        order.append(free[k])
+        k, mask = parent[mask * m + k], mask & ~(1 << k)
+    order.append(0)
+    order.reverse()
+    return order + ([last_stop] if last_stop is not None else [])
+
+def nearest_neighbor(matrix, round_trip=False, fixed_end=False):
+    """Greedy order from stop 0: always drive to the closest unvisited stop."""
+    n = len(matrix)
+    last_stop = n - 1 if fixed_end and n > 1 else None
+    unvisited = {s for s in range(1, n) if s != last_stop}
+    order = [0]
+    while unvisited:
+        row = matrix[order[-1]]
+        nxt = min(unvisited, key=row.__getitem__)
+        unvisited.remove(nxt)
+        order.append(nxt)
+    return order + ([last_stop] if last_stop is not None else [])
+
+def improve_order(matrix, order, round_trip=False, fixed_end=False):
+    """
+    Applies improving 2-opt (reverse a stretch) and Or-opt (move a run of up to
+    OR_OPT_SEGMENT stops elsewhere) moves until neither finds one. The first
+    stop, and the last one with fixed_end, never move. Returns the new order.
+    """
+    # Work on a route whose ends are fixed: a round trip is closed by repeating stop 0
+    route = order + [order[0]] if round_trip else list(order)
+    last = len(route) - 1 if round_trip or fixed_end else len(route)  # First position that may not move
+    d = matrix
+
+    def edge(a, b):
+        return d[route[a]][route[b]] if b < len(route) else 0.0
+
+    improved = True
+    while improved:
+        improved = False
+        # 2-opt: reverse route[i..j]
+        for i in range(1, last - 1):
+            for j in range(i + 1, last):
+                delta = (d[route[i - 1]][route[j]] + edge(i, j + 1)) - (edge(i - 1, i) + edge(j, j + 1))
+                if delta < -1e-9:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    improved = True
+        # Or-opt: move route[i..i+length-1] between two other neighbours, either way round
+        for length in range(1, OR_OPT_SEGMENT + 1):
+            i = 1
+            while i + length <= last:
+                j = i + length - 1
+                removed = edge(i - 1, i) + edge(j, j + 1) - edge(i - 1, j + 1)
+                segment = route[i:j + 1]
+                rest = route[:i] + route[j + 1:]
+                best = None
+                for p in range(1, len(rest) - (len(route) - last) + 1):
+                    a = rest[p - 1]
+                    b = rest[p] if p < len(rest) else None
+                    link = d[a][b] if b is not None else 0.0
+                    for candidate in (segment, segment[::-1]):
+                        added = d[a][candidate[0]] + (d[candidate[-1]][b] if b is not None else 0.0) - link
+                        if added - removed < -1e-9 and (best is None or added - removed < best[0]):
+                            best = (added - removed, p, candidate)
+                if best is not None:
+                    _, p, candidate = best
+                    route[:] = rest[:p] + candidate + rest[p:]
+                    improved = True
+                i += 1
+
+    return route[:-1] if round_trip else route
+
+def solve_order(matrix, round_trip=False, fixed_end=False):
+    """Visiting order (stop indices, starting with 0): exact for small trips, heuristic above EXACT_MAX_STOPS."""
+    if len(matrix) <= EXACT_MAX_STOPS:
+        return held_karp(matrix, round_trip, fixed_end)
+    return improve_order(matrix, nearest_neighbor(matrix, round_trip, fixed_end), round_trip, fixed_end)